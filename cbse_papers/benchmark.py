@@ -0,0 +1,624 @@
+"""
+Offline benchmark for scraper.py.
+
+Starts local stand-ins for cbseacademic.nic.in, cbse.gov.in, vedantu.com and
+(optionally) selfstudys.com that reproduce the URL layouts the scraper uses:
+candidate filename patterns of which only one per folder exists, multi-set
+ZIP archives, multi-MB PDFs (generated on the fly, so any byte range can be
+served without holding them in memory) and static HTML for the selfstudys
+listing/subject/year pages. Every server honours HEAD, ETag/If-None-Match and
+Range/If-Range, and can add latency and inject 503s.
+
+Each configuration runs in its own subprocess against a fresh download
+directory, so peak RSS is per run. A "warm" pass repeats the run on the same
+directory to measure revalidation (304s, known-missing skips).
+
+Usage:
+    python benchmark.py                                 # serial vs. 8 workers
+    python benchmark.py --workers 1,4,8 --latency 0.05 --error-rate 0.02
+    python benchmark.py --output bench.json             # save results
+    python benchmark.py --baseline bench.json           # exit 1 on regression
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import hashlib
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import scraper
+
+ACADEMIC_PATH = urlsplit(scraper.ACADEMIC_BASE).path
+GOV_PATH = urlsplit(scraper.GOV_BASE).path
+VEDANTU_PATH = urlsplit(scraper.VEDANTU_BASE).path
+SELFSTUDYS_PATH = urlsplit(scraper.SELFSTUDYS_LISTING).path
+
+SOURCES = ("cbseacademic", "cbse_gov", "direct", "selfstudys")
+DEFAULT_SOURCES = ("cbseacademic", "cbse_gov", "direct")
+REAL_BASES = {
+    "cbseacademic": scraper.ACADEMIC_BASE,
+    "cbse_gov": scraper.GOV_BASE,
+    "direct": scraper.VEDANTU_BASE,
+    "selfstudys": scraper.SELFSTUDYS_BASE,
+}
+PLANNERS = {
+    "cbseacademic": scraper.plan_cbse_academic,
+    "cbse_gov": scraper.plan_cbse_gov,
+    "direct": scraper.plan_direct_links,
+    "selfstudys": scraper.plan_selfstudys,
+}
+GOV_SETS = 3                # question-paper sets per cbse.gov.in ZIP
+PDF_PAGES = 12              # /Type /Page objects per synthetic PDF
+UNLIMITED_RATE = (1e6, 10**6)
+
+# Metric, and whether a larger value is better, for --baseline comparisons
+COMPARED = {
+    "wall_seconds": False,
+    "requests_per_second": True,
+    "mb_per_second": True,
+    "peak_rss_mb": False,
+}
+
+
+def _bucket(key: str, n: int) -> int:
+    """Deterministic 0..n-1 choice, so every run sees the same fixture."""
+    return zlib.crc32(key.encode()) % n
+
+
+# ---------------------------------------------------------------------------
+# Fixture content
+# ---------------------------------------------------------------------------
+class SyntheticPdf:
+    """A PDF of `size` bytes whose content is derived from `key`.
+
+    Any byte range is generated on demand; two instances with the same key
+    and size are byte-identical (which is how vedantu duplicates gov papers).
+    """
+
+    def __init__(self, key: str, size: int):
+        seed = hashlib.sha256(key.encode()).digest()
+        self.head = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n" + b"".join(
+            b"%d 0 obj << /Type /Page /Parent 1 0 R >> endobj\n" % (i + 2) for i in range(PDF_PAGES))
+        self.tail = b"\ntrailer << /Root 1 0 R >>\n%%EOF\n"
+        self.block = b"% " + seed.hex().encode() * 64 + b"\n"
+        self.fill = max(0, size - len(self.head) - len(self.tail))
+        self.size = len(self.head) + self.fill + len(self.tail)
+        self.etag = '"%s"' % seed.hex()[:16]
+
+    def chunks(self, start: int = 0, stop: int | None = None, chunk: int = 64 * 1024):
+        stop = self.size if stop is None else stop
+        body_end = len(self.head) + self.fill
+        pos = start
+        while pos < stop:
+            if pos < len(self.head):
+                piece = self.head[pos:min(stop, len(self.head))]
+            elif pos < body_end:
+                offset = (pos - len(self.head)) % len(self.block)
+                n = min(chunk, stop - pos, body_end - pos)
+                reps = (offset + n) // len(self.block) + 1
+                piece = (self.block * reps)[offset:offset + n]
+            else:
+                piece = self.tail[pos - body_end:stop - body_end]
+            pos += len(piece)
+            yield piece
+
+
+class FileBody:
+    """A file on disk (the gov ZIPs), with the same interface as SyntheticPdf."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.size = path.stat().st_size
+        self.etag = '"%x-%x"' % (self.size, zlib.crc32(path.name.encode()))
+
+    def chunks(self, start: int = 0, stop: int | None = None, chunk: int = 64 * 1024):
+        stop = self.size if stop is None else stop
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            while start < stop:
+                piece = f.read(min(chunk, stop - start))
+                if not piece:
+                    break
+                start += len(piece)
+                yield piece
+
+
+class HtmlBody:
+    def __init__(self, html: str):
+        self.data = html.encode()
+        self.size = len(self.data)
+        self.etag = '"%s"' % hashlib.sha1(self.data).hexdigest()[:16]
+
+    def chunks(self, start: int = 0, stop: int | None = None, chunk: int = 0):
+        yield self.data[start:stop]
+
+
+def academic_catalogue(pdf_size: int) -> dict:
+    """One filename pattern per folder, as on the real site; some MS missing."""
+    routes = {}
+    for exam_year, folder in scraper.ACADEMIC_YEARS.items():
+        if exam_year < 2016 or exam_year > 2026:
+            continue
+        pattern = scraper.ACADEMIC_URL_PATTERNS[_bucket(folder, len(scraper.ACADEMIC_URL_PATTERNS))]
+        for subject, names in scraper.SUBJECTS.items():
+            for kind in ("SQP", "MS"):
+                if kind == "MS" and _bucket(folder + subject, 6) == 0:
+                    continue
+                path = f"{ACADEMIC_PATH}/{folder}/" + pattern.format(name=names["academic"], kind=kind)
+                routes[path] = ("pdf", f"academic/{folder}/{subject}/{kind}", pdf_size)
+    return routes
+
+
+def gov_catalogue(pdf_size: int) -> dict:
+    """A ZIP of GOV_SETS papers per subject/year; some only as a bare PDF, some absent."""
+    routes = {}
+    for year in range(2022, 2026):
+        for subject, names in scraper.SUBJECTS.items():
+            gov = names["gov"]
+            key = f"gov/{year}/{gov}"
+            choice = _bucket(key, 8)
+            if choice == 0:
+                continue
+            if choice == 1:
+                routes[f"{GOV_PATH}/{year}/XII/{gov}.pdf"] = ("pdf", f"{key}/1", pdf_size)
+                continue
+            members = [(f"{gov}_{year}_Set{i}.pdf", f"{key}/{i}") for i in range(1, GOV_SETS + 1)]
+            routes[f"{GOV_PATH}/{year}/XII/{gov}.zip"] = ("zip", key, members, pdf_size)
+    return routes
+
+
+def direct_catalogue(pdf_size: int) -> dict:
+    """vedantu papers: one of the two URL patterns per year; 2022+ duplicate gov set 1."""
+    routes = {}
+    for job in scraper.plan_direct_links():
+        subject, year = job["subject"], job["year"]
+        urls = job["payload"]["urls"]
+        path = urlsplit(urls[year % len(urls)]).path
+        gov = scraper.SUBJECTS.get(subject, {}).get("gov", subject)
+        key = f"gov/{year}/{gov}/1" if year >= 2022 else f"vedantu/{year}/{subject}"
+        routes[path] = ("pdf", key, pdf_size)
+    return routes
+
+
+def selfstudys_catalogue(pdf_size: int) -> dict:
+    """Listing -> subject -> year pages, with PDF links, an embedded viewer and blockable assets."""
+    assets = '<link rel="stylesheet" href="/static/site.css"><img src="/static/logo.png">'
+    page = "<!doctype html><html><head><title>{title}</title>%s</head><body>{body}</body></html>" % assets
+    routes = {
+        "/static/site.css": ("html", "body{}"),
+        "/static/logo.png": ("html", ""),
+    }
+    subject_links = []
+    for subject, (slug, short) in scraper.SELFSTUDYS_SUBJECTS.items():
+        subject_path = f"{SELFSTUDYS_PATH}/{slug}"
+        subject_links.append(f'<a href="{subject_path}">{subject} Previous Year Papers</a>')
+        year_links = []
+        for year in range(2015, 2026):
+            year_path = f"{subject_path}/{year}"
+            year_links.append(f'<a href="{year_path}">CBSE Class 12 {subject} {year}</a>')
+            paper = f"/uploads/pdf/{short}-{year}-question-paper.pdf"
+            solution = f"/uploads/pdf/{short}-{year}-solutions.pdf"
+            routes[paper] = ("pdf", f"selfstudys/{short}/{year}/paper", pdf_size)
+            routes[solution] = ("pdf", f"selfstudys/{short}/{year}/solutions", pdf_size)
+            body = (f'<h1>{subject} {year}</h1><a href="{paper}">Question Paper</a>'
+                    f'<a href="{solution}?download=1">Download Solutions</a>'
+                    f'<iframe src="{paper}?viewer=1"></iframe>')
+            routes[year_path] = ("html", page.format(title=f"{subject} {year}", body=body))
+        routes[subject_path] = ("html", page.format(title=subject, body="".join(year_links)))
+    routes[SELFSTUDYS_PATH] = ("html", page.format(title="CBSE Class 12", body="".join(subject_links)))
+    return routes
+
+
+CATALOGUES = {
+    "cbseacademic": academic_catalogue,
+    "cbse_gov": gov_catalogue,
+    "direct": direct_catalogue,
+    "selfstudys": selfstudys_catalogue,
+}
+
+
+# ---------------------------------------------------------------------------
+# Stand-in servers
+# ---------------------------------------------------------------------------
+class StandInServer(ThreadingHTTPServer):
+    """Serves one source's catalogue, counting requests, statuses and bytes sent."""
+
+    daemon_threads = True
+
+    def __init__(self, routes: dict, workdir: Path, latency: float, error_rate: float, seed: int):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.routes = routes
+        self.workdir = workdir
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.bodies: dict[str, object] = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.statuses: dict[int, int] = {}
+
+    def count(self, status: int, nbytes: int = 0):
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += nbytes
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def inject_error(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    def body(self, path: str):
+        """The body for `path`, or None for a 404. ZIPs are built on first request."""
+        route = self.routes.get(path)
+        if route is None:
+            return None
+        with self.lock:
+            body = self.bodies.get(path)
+            if body is None:
+                body = self.bodies[path] = self._build(path, route)
+        return body
+
+    def _build(self, path: str, route: tuple):
+        kind = route[0]
+        if kind == "pdf":
+            return SyntheticPdf(route[1], route[2])
+        if kind == "html":
+            return HtmlBody(route[1])
+        _, key, members, pdf_size = route
+        archive = self.workdir / (hashlib.sha1(key.encode()).hexdigest() + ".zip")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+            for name, member_key in members:
+                with zf.open(name, "w", force_zip64=True) as out:
+                    for piece in SyntheticPdf(member_key, pdf_size).chunks():
+                        out.write(piece)
+        return FileBody(archive)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive, so connection pooling is measured
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _empty(self, status: int, **headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        self.server.count(status)
+
+    def _respond(self, send_body: bool):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.inject_error():
+            return self._empty(503)
+        body = self.server.body(unquote(self.path.split("?")[0]))
+        if body is None:
+            return self._empty(404)
+        if self.headers.get("If-None-Match") == body.etag:
+            return self._empty(304, ETag=body.etag)
+
+        start, stop, status = 0, body.size, 200
+        range_header = self.headers.get("Range", "")
+        if_range = self.headers.get("If-Range")
+        if range_header.startswith("bytes=") and (if_range is None or if_range == body.etag):
+            first, _, last = range_header[6:].partition("-")
+            start = int(first or 0)
+            stop = min(body.size, int(last) + 1) if last else body.size
+            if start >= body.size:
+                return self._empty(416, Content_Range=f"bytes */{body.size}")
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html" if isinstance(body, HtmlBody) else "application/octet-stream")
+        self.send_header("Content-Length", str(stop - start))
+        self.send_header("ETag", body.etag)
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{stop - 1}/{body.size}")
+        self.end_headers()
+        sent = 0
+        if send_body:
+            try:
+                for piece in body.chunks(start, stop):
+                    self.wfile.write(piece)
+                    sent += len(piece)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+        self.server.count(status, sent)
+
+
+class StandIn:
+    """All source servers, each on its own port (and so its own host, bucket and concurrency limit)."""
+
+    def __init__(self, sources, pdf_size: int, latency: float, error_rate: float, seed: int):
+        self.tmp = tempfile.TemporaryDirectory(prefix="cbse-bench-")
+        workdir = Path(self.tmp.name)
+        self.servers = {
+            source: StandInServer(CATALOGUES[source](pdf_size), workdir, latency, error_rate, seed)
+            for source in sources
+        }
+        self.threads = [
+            threading.Thread(target=server.serve_forever, daemon=True) for server in self.servers.values()
+        ]
+
+    def __enter__(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+        self.tmp.cleanup()
+
+    def bases(self) -> dict:
+        """The local replacement for each source's REAL_BASES entry."""
+        bases = {}
+        for source, server in self.servers.items():
+            real = urlsplit(REAL_BASES[source])
+            bases[source] = f"http://127.0.0.1:{server.server_address[1]}{real.path}"
+        return bases
+
+    def reset_stats(self):
+        for server in self.servers.values():
+            server.reset_stats()
+
+    def stats(self) -> dict:
+        statuses: dict[str, int] = {}
+        for server in self.servers.values():
+            for status, n in server.statuses.items():
+                statuses[str(status)] = statuses.get(str(status), 0) + n
+        return {
+            "requests": sum(s.requests for s in self.servers.values()),
+            "bytes": sum(s.bytes_sent for s in self.servers.values()),
+            "statuses": dict(sorted(statuses.items())),
+        }
+
+
+# ---------------------------------------------------------------------------
+# One scraper run (in a subprocess)
+# ---------------------------------------------------------------------------
+def run_one(config: dict):
+    """Point scraper.py at the stand-ins, run the planned jobs, write a result JSON."""
+    bases = config["bases"]
+    if "cbseacademic" in bases:
+        scraper.ACADEMIC_BASE = bases["cbseacademic"]
+    if "cbse_gov" in bases:
+        scraper.GOV_BASE = bases["cbse_gov"]
+    if "direct" in bases:
+        scraper.VEDANTU_BASE = bases["direct"]
+    if "selfstudys" in bases:
+        local = urlsplit(bases["selfstudys"])
+        scraper.SELFSTUDYS_BASE = f"{local.scheme}://{local.netloc}"
+        scraper.SELFSTUDYS_LISTING = scraper.SELFSTUDYS_BASE + SELFSTUDYS_PATH
+
+    # Each stand-in inherits its real host's concurrency limit, and its rate
+    # limit too when --politeness real.
+    for source, base in bases.items():
+        real_host, local_host = urlsplit(REAL_BASES[source]).netloc, urlsplit(base).netloc
+        scraper.HOST_CONCURRENCY[local_host] = scraper.HOST_CONCURRENCY.get(
+            real_host, scraper.DEFAULT_HOST_CONCURRENCY)
+        if config["politeness"] == "real":
+            scraper.HOST_RATE_LIMITS[local_host] = scraper.HOST_RATE_LIMITS.get(real_host, scraper.DEFAULT_RATE_LIMIT)
+        else:
+            scraper.HOST_RATE_LIMITS[local_host] = UNLIMITED_RATE
+
+    scraper.JOB_BACKOFF_BASE = config["job_backoff"]
+    scraper.log.setLevel(config.get("log_level", "WARNING"))
+    scraper.use_download_dir(Path(config["download_dir"]))
+    scraper.DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    workers = config["workers"]
+    scraper.configure_session(pool_maxsize=max(workers, 1))
+
+    queue = scraper.JobQueue(scraper.JOBS_FILE)
+    jobs = [job for source in config["sources"] for job in PLANNERS[source]()]
+    queue.start_run(jobs)
+
+    t0 = time.perf_counter()
+    scraper.run_jobs(queue, workers)
+    scraper.save_state()
+    wall = time.perf_counter() - t0
+
+    snap = scraper.metrics.snapshot()
+    counters: dict[str, float] = {}
+    for c in snap["counters"]:
+        counters[c["name"]] = counters.get(c["name"], 0) + c["value"]
+    result = {
+        "wall_seconds": wall,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "jobs": queue.stats(),
+        "client": {name: counters.get(name, 0) for name in (
+            "http_requests_total", "http_retries_total", "http_errors_total",
+            "download_bytes_total", "zip_extracted_bytes_total",
+        )},
+    }
+    Path(config["result"]).write_text(json.dumps(result, indent=2))
+
+
+def run_config(standin: StandIn, args, workers: int, download_dir: Path, phase: str) -> dict:
+    result_file = download_dir.with_name(download_dir.name + f"-{phase}.json")
+    config = {
+        "bases": standin.bases(),
+        "sources": args.sources,
+        "workers": workers,
+        "politeness": args.politeness,
+        "job_backoff": args.job_backoff,
+        "download_dir": str(download_dir),
+        "result": str(result_file),
+        "log_level": "INFO" if args.verbose else "WARNING",
+    }
+    standin.reset_stats()
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(config)],
+        stdout=subprocess.PIPE, stderr=None if args.verbose else subprocess.PIPE, text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr or "")
+        raise SystemExit(f"benchmark run workers={workers} {phase} failed (exit {proc.returncode})")
+    result = json.loads(result_file.read_text())
+    server = standin.stats()
+    wall = result["wall_seconds"]
+    result.update(
+        name=f"workers={workers} {phase}",
+        workers=workers,
+        phase=phase,
+        server=server,
+        requests_per_second=server["requests"] / wall if wall else 0.0,
+        mb_per_second=server["bytes"] / 1e6 / wall if wall else 0.0,
+    )
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+def print_table(results: list[dict]):
+    header = f"{'config':<20} {'wall s':>8} {'req/s':>8} {'MB/s':>8} {'MB':>8} {'RSS MB':>8} {'jobs ok/fail':>13}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        ok = sum(s["ok"] for s in r["jobs"].values())
+        fail = sum(s["fail"] for s in r["jobs"].values())
+        print(f"{r['name']:<20} {r['wall_seconds']:>8.2f} {r['requests_per_second']:>8.1f} "
+              f"{r['mb_per_second']:>8.1f} {r['server']['bytes'] / 1e6:>8.1f} {r['peak_rss_mb']:>8.1f} "
+              f"{ok:>6}/{fail:<6}")
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions of more than `tolerance` (a fraction) against `baseline`."""
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = previous.get(r["name"])
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            before, after = old.get(metric), r.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{r['name']}: {metric} {before:.2f} -> {after:.2f} ({change:+.0%})")
+    return regressions
+
+
+def parse_workers(value: str) -> list[int]:
+    try:
+        workers = [int(w) for w in value.split(",") if w.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {value!r}")
+    if not workers or min(workers) < 1:
+        raise argparse.ArgumentTypeError("worker counts must be >= 1")
+    return workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scraper.py against local stand-ins for the CBSE sources")
+    parser.add_argument("--run-one", metavar="CONFIG", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--workers", type=parse_workers, default=[1, scraper.MAX_WORKERS],
+        help=f"comma-separated worker counts to compare; 1 = serial (default: 1,{scraper.MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--sources", type=lambda v: v.split(","), default=list(DEFAULT_SOURCES),
+        help=f"comma-separated sources from {', '.join(SOURCES)} (default: {','.join(DEFAULT_SOURCES)})",
+    )
+    parser.add_argument(
+        "--selfstudys", action="store_true",
+        help="also crawl the selfstudys HTML fixture (needs playwright and chromium)",
+    )
+    parser.add_argument("--pdf-mb", type=float, default=2.0, help="size of each served PDF (default: 2.0)")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response (default: 0.02)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503 (default: 0)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for error injection (default: 1)")
+    parser.add_argument(
+        "--politeness", choices=("off", "real"), default="off",
+        help="'real' applies the production per-host rate limits; 'off' measures the scraper itself",
+    )
+    parser.add_argument(
+        "--job-backoff", type=float, default=0.5,
+        help=f"base delay before retrying a failed job (default: 0.5; production: {scraper.JOB_BACKOFF_BASE})",
+    )
+    parser.add_argument("--no-warm", action="store_true", help="skip the warm rerun on each download dir")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="results JSON from an earlier run to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="allowed fractional regression against --baseline (default: 0.2)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="show the scraper's own log")
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        run_one(json.loads(args.run_one))
+        return
+    if args.selfstudys and "selfstudys" not in args.sources:
+        args.sources.append("selfstudys")
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    settings = {
+        "sources": args.sources, "pdf_mb": args.pdf_mb, "latency": args.latency,
+        "error_rate": args.error_rate, "politeness": args.politeness, "job_backoff": args.job_backoff,
+        "seed": args.seed,
+    }
+    print("Benchmark: " + ", ".join(f"{k}={v}" for k, v in settings.items()))
+
+    results = []
+    pdf_size = int(args.pdf_mb * 1024 * 1024)
+    with StandIn(args.sources, pdf_size, args.latency, args.error_rate, args.seed) as standin, \
+            tempfile.TemporaryDirectory(prefix="cbse-bench-runs-") as runs:
+        for workers in args.workers:
+            download_dir = Path(runs) / f"workers-{workers}"
+            for phase in ("cold",) if args.no_warm else ("cold", "warm"):
+                results.append(run_config(standin, args, workers, download_dir, phase))
+                print(f"  {results[-1]['name']}: {results[-1]['wall_seconds']:.2f}s", flush=True)
+
+    print()
+    print_table(results)
+    if args.output:
+        args.output.write_text(json.dumps({"settings": settings, "results": results}, indent=2))
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("settings") != settings:
+            print(f"\nWARNING: baseline settings differ: {baseline.get('settings')}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,13 +12,29 @@ import re
 import sys
 import time
 import json
+import mmap
+import zlib
+import sqlite3
+import random
+import hashlib
+import shutil
 import zipfile
+import tempfile
+import asyncio
 import logging
+import cProfile
+import pstats
+import argparse
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from io import BytesIO
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
-from urllib.parse import urljoin, quote
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, quote, urlsplit
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 # ---------------------------------------------------------------------------
 # Config
@@ -50,6 +66,11 @@ ACADEMIC_YEARS = {
     2026: "ClassXII_2025_26",
 }
 
+# Source URL roots (overridable, e.g. by benchmark.py's local stand-in servers)
+ACADEMIC_BASE = "https://cbseacademic.nic.in/web_material/SQP"
+GOV_BASE = "https://www.cbse.gov.in/cbsenew/question-paper"
+VEDANTU_BASE = "https://www.vedantu.com/content/cbse/class-12"
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -59,6 +80,109 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
 
+# Concurrency + politeness. Each host gets its own token bucket:
+# (sustained requests/second, burst size).
+MAX_WORKERS = 8
+HOST_RATE_LIMITS = {
+    "cbseacademic.nic.in": (2.0, 4),
+    "www.cbse.gov.in":     (1.0, 2),
+    "www.selfstudys.com":  (2.0, 4),
+    "www.vedantu.com":     (3.0, 6),
+}
+DEFAULT_RATE_LIMIT = (2.0, 4)
+
+# Shared HTTP session: keep-alive pools per host, retries with backoff.
+POOL_CONNECTIONS = 8             # number of per-host pools kept alive
+POOL_MAXSIZE = MAX_WORKERS       # keep-alive connections per host
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5               # seconds; doubles per attempt, full jitter
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CHUNK_SIZE = 64 * 1024           # bytes per streamed read/write
+
+# Revalidation cache: ETag/Last-Modified per URL, plus URLs known to 404.
+HTTP_CACHE_FILE = DOWNLOAD_DIR / ".http_cache.json"
+NEGATIVE_CACHE_TTL = 7 * 24 * 3600    # seconds before a 404 is probed again
+NEGATIVE_STATUSES = {404, 410}
+
+# cbseacademic.nic.in file naming variants, tried per academic-year folder.
+# The variant that wins is remembered per folder in URL_PATTERNS_FILE.
+ACADEMIC_URL_PATTERNS = [
+    "{name}-{kind}.pdf",
+    "{name}_{kind}.pdf",
+    "{name} {kind}.pdf",
+]
+URL_PATTERNS_FILE = DOWNLOAD_DIR / ".url_patterns.json"
+
+# Content-addressed store: every PDF lives once under STORE_DIR by SHA-256;
+# the per-subject/year files are hardlinks into it. MANIFEST_FILE indexes
+# every file (URL, source, subject, year, size, hash, pages, fetch time).
+STORE_DIR = DOWNLOAD_DIR / ".store"
+MANIFEST_FILE = DOWNLOAD_DIR / "manifest.sqlite"
+
+# selfstudys.com crawler: a pool of browser pages shared by all subjects and
+# years, with everything but documents/scripts blocked at the network layer.
+SELFSTUDYS_BASE = "https://www.selfstudys.com"
+SELFSTUDYS_LISTING = f"{SELFSTUDYS_BASE}/books/cbse-prev-paper/english/class-12th"
+BROWSER_PAGES = 4
+NAV_TIMEOUT = 30000              # ms for page.goto
+SETTLE_TIMEOUT = 8000            # ms to wait for network idle / target selectors
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_URL_PARTS = (
+    "googlesyndication.", "doubleclick.", "google-analytics.", "googletagmanager.",
+    "adservice.", "facebook.net", "amazon-adsystem.", "taboola.", "outbrain.",
+)
+SELFSTUDYS_SUBJECTS = {
+    "Physics":          ("physics-pyp", "physics"),
+    "Chemistry":        ("chemistry-pyp", "chemistry"),
+    "Mathematics":      ("mathematics-pyp", "mathematics"),
+    "Biology":          ("biology-pyp", "biology"),
+    "English":          ("english-pyp", "english"),
+    "Computer Science": ("computer-science-pyp", "computer-science"),
+}
+
+# Link classification, compiled once: a year 2015-2025 anywhere in the link
+# text or href, and a subject by its slug (in the href) or name (in the text).
+YEAR_RE = re.compile(r"(?<!\d)(201[5-9]|202[0-5])(?!\d)")
+_SUBJECT_KEYS = {f"s{i}": subject for i, subject in enumerate(SELFSTUDYS_SUBJECTS)}
+SUBJECT_SLUG_RE = re.compile("|".join(
+    f"(?P<{key}>{re.escape(SELFSTUDYS_SUBJECTS[subject][0])})" for key, subject in _SUBJECT_KEYS.items()))
+SUBJECT_NAME_RE = re.compile("|".join(
+    f"(?P<{key}>{re.escape(subject.lower())})" for key, subject in _SUBJECT_KEYS.items()))
+
+# Job queue: one persisted job per (source, subject, year, document), run
+# concurrently across hosts under per-host limits, resumable after a crash.
+JOBS_FILE = DOWNLOAD_DIR / "jobs.sqlite"
+JOB_MAX_ATTEMPTS = 3
+JOB_BACKOFF_BASE = 5.0           # seconds; doubles per failed attempt
+JOB_BACKOFF_MAX = 300.0
+HOST_CONCURRENCY = {
+    "cbseacademic.nic.in": 4,
+    "www.cbse.gov.in":     2,
+    "www.selfstudys.com":  1,    # the crawl job drives one browser for all subjects
+}
+DEFAULT_HOST_CONCURRENCY = 4
+
+# Metrics: written at the end of every run (also on Ctrl-C).
+METRICS_JSON = DOWNLOAD_DIR / "metrics.json"
+METRICS_PROM = DOWNLOAD_DIR / "metrics.prom"    # node_exporter textfile format
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# In-page scripts: harvest everything a scan needs in one round trip.
+HARVEST_LINKS_JS = """
+() => Array.from(document.querySelectorAll("a"),
+                 a => [a.getAttribute("href") || "", (a.innerText || "").trim()])
+"""
+HARVEST_DOCUMENTS_JS = """
+() => ({
+    links: Array.from(document.querySelectorAll("a[href*='.pdf'], a[href*='download']"),
+                      a => [a.getAttribute("href") || "", (a.innerText || "").trim()]),
+    frames: Array.from(document.querySelectorAll("iframe[src*='.pdf']"),
+                       f => f.getAttribute("src") || ""),
+})
+"""
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s  %(levelname)-8s  %(message)s",
@@ -67,101 +191,1130 @@ logging.basicConfig(
 log = logging.getLogger("cbse_scraper")
 
 
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+class Metrics:
+    """Thread-safe counters, gauges and fixed-bucket histograms, keyed by name + labels.
+
+    Exported as JSON (with derived per-host bytes/sec) and in the Prometheus
+    text format for node_exporter's textfile collector.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters: dict[tuple, float] = {}
+        self.gauges: dict[tuple, float] = {}
+        self.histograms: dict[tuple, list] = {}    # key -> [bucket counts..., +Inf count, sum]
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[i] += 1
+            hist[len(self.buckets)] += 1
+            hist[-1] += value
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self.counters.items())]
+            gauges = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self.gauges.items())]
+            histograms = [
+                {"name": n, "labels": dict(l), "count": h[len(self.buckets)], "sum": h[-1],
+                 "buckets": dict(zip(map(str, self.buckets), h[:len(self.buckets)]))}
+                for (n, l), h in sorted(self.histograms.items())
+            ]
+        throughput = {}
+        byte_totals = {c["labels"]["host"]: c["value"] for c in counters if c["name"] == "download_bytes_total"}
+        for h in histograms:
+            host = h["labels"].get("host")
+            if h["name"] == "download_seconds" and h["sum"] and host in byte_totals:
+                throughput[host] = byte_totals[host] / h["sum"]
+        return {"counters": counters, "gauges": gauges, "histograms": histograms,
+                "download_bytes_per_second": throughput}
+
+    def write_json(self, path: Path):
+        _write_atomic(path, json.dumps(self.snapshot(), indent=2))
+
+    def write_prometheus(self, path: Path, prefix: str = "cbse_scraper_"):
+        def fmt(labels: dict, extra: str = "") -> str:
+            parts = [f'{k}="{_escape_label(v)}"' for k, v in labels.items()]
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        snap = self.snapshot()
+        lines, typed = [], set()
+        for kind in ("counter", "gauge"):
+            for c in snap[kind + "s"]:
+                name = prefix + c["name"]
+                if name not in typed:
+                    lines.append(f"# TYPE {name} {kind}")
+                    typed.add(name)
+                lines.append(f"{name}{fmt(c['labels'])} {c['value']}")
+        for h in snap["histograms"]:
+            name = prefix + h["name"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in [*h["buckets"].items(), ("+Inf", h["count"])]:
+                le = 'le="%s"' % bound
+                lines.append(f"{name}_bucket{fmt(h['labels'], le)} {count}")
+            lines.append(f"{name}_sum{fmt(h['labels'])} {h['sum']}")
+            lines.append(f"{name}_count{fmt(h['labels'])} {h['count']}")
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _escape_label(value) -> str:
+    """A Prometheus label value: backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+metrics = Metrics()
+
+
+class JobProfiler:
+    """Optional per-run profiler (`--profile cprofile|pyinstrument`).
+
+    Both profilers only see the thread they run on, so jobs are profiled on
+    their own worker thread and the results are merged when dumped. cProfile
+    can only be enabled on one thread at a time (on Python 3.12+ a second
+    enable raises), so with it jobs are sampled: a job that starts while
+    another is being profiled runs unprofiled.
+    """
+
+    def __init__(self, kind: str, path: Path):
+        self.kind = kind
+        self.path = path
+        self.lock = threading.Lock()
+        self.active = threading.Lock()      # held by the job cProfile is enabled for
+        self.results = []
+        self.skipped = 0
+        if kind == "pyinstrument":
+            import pyinstrument  # noqa: F401 — fail fast if it isn't installed
+
+    def wrap(self, fn):
+        def profiled(*args, **kwargs):
+            if self.kind == "cprofile":
+                if not self.active.acquire(blocking=False):
+                    with self.lock:
+                        self.skipped += 1
+                    return fn(*args, **kwargs)
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                from pyinstrument import Profiler
+                profiler = Profiler(async_mode="disabled")
+                profiler.start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if self.kind == "cprofile":
+                    profiler.disable()
+                    self.active.release()
+                    result = profiler
+                else:
+                    result = profiler.stop()
+                with self.lock:
+                    self.results.append(result)
+        return profiled
+
+    def dump(self):
+        with self.lock:
+            results = list(self.results)
+        if not results:
+            return
+        if self.kind == "cprofile":
+            pstats.Stats(*results).dump_stats(str(self.path))
+        else:
+            from pyinstrument.session import Session
+            from pyinstrument.renderers import HTMLRenderer
+            session = results[0]
+            for other in results[1:]:
+                session = Session.combine(session, other)
+            self.path.write_text(HTMLRenderer().render(session))
+        log.info("Profile saved to %s (%d jobs profiled, %d ran while another was)",
+                 self.path, len(results), self.skipped)
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting + concurrency
+# ---------------------------------------------------------------------------
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def throttle(url: str) -> float:
+    """Wait for the per-host token bucket of `url`. Returns seconds waited."""
+    host = urlsplit(url).netloc.lower()
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            rate, burst = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+            bucket = _buckets[host] = TokenBucket(rate, burst)
+    waited = bucket.acquire()
+    if waited:
+        metrics.inc("rate_limit_wait_seconds_total", waited, host=host)
+    return waited
+
+
+def run_parallel(tasks, workers: int) -> dict:
+    """Run zero-arg callables returning bool on a thread pool; tally ok/fail."""
+    stats = {"ok": 0, "fail": 0}
+    if workers <= 1:
+        for task in tasks:
+            stats["ok" if task() else "fail"] += 1
+        return stats
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(task) for task in tasks]
+        for fut in as_completed(futures):
+            try:
+                ok = fut.result()
+            except Exception as e:
+                log.warning("  Task crashed: %s", e)
+                ok = False
+            stats["ok" if ok else "fail"] += 1
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# HTTP session
+# ---------------------------------------------------------------------------
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def configure_session(pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE):
+    """(Re)build the shared session with the given connection pool sizes."""
+    global _session
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    # Retries are handled in http_get so they go through throttle() as well.
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    with _session_lock:
+        old, _session = _session, session
+    if old is not None:
+        old.close()
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use.
+
+    urllib3's connection pools are thread-safe, so every worker shares one
+    session (and its keep-alive connections) instead of handshaking per request.
+    """
+    with _session_lock:
+        session = _session
+    return session or configure_session()
+
+
+def http_request(method: str, url: str, timeout: int = 60, stream: bool = False,
+                 headers: dict | None = None) -> requests.Response:
+    """Request through the shared session with per-host throttling and retries.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried up to
+    MAX_RETRIES times with exponential backoff and full jitter (or the
+    server's Retry-After, if longer). The final response is returned as-is;
+    the final exception is re-raised.
+    """
+    session = get_session()
+    host = urlsplit(url).netloc.lower()
+    for attempt in range(MAX_RETRIES + 1):
+        throttle(url)
+        retry_after = 0.0
+        try:
+            resp = session.request(method, url, timeout=timeout, stream=stream, headers=headers)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.inc("http_errors_total", host=host, error=type(e).__name__)
+            if attempt == MAX_RETRIES:
+                raise
+            reason = type(e).__name__
+        else:
+            # resp.elapsed is request sent -> headers parsed: server latency + network.
+            metrics.observe("http_response_seconds", resp.elapsed.total_seconds(), host=host, method=method)
+            metrics.inc("http_requests_total", host=host, method=method, status=resp.status_code)
+            if resp.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return resp
+            reason = str(resp.status_code)
+            header = resp.headers.get("Retry-After", "")
+            if header.isdigit():
+                retry_after = float(header)
+            resp.close()
+
+        delay = max(retry_after, random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+        log.info("  RETRY %d/%d in %.1fs (%s): %s", attempt + 1, MAX_RETRIES, delay, reason, url)
+        metrics.inc("http_retries_total", host=host, reason=reason)
+        metrics.inc("retry_backoff_seconds_total", delay, host=host)
+        time.sleep(delay)
+
+
+def record_pool_metrics():
+    """Snapshot how many connections each host pool has opened vs. requests served.
+
+    connections_opened close to requests_served means keep-alive isn't
+    working and each request pays for DNS + TCP + TLS.
+    """
+    with _session_lock:
+        session = _session
+    if session is None:
+        return
+    for adapter in set(session.adapters.values()):
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            metrics.set("http_connections_opened", pool.num_connections, host=host)
+            metrics.set("http_pool_requests_served", pool.num_requests, host=host)
+
+
+def http_get(url: str, timeout: int = 60, stream: bool = False, headers: dict | None = None) -> requests.Response:
+    """GET via http_request()."""
+    return http_request("GET", url, timeout=timeout, stream=stream, headers=headers)
+
+
+def http_head(url: str, timeout: int = 30) -> requests.Response:
+    """HEAD via http_request(); redirects are followed like a GET would."""
+    return http_request("HEAD", url, timeout=timeout, headers=None)
+
+
+# ---------------------------------------------------------------------------
+# HTTP revalidation cache
+# ---------------------------------------------------------------------------
+class HttpCache:
+    """Persistent per-URL validators and a TTL'd negative cache.
+
+    `validators` maps url -> {"etag", "last_modified", "checked_at"} and is
+    turned into If-None-Match / If-Modified-Since headers on the next run.
+    `missing` maps url -> {"status", "checked_at"} for URLs that answered
+    NEGATIVE_STATUSES; they are not requested again until NEGATIVE_CACHE_TTL
+    has passed.
+    """
+
+    def __init__(self, path: Path, negative_ttl: float = NEGATIVE_CACHE_TTL):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.validators: dict[str, dict] = {}
+        self.missing: dict[str, dict] = {}
+        try:
+            data = json.loads(path.read_text())
+            self.validators = data.get("validators", {})
+            self.missing = data.get("missing", {})
+        except (OSError, ValueError):
+            pass
+
+    def conditional_headers(self, url: str) -> dict | None:
+        """Headers for a conditional GET, or None if we never saw `url` succeed."""
+        with self.lock:
+            entry = self.validators.get(url)
+        if entry is None:
+            return None
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def has_validators(self, url: str) -> bool:
+        """True if `url` has been downloaded successfully before."""
+        with self.lock:
+            return url in self.validators
+
+    def is_missing(self, url: str, since: float | None = None) -> bool:
+        """True if `url` is in the negative cache and still fresh (or, with `since`, answered 404/410 since then)."""
+        with self.lock:
+            entry = self.missing.get(url)
+        if entry is None:
+            return False
+        return (since is not None and entry["checked_at"] >= since
+                or time.time() - entry["checked_at"] < self.negative_ttl)
+
+    def record(self, url: str, resp: requests.Response):
+        """Update the cache from a final response to `url`."""
+        now = time.time()
+        with self.lock:
+            if resp.status_code in NEGATIVE_STATUSES:
+                self.missing[url] = {"status": resp.status_code, "checked_at": now}
+                return
+            if resp.status_code not in (200, 206, 304):
+                return
+            self.missing.pop(url, None)
+            entry = self.validators.setdefault(url, {})
+            entry["checked_at"] = now
+            if resp.status_code != 304:
+                entry["etag"] = resp.headers.get("ETag")
+                entry["last_modified"] = resp.headers.get("Last-Modified")
+
+    def save(self):
+        with self.lock:
+            data = {"validators": self.validators, "missing": self.missing}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, indent=1, sort_keys=True))
+            os.replace(tmp, self.path)
+
+
+http_cache = HttpCache(HTTP_CACHE_FILE)
+
+
+# ---------------------------------------------------------------------------
+# URL pattern resolver
+# ---------------------------------------------------------------------------
+class PatternResolver:
+    """Learns which ACADEMIC_URL_PATTERNS entry a cbseacademic folder uses.
+
+    CBSE names files consistently within one academic-year folder, so once a
+    pattern has produced a download for one subject, the other subjects in
+    that folder try it first with a plain GET. For a folder with no learned
+    pattern, all candidates are probed concurrently with HEAD requests and
+    only the ones that exist are fetched.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            self.learned: dict[str, dict[str, str]] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.learned = {}
+
+    def order(self, folder: str, kind: str, candidates: dict[str, str]) -> list[tuple[str, str]]:
+        """Order `{pattern: url}` candidates for downloading, dropping known misses."""
+        items = list(candidates.items())
+        # A URL we've already downloaded from: revalidate that one first.
+        known = [(p, u) for p, u in items if http_cache.has_validators(u)]
+        if known:
+            return known + [(p, u) for p, u in items if (p, u) not in known]
+
+        with self.lock:
+            learned = self.learned.get(folder, {}).get(kind)
+        if learned in candidates:
+            return [(learned, candidates[learned])] + [(p, u) for p, u in items if p != learned]
+
+        live = [(p, u) for p, u in items if not http_cache.is_missing(u)]
+        if len(live) <= 1:
+            return live
+        with ThreadPoolExecutor(max_workers=len(live)) as pool:
+            found = list(pool.map(lambda item: self._probe(item[1]), live))
+        # Confirmed hits first, then candidates HEAD couldn't tell us about.
+        return ([item for item, ok in zip(live, found) if ok is True]
+                + [item for item, ok in zip(live, found) if ok is None])
+
+    @staticmethod
+    def _probe(url: str) -> bool | None:
+        """HEAD `url`: True if it exists, False if it is missing, None if unsure."""
+        try:
+            resp = http_head(url)
+        except requests.RequestException:
+            return None
+        with resp:
+            if resp.ok:
+                return True
+            if resp.status_code in NEGATIVE_STATUSES:
+                http_cache.record(url, resp)
+                return False
+            return None  # e.g. 403/405 for HEAD on some servers; let GET decide
+
+    def learn(self, folder: str, kind: str, pattern: str):
+        with self.lock:
+            self.learned.setdefault(folder, {})[kind] = pattern
+
+    def save(self):
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(self.learned, indent=2, sort_keys=True))
+            os.replace(tmp, self.path)
+
+
+url_resolver = PatternResolver(URL_PATTERNS_FILE)
+
+
+# ---------------------------------------------------------------------------
+# Download manifest
+# ---------------------------------------------------------------------------
+PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def count_pdf_pages(path: Path) -> int | None:
+    """Best-effort page count from `/Type /Page` objects, via mmap.
+
+    Returns None when no page objects are visible (e.g. they sit inside
+    compressed object streams).
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pages = sum(1 for _ in PAGE_RE.finditer(mm))
+    except (OSError, ValueError):
+        return None
+    return pages or None
+
+
+def describe_path(rel: str) -> tuple[str, int | None, str]:
+    """(subject, year, kind) from a `<Subject>/<year>_<Kind>/<file>.pdf` path."""
+    parts = Path(rel).parts
+    subject = parts[0] if len(parts) > 1 else ""
+    folder = parts[1] if len(parts) > 2 else ""
+    match = re.match(r"(\d{4})_?(.*)", folder)
+    year = int(match.group(1)) if match else None
+    kind = match.group(2) if match else folder
+    if "MarkingScheme" in parts[-1]:
+        kind = "MarkingScheme"
+    return subject, year, kind
+
+
+# Name of the source (a JOB_HANDLERS key) whose job is running in this context; set by run_jobs().
+current_source: ContextVar[str | None] = ContextVar("current_source", default=None)
+
+
+def source_name(url: str) -> str:
+    """The source a download belongs to: the running job's, else the one whose host serves `url`."""
+    if source := current_source.get():
+        return source
+    host = urlsplit(url).netloc.lower()
+    for source, base in (("cbseacademic", ACADEMIC_BASE), ("cbse_gov", GOV_BASE),
+                         ("selfstudys", SELFSTUDYS_BASE), ("direct", VEDANTU_BASE)):
+        if urlsplit(base).netloc.lower() == host:
+            return source
+    return host
+
+
+class Manifest:
+    """SQLite index of everything the downloaders have produced.
+
+    `files` has one row per download path (relative to DOWNLOAD_DIR), `blobs`
+    one row per unique SHA-256 in the store, and `sources` every URL that
+    produced a blob, with the source (cbseacademic, cbse_gov, ...) it came
+    from. Connections are opened lazily and shared across threads behind a
+    lock.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256      TEXT PRIMARY KEY,
+            size        INTEGER NOT NULL,
+            pages       INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            path        TEXT PRIMARY KEY,
+            sha256      TEXT NOT NULL REFERENCES blobs(sha256),
+            url         TEXT,
+            source      TEXT,
+            subject     TEXT,
+            year        INTEGER,
+            kind        TEXT,
+            size        INTEGER,
+            fetched_at  TEXT
+        );
+        CREATE INDEX IF NOT EXISTS files_subject_year ON files(subject, year, kind);
+        CREATE INDEX IF NOT EXISTS files_sha256 ON files(sha256);
+        CREATE TABLE IF NOT EXISTS sources (
+            sha256      TEXT NOT NULL,
+            url         TEXT NOT NULL,
+            source      TEXT NOT NULL,
+            first_seen  TEXT NOT NULL,
+            PRIMARY KEY (sha256, url)
+        );
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def query(self, sql: str, params=()) -> list[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def record(self, rel: str, digest: str, size: int, url: str, blob: Path):
+        """Upsert the file at `rel` (and its blob/source rows)."""
+        subject, year, kind = describe_path(rel)
+        source = source_name(url)
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self.lock:
+            conn = self.conn
+            known = conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (digest,)).fetchone()
+            conn.execute("BEGIN")
+            try:
+                if not known:
+                    conn.execute("INSERT INTO blobs VALUES (?, ?, ?)", (digest, size, count_pdf_pages(blob)))
+                conn.execute(
+                    "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET sha256 = excluded.sha256, url = excluded.url, "
+                    "source = excluded.source, size = excluded.size, fetched_at = excluded.fetched_at",
+                    (rel, digest, url, source, subject, year, kind, size, now),
+                )
+                if url:
+                    conn.execute("INSERT OR IGNORE INTO sources VALUES (?, ?, ?, ?)", (digest, url, source, now))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def digest_for(self, rel: str) -> str | None:
+        rows = self.query("SELECT sha256 FROM files WHERE path = ?", (rel,))
+        return rows[0][0] if rows else None
+
+    def duplicates(self) -> list[tuple[str, str, str]]:
+        """(sha256, paths, sources) for blobs shared by several paths or sources."""
+        return self.query("""
+            SELECT b.sha256,
+                   (SELECT GROUP_CONCAT(path, ', ') FROM files f WHERE f.sha256 = b.sha256),
+                   (SELECT GROUP_CONCAT(DISTINCT source) FROM sources s WHERE s.sha256 = b.sha256)
+            FROM blobs b
+            WHERE (SELECT COUNT(*) FROM files f WHERE f.sha256 = b.sha256) > 1
+               OR (SELECT COUNT(DISTINCT source) FROM sources s WHERE s.sha256 = b.sha256) > 1
+            ORDER BY 2
+        """)
+
+    def unreferenced_blobs(self) -> list[str]:
+        return [r[0] for r in self.query(
+            "SELECT sha256 FROM blobs WHERE sha256 NOT IN (SELECT sha256 FROM files)")]
+
+    def forget_blobs(self, digests: list[str]):
+        with self.lock:
+            self.conn.executemany("DELETE FROM blobs WHERE sha256 = ?", [(d,) for d in digests])
+            self.conn.executemany("DELETE FROM sources WHERE sha256 = ?", [(d,) for d in digests])
+
+    def missing(self, kind: str, given: str | None = None) -> list[tuple[str, int]]:
+        """(subject, year) pairs that have a `given` document (any, if None) but no `kind`."""
+        return self.query("""
+            SELECT DISTINCT subject, year FROM files
+            WHERE year IS NOT NULL AND (? IS NULL OR kind = ?) AND (subject, year) NOT IN
+                  (SELECT subject, year FROM files WHERE kind = ?)
+            ORDER BY subject, year
+        """, (given, given, kind))
+
+
+manifest = Manifest(MANIFEST_FILE)
+
+
+# ---------------------------------------------------------------------------
+# Content-addressed PDF store
+# ---------------------------------------------------------------------------
+class BlobStore:
+    """SHA-256 keyed PDF store.
+
+    Blobs live at `<root>/sha256/<ab>/<digest>.pdf`. The familiar
+    `downloads/<Subject>/<year>_*/*.pdf` files are hardlinks to them (or
+    copies where hardlinks aren't possible), so a paper fetched from
+    several sources is stored once. Which paths and source URLs map to
+    which blob is kept in the `manifest`. Every callable in `listeners` is
+    called with `(dest, digest)` whenever new bytes land at a download path.
+    Files saved outside DOWNLOAD_DIR are just moved into place, not stored.
+    """
+
+    def __init__(self, root: Path, manifest: Manifest):
+        self.root = root
+        self.manifest = manifest
+        self.listeners: list = []
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / "sha256" / digest[:2] / f"{digest}.pdf"
+
+    def ingest(self, src: Path, dest: Path, url: str, digest: str | None = None):
+        """Move the finished file `src` into the store and link it to `dest`."""
+        if not self._inside(dest):
+            os.replace(src, dest)
+            return
+        digest = digest or file_sha256(src)
+        blob = self.blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if blob.exists():
+            src.unlink()
+        else:
+            os.replace(src, blob)
+        self._link(blob, dest)
+        self.manifest.record(self._rel(dest), digest, blob.stat().st_size, url, blob)
+        for listener in self.listeners:
+            listener(dest, digest)
+
+    def note(self, dest: Path, url: str):
+        """Record that `url` produced the existing file `dest`, adopting it if new."""
+        if not self._inside(dest):
+            return
+        digest = self.manifest.digest_for(self._rel(dest))
+        blob = self.blob_path(digest) if digest else None
+        if blob and blob.exists() and (os.path.samefile(dest, blob) or file_sha256(dest) == digest):
+            self.manifest.record(self._rel(dest), digest, dest.stat().st_size, url, blob)
+            return
+        # Downloaded before the store existed, or replaced behind our back.
+        part = dest.with_name(dest.name + ".adopt")
+        shutil.copyfile(dest, part)
+        self.ingest(part, dest, url)
+
+    def _link(self, blob: Path, dest: Path):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + ".link")
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            shutil.copyfile(blob, tmp)
+        os.replace(tmp, dest)
+
+    @staticmethod
+    def _inside(path: Path) -> bool:
+        return path.resolve().is_relative_to(DOWNLOAD_DIR.resolve())
+
+    @staticmethod
+    def _rel(path: Path) -> str:
+        return path.resolve().relative_to(DOWNLOAD_DIR.resolve()).as_posix()
+
+    def prune(self) -> int:
+        """Delete blobs no download path points at any more. Returns the count."""
+        dead = self.manifest.unreferenced_blobs()
+        for digest in dead:
+            self.blob_path(digest).unlink(missing_ok=True)
+        self.manifest.forget_blobs(dead)
+        return len(dead)
+
+
+store = BlobStore(STORE_DIR, manifest)
+
+
+def use_download_dir(path: Path):
+    """Point DOWNLOAD_DIR, every file derived from it and the persisted caches at `path`."""
+    global DOWNLOAD_DIR, HTTP_CACHE_FILE, URL_PATTERNS_FILE, STORE_DIR, MANIFEST_FILE
+    global JOBS_FILE, METRICS_JSON, METRICS_PROM, http_cache, url_resolver, manifest, store
+    DOWNLOAD_DIR = path
+    HTTP_CACHE_FILE = path / ".http_cache.json"
+    URL_PATTERNS_FILE = path / ".url_patterns.json"
+    STORE_DIR = path / ".store"
+    MANIFEST_FILE = path / "manifest.sqlite"
+    JOBS_FILE = path / "jobs.sqlite"
+    METRICS_JSON = path / "metrics.json"
+    METRICS_PROM = path / "metrics.prom"
+    http_cache = HttpCache(HTTP_CACHE_FILE)
+    url_resolver = PatternResolver(URL_PATTERNS_FILE)
+    manifest = Manifest(MANIFEST_FILE)
+    store = BlobStore(STORE_DIR, manifest)
+
+
+def save_state():
+    """Persist the HTTP cache and learned URL patterns (the manifest commits as it goes)."""
+    http_cache.save()
+    url_resolver.save()
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
+def is_complete_pdf(path: Path) -> bool:
+    """Cheap integrity check: a `%PDF-` header up front and a `%%EOF` trailer at the end."""
+    try:
+        size = path.stat().st_size
+        with open(path, "rb") as f:
+            head = f.read(1024)
+            f.seek(max(0, size - 1024))
+            tail = f.read()
+    except OSError:
+        return False
+    return b"%PDF-" in head and b"%%EOF" in tail
+
+
 def safe_download(url: str, dest: Path, timeout: int = 60) -> bool:
-    """Download a file. Returns True on success."""
-    if dest.exists() and dest.stat().st_size > 0:
-        log.info("  SKIP (exists): %s", dest.name)
-        return True
+    """Download a PDF. Returns True on success.
+
+    The body is streamed in CHUNK_SIZE pieces to `<dest>.part` and renamed
+    into place only once it passes is_complete_pdf(), so `dest` is never
+    truncated. A `.part` left behind by an interrupted run is resumed with
+    an HTTP Range request, guarded by If-Range with the validator of the
+    response it came from (kept in `<dest>.part.validator`); a partial
+    without one is downloaded again from the start.
+
+    If `dest` already exists it is revalidated with a conditional GET using
+    the validators in http_cache (a 304 costs no body). URLs in the negative
+    cache are not requested at all.
+
+    The SHA-256 is computed while streaming and the finished file goes into
+    the content-addressed `store`; `dest` becomes a link to the blob.
+
+    The whole call (throttle wait, request, retries and body) is recorded
+    in the `fetch_seconds` histogram.
+    """
+    with metrics.timer("fetch_seconds", host=urlsplit(url).netloc.lower()):
+        return _fetch(url, dest, timeout)
+
+
+def _fetch(url: str, dest: Path, timeout: int) -> bool:
+    if http_cache.is_missing(url):
+        log.info("  SKIP (known missing): %s", url)
+        return False
+    headers = {}
+    if is_complete_pdf(dest):
+        conditional = http_cache.conditional_headers(url)
+        if not conditional:
+            # Never fetched from this URL, or the server gives no validators.
+            store.note(dest, url)
+            log.info("  SKIP (exists): %s", dest.name)
+            return True
+        headers.update(conditional)
     dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + ".part")
+    validator_file = part.with_name(part.name + ".validator")
+    offset = part.stat().st_size if part.exists() else 0
+    validator = validator_file.read_text().strip() if offset and validator_file.exists() else ""
+    if offset and not validator:
+        # Nothing ties the partial to a version of the file, so it can't be resumed safely.
+        part.unlink()
+        offset = 0
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout, stream=True)
-        if resp.status_code == 200 and len(resp.content) > 500:
-            dest.write_bytes(resp.content)
-            log.info("  OK: %s  (%d KB)", dest.name, len(resp.content) // 1024)
-            return True
-        else:
-            log.warning("  FAIL (%s): %s", resp.status_code, url)
-            return False
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        with http_get(url, timeout=timeout, stream=True, headers=headers or None) as resp:
+            if resp.status_code == 304:
+                http_cache.record(url, resp)
+                store.note(dest, url)
+                log.info("  SKIP (not modified): %s", dest.name)
+                return True
+            digest = None
+            if resp.status_code == 416 and offset:
+                # Range no longer satisfiable — the partial is stale or already whole.
+                if not is_complete_pdf(part):
+                    part.unlink()
+                    validator_file.unlink(missing_ok=True)
+                    return _fetch(url, dest, timeout)
+            elif resp.status_code == 206 and offset and resp.headers.get("Content-Range", "").startswith(
+                    f"bytes {offset}-"):
+                log.info("  RESUME: %s  (from %d KB)", dest.name, offset // 1024)
+                digest = _stream_to(resp, part, "ab")
+            elif resp.status_code == 206:
+                # A range we didn't ask for; appending it (or taking it as the whole file) would corrupt the PDF.
+                part.unlink(missing_ok=True)
+                validator_file.unlink(missing_ok=True)
+                if offset:
+                    return _fetch(url, dest, timeout)
+                log.warning("  FAIL (unexpected partial content): %s", url)
+                return False
+            elif resp.status_code == 200:
+                if validator := _range_validator(resp):
+                    validator_file.write_text(validator)
+                else:
+                    validator_file.unlink(missing_ok=True)
+                digest = _stream_to(resp, part, "wb")
+            else:
+                http_cache.record(url, resp)
+                log.warning("  FAIL (%s): %s", resp.status_code, url)
+                return False
+
+            if not is_complete_pdf(part):
+                metrics.inc("downloads_total", host=urlsplit(url).netloc.lower(), result="invalid")
+                log.warning("  FAIL (not a complete PDF): %s", url)
+                part.unlink(missing_ok=True)
+                validator_file.unlink(missing_ok=True)
+                return False
+            http_cache.record(url, resp)
+        store.ingest(part, dest, url, digest)
+        validator_file.unlink(missing_ok=True)
+        metrics.inc("downloads_total", host=urlsplit(url).netloc.lower(), result="ok")
+        log.info("  OK: %s  (%d KB)", dest.name, dest.stat().st_size // 1024)
+        return True
     except Exception as e:
+        # Keep any .part on disk so the next run can resume it.
         log.warning("  ERROR: %s — %s", url, e)
         return False
 
 
-def extract_zip(zip_bytes: bytes, dest_dir: Path):
-    """Extract a ZIP archive into dest_dir."""
+def _range_validator(resp: requests.Response) -> str | None:
+    """What If-Range can use to resume `resp`'s body: a strong ETag, else Last-Modified."""
+    etag = resp.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return resp.headers.get("Last-Modified")
+
+
+def _stream_to(resp: requests.Response, path: Path, mode: str) -> str:
+    """Write a streamed response body to `path` chunk by chunk, then fsync.
+
+    Returns the SHA-256 hex digest of the whole file (when appending, the
+    bytes already on disk are hashed first). Body transfer time/bytes and
+    time spent in disk writes are recorded in `metrics`.
+    """
+    host = urlsplit(resp.request.url).netloc.lower()
+    digest = hashlib.sha256()
+    if mode == "ab":
+        _hash_file(path, digest)
+    received = 0
+    disk = 0.0
+    t0 = time.perf_counter()
+    with open(path, mode) as f:
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            t_write = time.perf_counter()
+            f.write(chunk)
+            disk += time.perf_counter() - t_write
+            digest.update(chunk)
+            received += len(chunk)
+        t_write = time.perf_counter()
+        f.flush()
+        os.fsync(f.fileno())
+        disk += time.perf_counter() - t_write
+    metrics.observe("download_seconds", time.perf_counter() - t0, host=host)
+    metrics.inc("download_bytes_total", received, host=host)
+    metrics.inc("disk_write_seconds_total", disk)
+    return digest.hexdigest()
+
+
+def _hash_file(path: Path, digest):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 hex digest of a file, read in CHUNK_SIZE pieces."""
+    return _hash_file(path, hashlib.sha256()).hexdigest()
+
+
+def file_crc32(path: Path) -> int:
+    """CRC-32 of a file, read in CHUNK_SIZE pieces."""
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def extract_zip(archive, dest_dir: Path, source_url: str = "") -> list[Path]:
+    """Extract the PDFs of a ZIP archive into dest_dir.
+
+    `archive` may be raw bytes, a path, or a seekable binary file (e.g. the
+    spool from spool_download). Members are streamed out through a bounded
+    buffer into the blob `store` and linked into dest_dir; members whose
+    size and CRC already match the file on disk are left alone. Returns the
+    PDF paths in dest_dir.
+
+    Members are flattened to their file name. The first member with a given
+    name keeps it; later ones in other folders get their folder path as a
+    prefix (`Set 2/Physics.pdf` -> `Set 2_Physics.pdf`), so none overwrite
+    each other. Anchors and `.`/`..` are left out of the prefix, and a
+    member that would still land outside dest_dir is skipped.
+    """
+    if isinstance(archive, (bytes, bytearray)):
+        archive = BytesIO(archive)
     dest_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    used: set[str] = set()
+    t0 = time.perf_counter()
     try:
-        with zipfile.ZipFile(BytesIO(zip_bytes)) as zf:
+        with zipfile.ZipFile(archive) as zf:
             for info in zf.infolist():
                 if info.is_dir():
                     continue
-                fname = Path(info.filename).name
-                if fname.lower().endswith(".pdf"):
-                    target = dest_dir / fname
-                    if not target.exists():
-                        target.write_bytes(zf.read(info))
-                        log.info("    Extracted: %s", fname)
+                member = Path(info.filename)
+                fname = member.name
+                if not fname.lower().endswith(".pdf"):
+                    continue
+                if fname.lower() in used:
+                    folders = [p for p in member.parent.parts
+                               if p not in (member.anchor, ".", "..") and not p.endswith(":\\")]
+                    fname = "_".join(folders + [fname])
+                    n = 2
+                    while fname.lower() in used:
+                        fname = f"{member.stem}-{n}{member.suffix}"
+                        n += 1
+                used.add(fname.lower())
+                target = dest_dir / fname
+                if not target.resolve().is_relative_to(dest_dir.resolve()):
+                    log.warning("  Skipping ZIP member outside %s: %s", dest_dir, info.filename)
+                    continue
+                paths.append(target)
+                if (target.exists() and target.stat().st_size == info.file_size
+                        and file_crc32(target) == info.CRC):
+                    store.note(target, source_url)
+                    metrics.inc("zip_members_total", result="unchanged")
+                    continue
+                part = target.with_name(target.name + ".part")
+                digest = hashlib.sha256()
+                # ZipExtFile verifies the CRC as it reaches the end of the member.
+                with zf.open(info) as src, open(part, "wb") as dst:
+                    while chunk := src.read(CHUNK_SIZE):
+                        dst.write(chunk)
+                        digest.update(chunk)
+                store.ingest(part, target, source_url, digest.hexdigest())
+                metrics.inc("zip_members_total", result="extracted")
+                metrics.inc("zip_extracted_bytes_total", info.file_size)
+                log.info("    Extracted: %s", fname)
     except zipfile.BadZipFile:
+        metrics.inc("zip_members_total", result="bad_archive")
         log.warning("  Bad ZIP file for %s", dest_dir)
+    metrics.observe("zip_extract_seconds", time.perf_counter() - t0)
+    return paths
+
+
+def spool_download(url: str, timeout: int = 60, revalidate: bool = False):
+    """Stream `url` into an anonymous temp file on disk.
+
+    Returns `(status, spool, resp)`: the rewound file (caller closes it) and
+    the response on a 200, otherwise None for both. With `revalidate`, the
+    request is made conditional on http_cache's validators, so an unchanged
+    archive comes back as a 304. The validators of a 200 are not recorded
+    here: the caller passes `resp` to http_cache.record() once it has
+    used the body, so an archive lost before extraction is not answered
+    with a 304 on the next run. The whole call is recorded in
+    `fetch_seconds`, like safe_download().
+    """
+    with metrics.timer("fetch_seconds", host=urlsplit(url).netloc.lower()):
+        return _spool(url, timeout, revalidate)
+
+
+def _spool(url: str, timeout: int, revalidate: bool):
+    if http_cache.is_missing(url):
+        return 404, None, None
+    headers = http_cache.conditional_headers(url) if revalidate else None
+    with http_get(url, timeout=timeout, stream=True, headers=headers or None) as resp:
+        if resp.status_code != 200:
+            http_cache.record(url, resp)
+            return resp.status_code, None, None
+        spool = tempfile.TemporaryFile()
+        host = urlsplit(url).netloc.lower()
+        t0 = time.perf_counter()
+        try:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+        metrics.observe("download_seconds", time.perf_counter() - t0, host=host)
+        metrics.inc("download_bytes_total", spool.tell(), host=host)
+    spool.seek(0)
+    return 200, spool, resp
 
 
 # ---------------------------------------------------------------------------
 # Source 1: cbseacademic.nic.in — Sample Papers + Marking Schemes
 # ---------------------------------------------------------------------------
-def scrape_cbse_academic():
-    """Download sample question papers and marking schemes from cbseacademic.nic.in"""
-    log.info("=" * 60)
-    log.info("SOURCE 1: cbseacademic.nic.in (Sample Papers + Marking Schemes)")
-    log.info("=" * 60)
+def fetch_academic_doc(folder: str, kind: str, candidates: dict[str, str], dest: Path) -> bool:
+    """Download one SQP/MS, trying candidates in url_resolver order."""
+    for pattern, url in url_resolver.order(folder, kind, candidates):
+        if safe_download(url, dest):
+            url_resolver.learn(folder, kind, pattern)
+            return True
+    return False
 
-    base = "https://cbseacademic.nic.in/web_material/SQP"
-    stats = {"ok": 0, "fail": 0}
 
-    for exam_year, folder in ACADEMIC_YEARS.items():
-        if exam_year < 2016 or exam_year > 2026:
-            continue
-        for subject, names in SUBJECTS.items():
+def plan_cbse_academic() -> list[dict]:
+    """One job per (subject, exam year, SQP/MS) on cbseacademic.nic.in."""
+    host = urlsplit(ACADEMIC_BASE).netloc
+    jobs = []
+
+    # Subjects outermost, so the first wave of workers spreads over different
+    # folders and later subjects find each folder's pattern already learned.
+    for subject, names in SUBJECTS.items():
+        for exam_year, folder in ACADEMIC_YEARS.items():
+            if exam_year < 2016 or exam_year > 2026:
+                continue
             acad_name = names["academic"]
-            dest_dir = DOWNLOAD_DIR / subject / f"{exam_year}_SamplePaper"
-            dest_dir.mkdir(parents=True, exist_ok=True)
 
             # Try multiple URL patterns — CBSE has changed naming over the years
-            sqp_candidates = [
-                f"{base}/{folder}/{acad_name}-SQP.pdf",
-                f"{base}/{folder}/{acad_name}_SQP.pdf",
-                f"{base}/{folder}/{acad_name} SQP.pdf",
-            ]
-            ms_candidates = [
-                f"{base}/{folder}/{acad_name}-MS.pdf",
-                f"{base}/{folder}/{acad_name}_MS.pdf",
-                f"{base}/{folder}/{acad_name} MS.pdf",
-            ]
+            for kind, label in (("SQP", "SamplePaper"), ("MS", "MarkingScheme")):
+                candidates = {
+                    pattern: f"{ACADEMIC_BASE}/{folder}/" + pattern.format(name=acad_name, kind=kind).replace(" ", "%20")
+                    for pattern in ACADEMIC_URL_PATTERNS
+                }
+                dest = f"{subject}/{exam_year}_SamplePaper/{subject}_{label}_{exam_year}.pdf"
+                jobs.append(make_job(
+                    "cbseacademic", host, subject, exam_year, kind,
+                    folder=folder, candidates=candidates, dest=dest,
+                ))
+    return jobs
+
+
+def run_academic_job(job: dict) -> bool:
+    payload = job["payload"]
+    started = time.time()
+    if fetch_academic_doc(payload["folder"], job["doc"], payload["candidates"], DOWNLOAD_DIR / payload["dest"]):
+        return True
+    raise_if_missing(payload["candidates"].values(), started)
+    return False
 
-            sqp_ok = False
-            for url in sqp_candidates:
-                encoded = url.replace(" ", "%20")
-                if safe_download(encoded, dest_dir / f"{subject}_SamplePaper_{exam_year}.pdf"):
-                    sqp_ok = True
-                    stats["ok"] += 1
-                    break
-            if not sqp_ok:
-                stats["fail"] += 1
 
-            ms_ok = False
-            for url in ms_candidates:
-                encoded = url.replace(" ", "%20")
-                if safe_download(encoded, dest_dir / f"{subject}_MarkingScheme_{exam_year}.pdf"):
-                    ms_ok = True
-                    stats["ok"] += 1
-                    break
-            if not ms_ok:
-                stats["fail"] += 1
-
-            time.sleep(0.3)  # be polite
+def scrape_cbse_academic(workers: int = MAX_WORKERS):
+    """Download sample question papers and marking schemes from cbseacademic.nic.in"""
+    log.info("=" * 60)
+    log.info("SOURCE 1: cbseacademic.nic.in (Sample Papers + Marking Schemes)")
+    log.info("=" * 60)
 
+    tasks = [lambda j=job: run_academic_job(j) for job in plan_cbse_academic()]
+    stats = run_parallel(tasks, workers)
+    url_resolver.save()
     log.info("cbseacademic.nic.in — Downloaded: %d, Failed: %d", stats["ok"], stats["fail"])
     return stats
 
@@ -169,45 +1322,89 @@ def scrape_cbse_academic():
 # ---------------------------------------------------------------------------
 # Source 2: cbse.gov.in — Actual Board Papers (ZIP archives, 2022-2025)
 # ---------------------------------------------------------------------------
-def scrape_cbse_gov():
-    """Download actual board exam papers from cbse.gov.in (2022-2025)."""
-    log.info("=" * 60)
-    log.info("SOURCE 2: cbse.gov.in (Actual Board Papers 2022-2025)")
-    log.info("=" * 60)
+def fetch_gov_paper(year: int, subject: str, gov_name: str) -> bool:
+    """Fetch one subject/year from cbse.gov.in: the ZIP archive, else a bare PDF."""
+    try:
+        status, spool, resp = spool_gov_paper(year, subject, gov_name)
+        return status == 304 or unpack_gov_paper(year, subject, gov_name, spool, resp)
+    except Exception as e:
+        log.warning("  ERROR: %s %d — %s", subject, year, e)
+        return False
 
-    base = "https://www.cbse.gov.in/cbsenew/question-paper"
-    stats = {"ok": 0, "fail": 0}
 
-    for year in range(2022, 2026):
-        for subject, names in SUBJECTS.items():
-            gov_name = names["gov"]
-            dest_dir = DOWNLOAD_DIR / subject / f"{year}_BoardPaper"
+def spool_gov_paper(year: int, subject: str, gov_name: str):
+    """Spool the ZIP of one subject/year: `(status, spool, resp)` as from spool_download().
+
+    The request is conditional once PDFs of the subject/year are on disk,
+    so an unchanged archive comes back as a 304 and needs nothing more.
+    """
+    dest_dir = DOWNLOAD_DIR / subject / f"{year}_BoardPaper"
+    encoded, _ = gov_paper_urls(year, gov_name)
+    existing = dest_dir.is_dir() and any(dest_dir.glob("*.pdf"))
+    status, spool, resp = spool_download(encoded, revalidate=existing)
+    if status == 304:
+        log.info("  ZIP not modified: %s %d", subject, year)
+    return status, spool, resp
+
+
+def unpack_gov_paper(year: int, subject: str, gov_name: str, spool, resp: requests.Response | None = None) -> bool:
+    """Extract a spooled ZIP (closing it) of one subject/year; with no ZIP or an empty one, fetch the bare PDF.
+
+    The ZIP's validators (from `resp`) are recorded only once its PDFs are extracted.
+    """
+    dest_dir = DOWNLOAD_DIR / subject / f"{year}_BoardPaper"
+    encoded, encoded_pdf = gov_paper_urls(year, gov_name)
+    if spool is not None:
+        with spool:
+            extracted = extract_zip(spool, dest_dir, encoded)
+        if extracted:
+            if resp is not None:
+                http_cache.record(encoded, resp)
+            log.info("  ZIP OK: %s %d  (%d PDFs)", subject, year, len(extracted))
+            return True
 
-            # Try ZIP download
-            url = f"{base}/{year}/XII/{gov_name}.zip"
-            encoded = url.replace(" ", "%20")
+    # Try direct PDF pattern
+    if safe_download(encoded_pdf, dest_dir / f"{subject}_BoardPaper_{year}.pdf"):
+        return True
+    log.warning("  No papers found: %s %d", subject, year)
+    return False
 
-            try:
-                resp = requests.get(encoded, headers=HEADERS, timeout=60)
-                if resp.status_code == 200 and len(resp.content) > 1000:
-                    extract_zip(resp.content, dest_dir)
-                    stats["ok"] += 1
-                    log.info("  ZIP OK: %s %d", subject, year)
-                else:
-                    # Try direct PDF pattern
-                    pdf_url = f"{base}/{year}/XII/{gov_name}.pdf"
-                    encoded_pdf = pdf_url.replace(" ", "%20")
-                    if safe_download(encoded_pdf, dest_dir / f"{subject}_BoardPaper_{year}.pdf"):
-                        stats["ok"] += 1
-                    else:
-                        stats["fail"] += 1
-                        log.warning("  No papers found: %s %d", subject, year)
-            except Exception as e:
-                stats["fail"] += 1
-                log.warning("  ERROR: %s %d — %s", subject, year, e)
 
-            time.sleep(0.5)
+def gov_paper_urls(year: int, gov_name: str) -> tuple[str, str]:
+    """(ZIP URL, bare PDF URL) of one subject/year on cbse.gov.in."""
+    base = f"{GOV_BASE}/{year}/XII/{gov_name}".replace(" ", "%20")
+    return f"{base}.zip", f"{base}.pdf"
+
+
+def plan_cbse_gov() -> list[dict]:
+    """One job per (subject, year) board paper on cbse.gov.in."""
+    return [
+        make_job("cbse_gov", urlsplit(GOV_BASE).netloc, subject, year, "BoardPaper", gov_name=names["gov"])
+        for year in range(2022, 2026)
+        for subject, names in SUBJECTS.items()
+    ]
+
 
+def run_gov_job(job: dict) -> bool:
+    started = time.time()
+    return gov_job_result(job, fetch_gov_paper(job["year"], job["subject"], job["payload"]["gov_name"]), started)
+
+
+def gov_job_result(job: dict, ok: bool, started: float) -> bool:
+    """`ok`, unless neither the ZIP nor the bare PDF of `job` is published (raises DocumentMissing)."""
+    if not ok:
+        raise_if_missing(gov_paper_urls(job["year"], job["payload"]["gov_name"]), started)
+    return ok
+
+
+def scrape_cbse_gov(workers: int = MAX_WORKERS):
+    """Download actual board exam papers from cbse.gov.in (2022-2025)."""
+    log.info("=" * 60)
+    log.info("SOURCE 2: cbse.gov.in (Actual Board Papers 2022-2025)")
+    log.info("=" * 60)
+
+    tasks = [lambda j=job: run_gov_job(j) for job in plan_cbse_gov()]
+    stats = run_parallel(tasks, workers)
     log.info("cbse.gov.in — Downloaded: %d, Failed: %d", stats["ok"], stats["fail"])
     return stats
 
@@ -215,163 +1412,230 @@ def scrape_cbse_gov():
 # ---------------------------------------------------------------------------
 # Source 3: selfstudys.com — Board Papers with Solutions (Playwright)
 # ---------------------------------------------------------------------------
-def scrape_selfstudys():
+def scrape_selfstudys(pages: int = BROWSER_PAGES):
     """Use Playwright to scrape selfstudys.com for board papers + solutions."""
     log.info("=" * 60)
     log.info("SOURCE 3: selfstudys.com (Board Papers + Solutions via Playwright)")
     log.info("=" * 60)
 
     try:
-        from playwright.sync_api import sync_playwright
+        from playwright.async_api import async_playwright  # noqa: F401
     except ImportError:
         log.error("Playwright not installed. Skipping selfstudys.com")
         return {"ok": 0, "fail": 0}
 
-    subject_slugs = {
-        "Physics":          ("physics-pyp", "physics"),
-        "Chemistry":        ("chemistry-pyp", "chemistry"),
-        "Mathematics":      ("mathematics-pyp", "mathematics"),
-        "Biology":          ("biology-pyp", "biology"),
-        "English":          ("english-pyp", "english"),
-        "Computer Science": ("computer-science-pyp", "computer-science"),
-    }
+    stats = asyncio.run(crawl_selfstudys(max(pages, 1)))
+    log.info("selfstudys.com — Downloaded: %d, Failed: %d", stats["ok"], stats["fail"])
+    return stats
+
+
+async def _block_non_documents(route):
+    """Playwright route handler: abort images, fonts, CSS, media and ad/tracker calls."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(p in request.url for p in BLOCKED_URL_PARTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _absolute(href: str) -> str:
+    return href if href.startswith("http") else f"{SELFSTUDYS_BASE}{href}"
+
+
+def plan_selfstudys(pages: int = BROWSER_PAGES) -> list[dict]:
+    """One crawl job for every subject on selfstudys.com; it queues a download job per PDF it finds."""
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        log.error("Playwright not installed. Skipping selfstudys.com")
+        return []
+    return [make_job("selfstudys", urlsplit(SELFSTUDYS_BASE).netloc, "all", None, "crawl", pages=pages)]
+
+
+def run_selfstudys_job(job: dict):
+    """The crawl job (one browser, all subjects), or the download of one PDF it found.
+
+    The crawl returns `(ok, jobs)`: a download job per PDF link, so a failed
+    PDF is retried on its own rather than by crawling again. A page that
+    failed to load fails the crawl, which is then retried; PDFs already
+    queued are not queued twice.
+    """
+    payload = job["payload"]
+    if job["doc"] != "crawl":
+        started = time.time()
+        if safe_download(payload["url"], DOWNLOAD_DIR / payload["dest"]):
+            return True
+        if payload["optional"]:
+            return True
+        raise_if_missing([payload["url"]], started)
+        return False
+    found: list[dict] = []
+    stats = asyncio.run(crawl_selfstudys(payload["pages"], collect=found))
+    jobs = [
+        make_job("selfstudys", urlsplit(doc["url"]).netloc, doc["subject"], doc["year"], Path(doc["dest"]).name,
+                 url=doc["url"], dest=doc["dest"], optional=doc["optional"])
+        for doc in found
+    ]
+    return stats["fail"] == 0, jobs
+
+
+async def crawl_selfstudys(pages: int, subjects: list[str] | None = None, collect: list | None = None) -> dict:
+    """Crawl subjects and years concurrently over a pool of `pages` browser pages.
+
+    Pages are only held while navigating and scanning; PDF downloads run on
+    worker threads through safe_download. Instead of fixed sleeps, each
+    navigation waits for network idle or the selectors we are after, capped
+    at SETTLE_TIMEOUT. With `collect`, nothing is downloaded: each PDF found
+    is appended to it as {"subject", "year", "url", "dest", "optional"}, with
+    `dest` relative to DOWNLOAD_DIR.
+    """
+    from playwright.async_api import async_playwright, Error as PlaywrightError
 
     stats = {"ok": 0, "fail": 0}
 
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(headless=True)
-        context = browser.new_context(
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        context = await browser.new_context(
             user_agent=HEADERS["User-Agent"],
             accept_downloads=True,
         )
-        page = context.new_page()
+        await context.route("**/*", _block_non_documents)
+        context.set_default_navigation_timeout(NAV_TIMEOUT)
+
+        pool: asyncio.Queue = asyncio.Queue()
+        for _ in range(pages):
+            pool.put_nowait(await context.new_page())
+
+        async def visit(url: str, scan, wait_for: str | None = None):
+            """Borrow a page, load `url`, settle, and return `await scan(page)`."""
+            await asyncio.to_thread(throttle, url)
+            t0 = time.perf_counter()
+            page = await pool.get()
+            metrics.observe("browser_page_wait_seconds", time.perf_counter() - t0)
+            try:
+                with metrics.timer("browser_nav_seconds", phase="goto"):
+                    await page.goto(url, wait_until="domcontentloaded")
+                try:
+                    with metrics.timer("browser_nav_seconds", phase="settle"):
+                        if wait_for:
+                            await page.wait_for_selector(wait_for, timeout=SETTLE_TIMEOUT)
+                        else:
+                            await page.wait_for_load_state("networkidle", timeout=SETTLE_TIMEOUT)
+                except PlaywrightError:
+                    metrics.inc("browser_settle_timeouts_total")
+                    pass  # settle is best effort; scan whatever has rendered
+                with metrics.timer("browser_nav_seconds", phase="scan"):
+                    return await scan(page)
+            finally:
+                pool.put_nowait(page)
+
+        async def download(url: str, dest: Path) -> bool:
+            return await asyncio.to_thread(safe_download, url, dest)
 
         # First, find the subject listing page to get correct URLs
-        base_url = "https://www.selfstudys.com/books/cbse-prev-paper/english/class-12th"
+        async def scan_listing(page):
+            subject_links = {}
+            for href, text in await page.evaluate(HARVEST_LINKS_JS):
+                matched = {m.lastgroup for m in SUBJECT_SLUG_RE.finditer(href.lower())}
+                matched.update(m.lastgroup for m in SUBJECT_NAME_RE.finditer(text.lower()))
+                for key in matched:
+                    subject = _SUBJECT_KEYS[key]
+                    subject_links[subject] = _absolute(href)
+                    log.info("  Found link for %s: %s", subject, subject_links[subject])
+            return subject_links
 
         try:
-            page.goto(base_url, wait_until="domcontentloaded", timeout=30000)
-            time.sleep(3)
+            subject_links = await visit(SELFSTUDYS_LISTING, scan_listing)
             log.info("Loaded selfstudys.com main page")
         except Exception as e:
             log.error("Failed to load selfstudys.com: %s", e)
-            browser.close()
+            stats["fail"] += 1
+            await browser.close()
             return stats
 
-        # Get all subject links from the page
-        subject_links = {}
-        try:
-            links = page.query_selector_all("a")
-            for link in links:
-                href = link.get_attribute("href") or ""
-                text = (link.inner_text() or "").strip().lower()
-                for subject, (slug, _) in subject_slugs.items():
-                    if slug in href.lower() or subject.lower() in text:
-                        full_url = href if href.startswith("http") else f"https://www.selfstudys.com{href}"
-                        subject_links[subject] = full_url
-                        log.info("  Found link for %s: %s", subject, full_url)
-        except Exception as e:
-            log.warning("Error finding subject links: %s", e)
-
-        # For each subject, navigate and find year-wise papers
-        for subject, (slug, name_part) in subject_slugs.items():
-            log.info("--- Processing %s ---", subject)
-            subject_url = subject_links.get(
-                subject,
-                f"{base_url}/{slug}"
-            )
+        async def scan_subject(page):
+            # Look for year-specific links (2015-2025)
+            year_links = []
+            for href, text in await page.evaluate(HARVEST_LINKS_JS):
+                years = set(YEAR_RE.findall(text)) | set(YEAR_RE.findall(href))
+                for year in sorted(years):
+                    year_links.append((int(year), text, _absolute(href)))
+            return year_links
+
+        async def scan_year(page):
+            # PDF download links, then embedded PDF viewer URLs
+            harvested = await page.evaluate(HARVEST_DOCUMENTS_JS)
+            found = [
+                (_absolute(href), text, True)
+                for href, text in harvested["links"]
+                if href.endswith(".pdf") or "download" in href.lower()
+            ]
+            found.extend((src.split("?")[0], "", False) for src in harvested["frames"])
+            return found
 
+        async def crawl_year(subject: str, year: int, url: str):
+            dest_dir = DOWNLOAD_DIR / subject / f"{year}_BoardPaper_Solutions"
+            dest_dir.mkdir(parents=True, exist_ok=True)
             try:
-                page.goto(subject_url, wait_until="domcontentloaded", timeout=30000)
-                time.sleep(3)
+                found = await visit(url, scan_year, wait_for="a[href*='.pdf'], a[href*='download'], iframe[src*='.pdf']")
             except Exception as e:
-                log.warning("Failed to load %s page: %s", subject, e)
+                log.warning("  Error processing %s %d: %s", subject, year, e)
                 stats["fail"] += 1
-                continue
-
-            # Look for year links or PDF download links
-            try:
-                all_links = page.query_selector_all("a")
-                pdf_links = []
-                for link in all_links:
-                    href = link.get_attribute("href") or ""
-                    text = (link.inner_text() or "").strip()
-                    # Look for year-specific links (2015-2025)
-                    for year in range(2015, 2026):
-                        if str(year) in text or str(year) in href:
-                            full_url = href if href.startswith("http") else f"https://www.selfstudys.com{href}"
-                            pdf_links.append((year, text, full_url))
-
-                log.info("  Found %d year-related links for %s", len(pdf_links), subject)
-
-                # Try to navigate to each year and find downloadable PDFs
-                visited_years = set()
-                for year, text, url in pdf_links:
-                    if year in visited_years:
-                        continue
-                    visited_years.add(year)
-
-                    dest_dir = DOWNLOAD_DIR / subject / f"{year}_BoardPaper_Solutions"
-                    dest_dir.mkdir(parents=True, exist_ok=True)
-
-                    try:
-                        page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                        time.sleep(2)
-
-                        # Look for PDF download buttons/links
-                        download_links = page.query_selector_all("a[href*='.pdf'], a[href*='download'], button:has-text('Download')")
-
-                        for dl in download_links:
-                            dl_href = dl.get_attribute("href") or ""
-                            dl_text = (dl.inner_text() or "").strip()
-
-                            if dl_href.endswith(".pdf") or "download" in dl_href.lower():
-                                full_dl_url = dl_href if dl_href.startswith("http") else f"https://www.selfstudys.com{dl_href}"
-                                fname = f"{subject}_{year}_{dl_text[:50].replace('/', '_').replace(' ', '_')}.pdf"
-                                fname = re.sub(r'[^\w._-]', '_', fname)
-
-                                if safe_download(full_dl_url, dest_dir / fname):
-                                    stats["ok"] += 1
-                                else:
-                                    stats["fail"] += 1
-
-                        # Also try to find embedded PDF viewer URLs
-                        iframes = page.query_selector_all("iframe")
-                        for iframe in iframes:
-                            src = iframe.get_attribute("src") or ""
-                            if ".pdf" in src:
-                                pdf_url = src.split("?")[0] if "?" in src else src
-                                fname = f"{subject}_{year}_paper.pdf"
-                                if safe_download(pdf_url, dest_dir / fname):
-                                    stats["ok"] += 1
+                return
 
-                    except Exception as e:
-                        log.warning("  Error processing %s %d: %s", subject, year, e)
-                        stats["fail"] += 1
-
-                    time.sleep(1)
+            jobs = []
+            for dl_url, dl_text, counts_failure in found:
+                if counts_failure:
+                    fname = f"{subject}_{year}_{dl_text[:50].replace('/', '_').replace(' ', '_')}.pdf"
+                    fname = re.sub(r'[^\w._-]', '_', fname)
+                else:
+                    fname = f"{subject}_{year}_paper.pdf"
+                if collect is not None:
+                    collect.append({"subject": subject, "year": year, "url": dl_url,
+                                    "dest": (dest_dir / fname).relative_to(DOWNLOAD_DIR).as_posix(),
+                                    "optional": not counts_failure})
+                    continue
+                jobs.append((download(dl_url, dest_dir / fname), counts_failure))
+            results = await asyncio.gather(*(job for job, _ in jobs))
+            for ok, (_, counts_failure) in zip(results, jobs):
+                if ok:
+                    stats["ok"] += 1
+                elif counts_failure:
+                    stats["fail"] += 1
 
+        async def crawl_subject(subject: str, slug: str):
+            log.info("--- Processing %s ---", subject)
+            subject_url = subject_links.get(subject, f"{SELFSTUDYS_LISTING}/{slug}")
+            try:
+                year_links = await visit(subject_url, scan_subject)
             except Exception as e:
-                log.warning("Error scraping %s: %s", subject, e)
+                log.warning("Failed to load %s page: %s", subject, e)
                 stats["fail"] += 1
+                return
+            log.info("  Found %d year-related links for %s", len(year_links), subject)
+
+            # Try to navigate to each year and find downloadable PDFs
+            first_per_year = {}
+            for year, _text, url in year_links:
+                first_per_year.setdefault(year, url)
+            await asyncio.gather(*(crawl_year(subject, y, u) for y, u in first_per_year.items()))
+
+        await asyncio.gather(*(
+            crawl_subject(subject, slug)
+            for subject, (slug, _) in SELFSTUDYS_SUBJECTS.items()
+            if subjects is None or subject in subjects
+        ))
+        await browser.close()
 
-        browser.close()
-
-    log.info("selfstudys.com — Downloaded: %d, Failed: %d", stats["ok"], stats["fail"])
     return stats
 
 
 # ---------------------------------------------------------------------------
 # Source 4: Direct known PDF links (fallback / supplementary)
 # ---------------------------------------------------------------------------
-def scrape_direct_links():
-    """Download from curated direct PDF links as a fallback."""
-    log.info("=" * 60)
-    log.info("SOURCE 4: Direct curated links (fallback)")
-    log.info("=" * 60)
-
+def plan_direct_links() -> list[dict]:
+    """One job per (subject, year) on the curated vedantu.com PDF URLs."""
     # vedantu.com has well-known PDF URLs for CBSE papers
-    vedantu_base = "https://www.vedantu.com/previous-year-question-paper"
     vedantu_subjects = {
         "Physics": "cbse-physics-question-paper-class-12",
         "Chemistry": "cbse-chemistry-question-paper-class-12",
@@ -379,72 +1643,347 @@ def scrape_direct_links():
         "Biology": "cbse-biology-question-paper-class-12",
         "English": "cbse-english-question-paper-class-12",
     }
-
-    stats = {"ok": 0, "fail": 0}
-
-    # Try vedantu PDFs with common patterns
-    for subject, slug in vedantu_subjects.items():
+    host = urlsplit(VEDANTU_BASE).netloc
+    jobs = []
+    for subject in vedantu_subjects:
         for year in range(2015, 2026):
-            dest_dir = DOWNLOAD_DIR / subject / f"{year}_BoardPaper"
-            dest_dir.mkdir(parents=True, exist_ok=True)
-
+            # Try vedantu PDFs with common patterns
             urls_to_try = [
-                f"https://www.vedantu.com/content/cbse/class-12/{subject.lower()}/previous-year-question-paper-{year}.pdf",
-                f"https://www.vedantu.com/content/cbse/class-12/{subject.lower()}/question-paper-{year}.pdf",
+                f"{VEDANTU_BASE}/{subject.lower()}/previous-year-question-paper-{year}.pdf",
+                f"{VEDANTU_BASE}/{subject.lower()}/question-paper-{year}.pdf",
             ]
+            dest = f"{subject}/{year}_BoardPaper/{subject}_Vedantu_{year}.pdf"
+            jobs.append(make_job("direct", host, subject, year, "BoardPaper", urls=urls_to_try, dest=dest))
+    return jobs
 
-            for url in urls_to_try:
-                fname = f"{subject}_Vedantu_{year}.pdf"
-                if safe_download(url, dest_dir / fname):
-                    stats["ok"] += 1
-                    break
-            else:
-                stats["fail"] += 1
 
-            time.sleep(0.3)
+def run_direct_job(job: dict) -> bool:
+    dest = DOWNLOAD_DIR / job["payload"]["dest"]
+    started = time.time()
+    if any(safe_download(url, dest) for url in job["payload"]["urls"]):
+        return True
+    raise_if_missing(job["payload"]["urls"], started)
+    return False
+
+
+def scrape_direct_links(workers: int = MAX_WORKERS):
+    """Download from curated direct PDF links as a fallback."""
+    log.info("=" * 60)
+    log.info("SOURCE 4: Direct curated links (fallback)")
+    log.info("=" * 60)
 
+    tasks = [lambda j=job: run_direct_job(j) for job in plan_direct_links()]
+    stats = run_parallel(tasks, workers)
     log.info("Direct links — Downloaded: %d, Failed: %d", stats["ok"], stats["fail"])
     return stats
 
 
+# ---------------------------------------------------------------------------
+# Job queue
+# ---------------------------------------------------------------------------
+class DocumentMissing(Exception):
+    """Every URL a job could fetch its document from answered 404/410: it isn't published, don't retry."""
+
+
+def raise_if_missing(urls, since: float):
+    """Raise DocumentMissing if all `urls` are known to be missing (skipped, or answered so since `since`)."""
+    urls = list(urls)
+    if urls and all(http_cache.is_missing(url, since) for url in urls):
+        raise DocumentMissing(f"not published ({len(urls)} URLs answered 404/410)")
+
+
+def make_job(source: str, host: str, subject: str, year: int | None, doc: str, **payload) -> dict:
+    return {
+        "id": f"{source}|{subject}|{year or '*'}|{doc}",
+        "source": source,
+        "host": host,
+        "subject": subject,
+        "year": year,
+        "doc": doc,
+        "payload": payload,
+    }
+
+
+def plan_all(pages: int = BROWSER_PAGES) -> list[dict]:
+    return plan_cbse_academic() + plan_cbse_gov() + plan_selfstudys(pages)
+
+
+JOB_HANDLERS = {
+    "cbseacademic": run_academic_job,
+    "cbse_gov":     run_gov_job,
+    "selfstudys":   run_selfstudys_job,
+    "direct":       run_direct_job,
+}
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """argparse type for `--shard i/n` (0-based i)."""
+    try:
+        index, count = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected I/N, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("need 0 <= I < N")
+    return index, count
+
+
+def in_shard(job_id: str, shard: tuple[int, int] | None) -> bool:
+    """Stable assignment of jobs to shards, so every machine agrees on the split."""
+    if shard is None:
+        return True
+    index, count = shard
+    return int(hashlib.sha1(job_id.encode()).hexdigest()[:8], 16) % count == index
+
+
+class JobQueue:
+    """SQLite-backed job table for one scrape run.
+
+    Each job is pending -> running -> done, or back to pending with a backoff
+    after a failure until JOB_MAX_ATTEMPTS is reached (then failed). A job
+    whose document isn't published at all goes straight to missing. Jobs
+    left running by a crash or Ctrl-C are put back to pending by resume().
+    `meta` keeps the settings a run was planned with (e.g. its shard).
+    Used from the scheduler thread only.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id              TEXT PRIMARY KEY,
+            source          TEXT NOT NULL,
+            host            TEXT NOT NULL,
+            subject         TEXT,
+            year            INTEGER,
+            doc             TEXT,
+            payload         TEXT NOT NULL,
+            status          TEXT NOT NULL DEFAULT 'pending',
+            attempts        INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error      TEXT,
+            updated_at      REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_ready ON jobs(status, next_attempt_at);
+        CREATE TABLE IF NOT EXISTS meta (
+            key             TEXT PRIMARY KEY,
+            value           TEXT
+        );
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def unfinished(self) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')").fetchone()[0]
+
+    def start_run(self, jobs: list[dict], **meta):
+        """Replace the job table with a freshly planned run (and `meta` with its settings)."""
+        self.conn.execute("BEGIN")
+        self.conn.execute("DELETE FROM jobs")
+        self.conn.execute("DELETE FROM meta")
+        self.conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                              [(key, json.dumps(value)) for key, value in meta.items()])
+        self._insert(jobs)
+        self.conn.execute("COMMIT")
+
+    def add(self, jobs: list[dict]):
+        """Queue follow-up jobs; ones already in the table are left as they are."""
+        self.conn.execute("BEGIN")
+        self._insert(jobs)
+        self.conn.execute("COMMIT")
+
+    def _insert(self, jobs: list[dict]):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (id, source, host, subject, year, doc, payload, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(j["id"], j["source"], j["host"], j["subject"], j["year"], j["doc"],
+              json.dumps(j["payload"]), now) for j in jobs],
+        )
+
+    def meta(self, key: str):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def resume(self):
+        self.conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+
+    def ready(self, now: float) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT id, source, host, subject, year, doc, payload, attempts FROM jobs "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at, rowid",
+            (now,),
+        ).fetchall()
+        return [
+            {"id": r[0], "source": r[1], "host": r[2], "subject": r[3], "year": r[4], "doc": r[5],
+             "payload": json.loads(r[6]), "attempts": r[7]}
+            for r in rows
+        ]
+
+    def next_wakeup(self) -> float | None:
+        return self.conn.execute(
+            "SELECT MIN(next_attempt_at) FROM jobs WHERE status = 'pending'").fetchone()[0]
+
+    def mark_running(self, job_id: str):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def finish(self, job: dict, ok: bool, error: str | None = None, missing: bool = False):
+        now = time.time()
+        if missing:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'missing', last_error = ?, updated_at = ? WHERE id = ?",
+                (error, now, job["id"]))
+            log.info("  JOB MISSING: %s — %s", job["id"], error)
+            return
+        if ok:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+                (now, job["id"]))
+            return
+        attempts = job["attempts"] + 1
+        if attempts >= JOB_MAX_ATTEMPTS:
+            status, next_at = "failed", now
+        else:
+            delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+            status, next_at = "pending", now + random.uniform(delay / 2, delay)
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? "
+            "WHERE id = ?",
+            (status, attempts, next_at, error, now, job["id"]))
+        log.warning("  JOB %s (attempt %d/%d): %s%s", "FAILED" if status == "failed" else "RETRY",
+                    attempts, JOB_MAX_ATTEMPTS,
+                    job["id"], f" — {error}" if error else "")
+
+    def stats(self) -> dict:
+        """{source: {"ok": done, "fail": failed, "missing": not published}}, the shape of download_stats.json."""
+        stats = {}
+        for source, status, count in self.conn.execute(
+                "SELECT source, status, COUNT(*) FROM jobs GROUP BY source, status"):
+            entry = stats.setdefault(source, {"ok": 0, "fail": 0, "missing": 0})
+            if status == "done":
+                entry["ok"] += count
+            elif status == "failed":
+                entry["fail"] += count
+            elif status == "missing":
+                entry["missing"] += count
+        return stats
+
+
+def _timed_job(handler, job: dict) -> bool:
+    token = current_source.set(job["source"])
+    try:
+        with metrics.timer("job_seconds", source=job["source"]):
+            return handler(job)
+    finally:
+        current_source.reset(token)
+
+
+def run_jobs(queue: JobQueue, workers: int, profiler: JobProfiler | None = None,
+             handlers: dict | None = None):
+    """Run every pending job of `queue` on a thread pool.
+
+    At most `workers` jobs run at once, and at most HOST_CONCURRENCY[host]
+    per host, so a slow source never starves the others of idle workers.
+    Job state is written to the queue as it changes; caches are flushed
+    every 30 seconds. With a `profiler`, every job runs under it.
+    `handlers` overrides JOB_HANDLERS per source.
+
+    A handler returns True/False, or `(ok, jobs)` to queue follow-up jobs,
+    and raises DocumentMissing when the document doesn't exist at all. It
+    may also return a Future of one of those, when the rest of its work is
+    done elsewhere: its worker is freed at once, and the job is finished
+    when the Future resolves.
+    """
+    handlers = {**JOB_HANDLERS, **(handlers or {})}
+    running: dict = {}               # future -> job
+    deferred: dict = {}              # future returned by a handler -> job
+    active: dict[str, int] = {}      # host -> running jobs
+    last_save = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        try:
+            while True:
+                now = time.time()
+                if len(running) < workers:
+                    for job in queue.ready(now):
+                        if len(running) >= workers:
+                            break
+                        host = job["host"]
+                        if active.get(host, 0) >= HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY):
+                            continue
+                        queue.mark_running(job["id"])
+                        active[host] = active.get(host, 0) + 1
+                        handler = handlers[job["source"]]
+                        if profiler:
+                            handler = profiler.wrap(handler)
+                        running[pool.submit(_timed_job, handler, job)] = job
+
+                if not running and not deferred:
+                    wakeup = queue.next_wakeup()
+                    if wakeup is None:
+                        break
+                    time.sleep(min(max(wakeup - now, 0.0), 5.0))
+                    continue
+
+                done, _ = wait([*running, *deferred], timeout=1.0, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    if fut in running:
+                        job = running.pop(fut)
+                        active[job["host"]] -= 1
+                        if not fut.exception() and isinstance(fut.result(), Future):
+                            deferred[fut.result()] = job
+                            continue
+                    else:
+                        job = deferred.pop(fut)
+                    missing = False
+                    try:
+                        result, error = fut.result(), None
+                        if isinstance(result, tuple):
+                            result, follow_ups = result
+                            queue.add(follow_ups)
+                        ok = bool(result)
+                    except DocumentMissing as e:
+                        ok, error, missing = False, str(e), True
+                    except Exception as e:
+                        ok, error = False, f"{type(e).__name__}: {e}"
+                    metrics.inc("jobs_total", source=job["source"],
+                                result="missing" if missing else "ok" if ok else "fail")
+                    queue.finish(job, ok, error, missing)
+
+                if time.monotonic() - last_save > 30:
+                    save_state()
+                    last_save = time.monotonic()
+        except KeyboardInterrupt:
+            log.warning("Interrupted — %d running jobs will be resumed on the next run",
+                        len(running) + len(deferred))
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
 # ---------------------------------------------------------------------------
 # Summary report
 # ---------------------------------------------------------------------------
 def generate_report():
-    """Print a summary of all downloaded files."""
+    """Print a summary of all downloaded files, straight from the manifest."""
     log.info("=" * 60)
     log.info("DOWNLOAD SUMMARY")
     log.info("=" * 60)
 
+    rows = manifest.query("""
+        SELECT subject, COUNT(*), COALESCE(SUM(size), 0), GROUP_CONCAT(DISTINCT year)
+        FROM files GROUP BY subject ORDER BY subject
+    """)
     total_files = 0
     total_size = 0
-
-    for subject_dir in sorted(DOWNLOAD_DIR.iterdir()):
-        if not subject_dir.is_dir():
-            continue
-        subject_files = 0
-        subject_size = 0
-        years = set()
-
-        for year_dir in sorted(subject_dir.iterdir()):
-            if not year_dir.is_dir():
-                continue
-            # Extract year from folder name
-            match = re.search(r"(\d{4})", year_dir.name)
-            if match:
-                years.add(match.group(1))
-
-            for f in year_dir.iterdir():
-                if f.is_file() and f.suffix.lower() == ".pdf":
-                    subject_files += 1
-                    subject_size += f.stat().st_size
-
+    for subject, subject_files, subject_size, years in rows:
         total_files += subject_files
         total_size += subject_size
-        years_str = ", ".join(sorted(years)) if years else "none"
+        years_str = ", ".join(sorted(years.split(","))) if years else "none"
         log.info(
             "  %-20s  %3d PDFs  (%5.1f MB)  Years: %s",
-            subject_dir.name,
+            subject,
             subject_files,
             subject_size / (1024 * 1024),
             years_str,
@@ -452,36 +1991,117 @@ def generate_report():
 
     log.info("-" * 60)
     log.info("  TOTAL: %d PDFs  (%.1f MB)", total_files, total_size / (1024 * 1024))
+    unique = manifest.query("SELECT COUNT(*) FROM blobs")[0][0]
+    dupes = manifest.duplicates()
+    log.info("  Unique PDFs in store: %d  (%d with more than one source/path)", unique, len(dupes))
+    for digest, paths, sources in dupes:
+        log.info("    %s  %s  <- %s", digest[:12], paths, sources)
+    missing_ms = manifest.missing("MarkingScheme", given="SamplePaper")
+    if missing_ms:
+        log.info("  Missing marking schemes: %s", ", ".join(f"{s} {y}" for s, y in missing_ms))
     log.info("  Location: %s", DOWNLOAD_DIR)
 
 
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CBSE Class 12 board paper scraper")
+    parser.add_argument(
+        "--download-dir", type=Path, default=DOWNLOAD_DIR,
+        help=f"where papers, caches and the manifest live (default: {DOWNLOAD_DIR})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=MAX_WORKERS,
+        help=f"concurrent jobs across all sources (default: {MAX_WORKERS}; 1 = serial)",
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=None,
+        help="keep-alive connections per host (default: --workers)",
+    )
+    parser.add_argument(
+        "--browser-pages", type=int, default=BROWSER_PAGES,
+        help=f"concurrent Playwright pages per selfstudys.com job (default: {BROWSER_PAGES})",
+    )
+    parser.add_argument(
+        "--recheck-missing", action="store_true",
+        help="ignore the negative cache and probe previously missing URLs again",
+    )
+    parser.add_argument(
+        "--fresh", action="store_true",
+        help="plan a new run even if the previous one did not finish",
+    )
+    parser.add_argument(
+        "--profile", choices=("cprofile", "pyinstrument"), default=None,
+        help="profile every job and write downloads/profile.pstats (or profile.html)",
+    )
+    parser.add_argument(
+        "--shard", type=parse_shard, default=None, metavar="I/N",
+        help="only plan the jobs of shard I of N (0-based), for splitting a run across machines",
+    )
+    args = parser.parse_args(argv)
+    if args.download_dir != DOWNLOAD_DIR:
+        use_download_dir(args.download_dir.resolve())
+    if args.recheck_missing:
+        http_cache.negative_ttl = 0
+    configure_session(pool_maxsize=args.pool_size or max(args.workers, 1))
+
     log.info("CBSE Class 12 Paper Scraper — Starting")
     log.info("Target: Physics, Chemistry, Math, Biology, English, Computer Science")
     log.info("Years: 2015 — 2025")
     log.info("Output: %s", DOWNLOAD_DIR)
+    log.info("Workers: %d", args.workers)
     log.info("")
 
     DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-    all_stats = {}
-
-    # Source 1: Official CBSE Academic (sample papers + marking schemes)
-    all_stats["cbseacademic"] = scrape_cbse_academic()
-
-    # Source 2: cbse.gov.in (actual board papers 2022-2025)
-    all_stats["cbse_gov"] = scrape_cbse_gov()
+    queue = JobQueue(JOBS_FILE)
+    unfinished = queue.unfinished()
+    if unfinished and not args.fresh:
+        planned_shard = tuple(queue.meta("shard") or ()) or None
+        if args.shard is not None and args.shard != planned_shard:
+            parser.error(f"the unfinished run was planned for shard "
+                         f"{'%d/%d' % planned_shard if planned_shard else 'none'}; "
+                         f"pass --fresh to plan shard {args.shard[0]}/{args.shard[1]} instead")
+        log.info("Resuming previous run: %d unfinished jobs", unfinished)
+        queue.resume()
+    else:
+        # Sources 1-3: cbseacademic.nic.in, cbse.gov.in, selfstudys.com
+        jobs = [job for job in plan_all(args.browser_pages) if in_shard(job["id"], args.shard)]
+        queue.start_run(jobs, shard=args.shard)
+        shard_note = f" (shard {args.shard[0]}/{args.shard[1]})" if args.shard else ""
+        log.info("Planned %d jobs%s", len(jobs), shard_note)
+
+    profiler = None
+    if args.profile:
+        suffix = "pstats" if args.profile == "cprofile" else "html"
+        try:
+            profiler = JobProfiler(args.profile, DOWNLOAD_DIR / f"profile.{suffix}")
+        except ImportError:
+            parser.error(f"--profile {args.profile}: module not installed")
 
-    # Source 3: selfstudys.com (Playwright-based)
-    all_stats["selfstudys"] = scrape_selfstudys()
+    t0 = time.perf_counter()
+    try:
+        run_jobs(queue, args.workers, profiler)
+    finally:
+        save_state()
+        metrics.observe("run_seconds", time.perf_counter() - t0)
+        record_pool_metrics()
+        metrics.write_json(METRICS_JSON)
+        metrics.write_prometheus(METRICS_PROM)
+        log.info("Metrics saved to %s and %s", METRICS_JSON, METRICS_PROM)
+        if profiler:
+            profiler.dump()
+
+    pruned = store.prune()
+    if pruned:
+        log.info("Pruned %d superseded PDFs from the store", pruned)
 
     # Generate summary
     generate_report()
 
     # Save stats
+    all_stats = queue.stats()
     stats_file = DOWNLOAD_DIR / "download_stats.json"
     stats_file.write_text(json.dumps(all_stats, indent=2))
     log.info("Stats saved to %s", stats_file)
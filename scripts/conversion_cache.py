@@ -0,0 +1,188 @@
+"""
+Content-addressed cache of PDF -> markdown conversions.
+
+An entry is keyed by (SHA-256 of the PDF bytes, converter name, converter
+options), where the options are whatever changes the output: docling version
+and pipeline settings, or vision model, prompt version and page range. The
+markdown lives in `<root>/<key[:2]>/<key>.md` and a SQLite index next to it
+holds the metadata and last-use time, so the cache can be trimmed to a size
+budget least-recently-used first.
+
+A renamed or re-downloaded paper with the same bytes is a hit; a changed
+paper or changed settings is a miss. That makes a full-corpus conversion run
+incremental.
+
+Usage:
+    python scripts/conversion_cache.py stats
+    python scripts/conversion_cache.py trim --max-gb 1
+    python scripts/conversion_cache.py clear --converter vision
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / "data" / "parsed" / ".conversion_cache"
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+
+def options_fingerprint(options: dict) -> str:
+    """Stable digest of converter options (key order and whitespace don't matter)."""
+    return hashlib.sha256(json.dumps(options, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def cache_key(pdf_sha256: str, converter: str, options: dict) -> str:
+    return hashlib.sha256(f"{pdf_sha256}\0{converter}\0{options_fingerprint(options)}".encode()).hexdigest()
+
+
+class ConversionCache:
+    """Markdown files plus a SQLite index with LRU eviction to `max_bytes`.
+
+    Safe to share between threads; separate processes may use the same
+    directory (SQLite serialises the index, files are renamed into place).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key         TEXT PRIMARY KEY,
+            pdf_sha256  TEXT NOT NULL,
+            converter   TEXT NOT NULL,
+            options     TEXT NOT NULL,
+            size        INTEGER NOT NULL,
+            meta        TEXT,
+            created_at  TEXT NOT NULL,
+            last_used   TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+        CREATE INDEX IF NOT EXISTS entries_pdf ON entries(pdf_sha256);
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False,
+                                   isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.md"
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+    def get(self, pdf_sha256: str, converter: str, options: dict) -> tuple[str, dict] | None:
+        """(markdown, meta) for a hit, else None. A hit becomes most recently used."""
+        key = cache_key(pdf_sha256, converter, options)
+        with self.lock:
+            row = self.conn.execute("SELECT meta FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                markdown = self.path_for(key).read_text()
+            except FileNotFoundError:
+                # Index row without its file (deleted by hand, or a crashed put).
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (self._now(), key))
+        return markdown, json.loads(row[0] or "{}")
+
+    def put(self, pdf_sha256: str, converter: str, options: dict, markdown: str, meta: dict | None = None) -> str:
+        """Store a conversion, then evict least-recently-used entries beyond max_bytes. Returns the key."""
+        key = cache_key(pdf_sha256, converter, options)
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(markdown)
+        os.replace(tmp, path)
+        now = self._now()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, pdf_sha256, converter, json.dumps(options, sort_keys=True), path.stat().st_size,
+                 json.dumps(meta or {}), now, now),
+            )
+        self.evict()
+        return key
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """Drop least-recently-used entries until the cache fits `max_bytes`. Returns entries removed."""
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        with self.lock:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= budget:
+                return 0
+            for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+                if total <= budget:
+                    break
+                self.path_for(key).unlink(missing_ok=True)
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+        return removed
+
+    def clear(self, converter: str | None = None) -> int:
+        with self.lock:
+            if converter:
+                rows = self.conn.execute("SELECT key FROM entries WHERE converter = ?", (converter,)).fetchall()
+            else:
+                rows = self.conn.execute("SELECT key FROM entries").fetchall()
+            for (key,) in rows:
+                self.path_for(key).unlink(missing_ok=True)
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return len(rows)
+
+    def stats(self) -> dict:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT converter, COUNT(*), SUM(size) FROM entries GROUP BY converter").fetchall()
+        return {
+            "entries": sum(n for _, n, _ in rows),
+            "bytes": sum(size for _, _, size in rows),
+            "max_bytes": self.max_bytes,
+            "by_converter": {converter: {"entries": n, "bytes": size} for converter, n, size in rows},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or trim the PDF -> markdown conversion cache")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR, help=f"(default: {CACHE_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="entries and bytes per converter")
+    p = sub.add_parser("trim", help="evict least-recently-used entries down to a size")
+    p.add_argument("--max-gb", type=float, required=True)
+    p = sub.add_parser("clear", help="remove entries")
+    p.add_argument("--converter", help="only this converter's entries (e.g. docling, vision)")
+    args = parser.parse_args(argv)
+
+    cache = ConversionCache(args.cache_dir)
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.command == "trim":
+        print(f"Evicted {cache.evict(int(args.max_gb * 1024 ** 3))} entries")
+    else:
+        print(f"Removed {cache.clear(args.converter)} entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+Resident docling conversion daemon, and a thin client for it.
+
+`serve` imports docling and loads its models once, into a small pool of warm
+worker processes (the same workers convert_papers.py uses), then accepts
+jobs over a Unix socket. The client sends a PDF path and gets the markdown
+streamed back, so a one-off re-conversion costs only the conversion itself.
+
+At most --workers papers convert at once; up to --max-queue more wait their
+turn and anything beyond that is refused as busy. The daemon exits after
+--idle-timeout seconds without a job, or on SIGTERM/SIGINT/`stop` once the
+jobs in flight have finished.
+
+Wire protocol: one JSON request line per connection, answered by JSON event
+lines — {"event": "queued"}, {"event": "markdown", "data": ...}*, then
+{"event": "done", ...} or {"event": "error", "error": ...}.
+
+Usage:
+    python scripts/convert_daemon.py serve --workers 2 &
+    python scripts/convert_daemon.py convert data/pdfs/physics/physics_2024_solved.pdf -o physics.md
+    python scripts/convert_daemon.py convert paper.pdf --spawn      # start the daemon if needed
+    python scripts/convert_daemon.py status
+    python scripts/convert_daemon.py stop
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import importlib.util
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import convert_papers
+from conversion_cache import CACHE_DIR, ConversionCache
+from scraper import file_sha256
+
+SOCKET_PATH = Path(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()) / f"cbse-convert-{os.getuid()}.sock"
+IDLE_TIMEOUT = 15 * 60          # seconds without a job before the daemon exits
+MAX_QUEUE = 16                  # jobs allowed to wait for a worker
+STREAM_CHUNK = 64 * 1024        # characters of markdown per "markdown" event
+SPAWN_TIMEOUT = 120.0           # seconds the client waits for a spawned daemon's socket
+
+log = logging.getLogger("convert_daemon")
+
+
+# ---------------------------------------------------------------------------
+# Daemon
+# ---------------------------------------------------------------------------
+def _warm() -> int:
+    """No-op job that forces a worker (and so its converter) into existence."""
+    return os.getpid()
+
+
+class ConversionDaemon:
+    def __init__(self, socket_path: Path, workers: int, threads: int, max_memory: int | None,
+                 max_queue: int = MAX_QUEUE, idle_timeout: float = IDLE_TIMEOUT,
+                 cache: ConversionCache | None = None):
+        self.socket_path = socket_path
+        self.cache = cache
+        self.options = convert_papers.converter_options() if cache else None
+        self.workers = workers
+        self.max_queue = max_queue
+        self.idle_timeout = idle_timeout
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=convert_papers.init_worker, initargs=(threads, max_memory),
+        )
+        self.slots = asyncio.Semaphore(workers)
+        self.running = 0
+        self.waiting = 0
+        self.served = 0
+        self.started = time.time()
+        self.last_activity = time.monotonic()
+        self.stopping = asyncio.Event()
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        # Load the models in every worker before taking jobs.
+        t0 = time.perf_counter()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm) for _ in range(self.workers)))
+        log.info("%d workers warm in %.1fs", self.workers, time.perf_counter() - t0)
+
+        server = await asyncio.start_unix_server(self.handle, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        log.info("Listening on %s (idle timeout %ds)", self.socket_path, self.idle_timeout)
+        try:
+            async with server:
+                watchdog = asyncio.create_task(self.watch_idle())
+                await self.stopping.wait()
+                watchdog.cancel()
+                server.close()
+                # Let jobs in flight finish and reach their clients.
+                while self.running or self.waiting:
+                    await asyncio.sleep(0.1)
+        finally:
+            self.socket_path.unlink(missing_ok=True)
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            log.info("Stopped after %d jobs", self.served)
+
+    async def watch_idle(self):
+        while True:
+            await asyncio.sleep(min(30.0, self.idle_timeout / 4))
+            idle = time.monotonic() - self.last_activity
+            if not self.running and not self.waiting and idle >= self.idle_timeout:
+                log.info("Idle for %ds, shutting down", idle)
+                self.stopping.set()
+                return
+
+    def status(self) -> dict:
+        return {"pid": os.getpid(), "workers": self.workers, "running": self.running,
+                "waiting": self.waiting, "served": self.served,
+                "uptime_seconds": round(time.time() - self.started, 1)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def send(event: str, **fields):
+            writer.write(json.dumps({"event": event, **fields}).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            try:
+                request = json.loads(await reader.readline())
+            except ValueError:
+                return await send("error", error="malformed request")
+            op = request.get("op")
+            if op == "status":
+                await send("status", **self.status())
+            elif op == "stop":
+                await send("stopping", **self.status())
+                self.stopping.set()
+            elif op == "convert":
+                await self.convert(request, send)
+            else:
+                await send("error", error=f"unknown op {op!r}")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass    # client went away; its job (if any) still completes in the pool
+        finally:
+            writer.close()
+
+    async def convert(self, request: dict, send):
+        pdf = request.get("pdf", "")
+        if self.stopping.is_set():
+            return await send("error", error="daemon is shutting down")
+        if not os.path.isabs(pdf) or not os.path.isfile(pdf):
+            return await send("error", error=f"not an absolute path to a file: {pdf!r}")
+        if self.waiting >= self.max_queue:
+            return await send("error", error=f"busy: {self.running} running, {self.waiting} queued")
+
+        self.last_activity = time.monotonic()
+        sha256 = None
+        if self.cache:
+            sha256 = await asyncio.to_thread(file_sha256, Path(pdf))
+            hit = await asyncio.to_thread(self.cache.get, sha256, "docling", self.options)
+            if hit:
+                log.info("CACHED: %s", pdf)
+                return await self.stream(send, hit[0], seconds=0.0, pages=hit[1].get("pages"), cached=True)
+
+        self.waiting += 1
+        try:
+            await send("queued", running=self.running, waiting=self.waiting)
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, convert_papers.render, pdf)
+        finally:
+            self.running -= 1
+            self.served += 1
+            self.last_activity = time.monotonic()
+            self.slots.release()
+
+        if not result["ok"]:
+            log.warning("FAIL: %s — %s", pdf, result["error"])
+            return await send("error", error=result["error"])
+        markdown = result.pop("markdown")
+        if self.cache:
+            meta = {"pages": result.get("pages"), "seconds": result["seconds"], "pdf": pdf}
+            await asyncio.to_thread(self.cache.put, sha256, "docling", self.options, markdown, meta)
+        log.info("OK: %s  (%.1fs, %d chars)", pdf, result["seconds"], len(markdown))
+        await self.stream(send, markdown, seconds=result["seconds"], pages=result.get("pages"), cached=False)
+
+    @staticmethod
+    async def stream(send, markdown: str, **done):
+        for i in range(0, len(markdown), STREAM_CHUNK):
+            await send("markdown", data=markdown[i:i + STREAM_CHUNK])
+        await send("done", chars=len(markdown), **done)
+
+
+def socket_alive(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+            return True
+        except OSError:
+            return False
+
+
+def serve(args) -> int:
+    if importlib.util.find_spec("docling") is None:
+        log.error("docling is not installed (pip install docling)")
+        return 1
+    if args.socket.exists():
+        if socket_alive(args.socket):
+            log.error("A daemon is already listening on %s", args.socket)
+            return 1
+        args.socket.unlink()    # stale, from a daemon that was killed
+    threads = max(1, args.threads)
+    workers = args.workers or max(1, (os.cpu_count() or 1) // threads)
+    max_memory = int(args.max_memory_gb * 1024 ** 3) if args.max_memory_gb else None
+    cache = None if args.no_cache else ConversionCache(args.cache_dir)
+    daemon = ConversionDaemon(args.socket, workers, threads, max_memory, args.max_queue, args.idle_timeout, cache)
+    asyncio.run(daemon.serve())
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+def request(path: Path, payload: dict):
+    """Send one request and yield the daemon's events as they arrive."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(path))
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        with sock.makefile("rb") as lines:
+            for line in lines:
+                yield json.loads(line)
+
+
+def spawn_daemon(args):
+    """Start `serve` detached from this terminal and wait for its socket."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--socket", str(args.socket), "serve"]
+    log_file = args.socket.with_suffix(".log")
+    with open(log_file, "ab") as out:
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=out, stderr=out, start_new_session=True)
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        if socket_alive(args.socket):
+            return
+        if proc.poll() is not None:
+            raise SystemExit(f"daemon exited with status {proc.returncode}; see {log_file}")
+        time.sleep(0.2)
+    raise SystemExit(f"daemon did not come up within {SPAWN_TIMEOUT:.0f}s; see {log_file}")
+
+
+def convert(args) -> int:
+    if not socket_alive(args.socket):
+        if not args.spawn:
+            log.error("No daemon on %s (start one with `serve`, or pass --spawn)", args.socket)
+            return 1
+        log.info("Starting daemon on %s", args.socket)
+        spawn_daemon(args)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for event in request(args.socket, {"op": "convert", "pdf": str(args.pdf.resolve())}):
+            kind = event["event"]
+            if kind == "markdown":
+                out.write(event["data"])
+            elif kind == "queued" and event["waiting"] > 1:
+                log.info("Queued behind %d jobs", event["running"] + event["waiting"] - 1)
+            elif kind == "done":
+                log.info("Converted %s in %.1fs (%s pages, %d chars%s)", args.pdf.name, event["seconds"],
+                         event["pages"], event["chars"], ", cached" if event.get("cached") else "")
+                return 0
+            elif kind == "error":
+                log.error("%s: %s", args.pdf.name, event["error"])
+                return 1
+    finally:
+        if args.output:
+            out.close()
+    log.error("Daemon closed the connection before finishing")
+    return 1
+
+
+def control(args) -> int:
+    if not socket_alive(args.socket):
+        log.error("No daemon on %s", args.socket)
+        return 1
+    for event in request(args.socket, {"op": args.command}):
+        print(json.dumps(event))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident docling conversion daemon and client")
+    parser.add_argument("--socket", type=Path, default=SOCKET_PATH, help=f"(default: {SOCKET_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="run the daemon in the foreground")
+    p.add_argument("--workers", type=int, default=None, help="concurrent conversions (default: cores / --threads)")
+    p.add_argument("--threads", type=int, default=2, help="torch/OpenMP threads per worker (default: 2)")
+    p.add_argument("--max-memory-gb", type=float, default=None, help="address-space cap per worker")
+    p.add_argument("--max-queue", type=int, default=MAX_QUEUE,
+                   help=f"jobs allowed to wait for a worker before new ones are refused (default: {MAX_QUEUE})")
+    p.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                   help=f"exit after this many seconds without a job (default: {IDLE_TIMEOUT})")
+    p.add_argument("--cache-dir", type=Path, default=CACHE_DIR, help=f"conversion cache (default: {CACHE_DIR})")
+    p.add_argument("--no-cache", action="store_true", help="always convert, and don't store results")
+
+    p = sub.add_parser("convert", help="convert one PDF and stream its markdown")
+    p.add_argument("pdf", type=Path)
+    p.add_argument("-o", "--output", type=Path, help="write markdown here instead of stdout")
+    p.add_argument("--spawn", action="store_true", help="start a daemon in the background if none is running")
+
+    sub.add_parser("status", help="print the daemon's status")
+    sub.add_parser("stop", help="ask the daemon to finish its jobs and exit")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        return serve(args)
+    if args.command == "convert":
+        return convert(args)
+    return control(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,594 @@
+"""
+Batch PDF -> markdown conversion with docling.
+
+Finds every paper the scraper has downloaded (by walking its downloads/ tree,
+or from its manifest.sqlite) and converts each into
+data/parsed/raw/<subject>/<year>.md. Further documents for the same subject
+and year (other sets, sample papers, marking schemes) go to
+<year>-<document>.md next to it.
+
+Importing docling and loading its layout/table models costs far more than
+converting one paper, so conversion runs on a process pool whose workers
+build their DocumentConverter once, in the pool initializer, and reuse it for
+every PDF they are handed. Each worker can be capped in address space and
+recycled after a number of papers to bound model/allocator growth.
+
+Results go through a ConversionCache keyed by the PDF's SHA-256 and the
+docling version/pipeline settings, so a rerun only converts new or changed
+papers (and restores any markdown that was deleted or edited from cache).
+
+With --shard-pages, every PDF is split into page ranges that convert on
+different workers. Each paper's markdown is streamed to `<output>.part` as
+soon as all earlier ranges are done and renamed into place at the end; a
+failed range is retried on its own instead of redoing the whole paper.
+
+With --text-fast-path, pages of born-digital PDFs whose embedded text layer
+is usable (see text_layer.py) are extracted directly, and only scanned or
+math/diagram-heavy pages go to docling.
+
+Usage:
+    python scripts/convert_papers.py                           # every new paper, all cores
+    python scripts/convert_papers.py --workers 4 --threads 2 --max-memory-gb 4
+    python scripts/convert_papers.py --manifest --subject Physics --dry-run
+    python scripts/convert_papers.py --pdf paper.pdf --output-dir data/parsed --shard-pages 4
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import importlib.util
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "cbse_papers"))
+
+from scraper import DOWNLOAD_DIR, MANIFEST_FILE, count_pdf_pages, describe_path, file_sha256  # noqa: E402
+from conversion_cache import CACHE_DIR, CACHE_MAX_BYTES, ConversionCache  # noqa: E402
+from text_layer import TEXT_LAYER_VERSION, classify_pages, extract_text, page_runs  # noqa: E402
+
+RAW_DIR = ROOT / "data" / "parsed" / "raw"
+
+# Which document of a subject/year becomes <year>.md; the rest get a suffix.
+# Solved papers first, matching what data/parsed/raw has always held.
+KIND_ORDER = ["BoardPaper_Solutions", "BoardPaper", "SamplePaper", "MarkingScheme"]
+
+# PdfPipelineOptions we set explicitly; part of the conversion cache key, so
+# changing one here reconverts everything on the next run.
+PIPELINE_SETTINGS = {"do_ocr": True, "do_table_structure": True}
+
+log = logging.getLogger("convert_papers")
+
+
+# ---------------------------------------------------------------------------
+# Finding papers
+# ---------------------------------------------------------------------------
+def subject_slug(subject: str) -> str:
+    """"Computer Science" -> "computer-science", the data/parsed/raw directory names."""
+    return re.sub(r"[^a-z0-9]+", "-", subject.lower()).strip("-")
+
+
+def make_task(pdf: Path, subject: str, year: int | None, kind: str, sha256: str | None = None) -> dict:
+    return {"pdf": str(pdf), "subject": subject, "year": year, "kind": kind or "", "sha256": sha256}
+
+
+def scan_downloads(download_dir: Path) -> list[dict]:
+    """Every finished PDF under `download_dir` (skipping the blob store and .part files)."""
+    tasks = []
+    for pdf in sorted(download_dir.rglob("*.pdf")):
+        rel = pdf.relative_to(download_dir)
+        if rel.parts[0].startswith("."):
+            continue
+        subject, year, kind = describe_path(rel.as_posix())
+        tasks.append(make_task(pdf, subject, year, kind))
+    return tasks
+
+
+def read_manifest(manifest_file: Path, download_dir: Path) -> list[dict]:
+    """One task per unique PDF in the scraper's manifest; byte-identical copies are converted once."""
+    import sqlite3
+
+    conn = sqlite3.connect(f"file:{manifest_file}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT path, sha256, subject, year, kind FROM files ORDER BY path").fetchall()
+    finally:
+        conn.close()
+    tasks, seen = [], set()
+    for path, sha256, subject, year, kind in rows:
+        pdf = download_dir / path
+        if sha256 in seen or not pdf.exists():
+            continue
+        seen.add(sha256)
+        tasks.append(make_task(pdf, subject, year, kind, sha256))
+    return tasks
+
+
+def _document_slug(pdf: Path, subject: str, year: int) -> str:
+    """Physics_BoardPaper_2024_Set2.pdf -> "boardpaper-set2"."""
+    stem = re.sub(re.escape(subject), " ", pdf.stem, flags=re.IGNORECASE)
+    stem = re.sub(rf"(?<!\d){year}(?!\d)", " ", stem)
+    return subject_slug(stem) or "document"
+
+
+def assign_outputs(tasks: list[dict], raw_dir: Path) -> list[dict]:
+    """Set task["output"]: <year>.md for the preferred document of each subject/year, <year>-<doc>.md for the rest."""
+    groups: dict[tuple, list[dict]] = {}
+    for task in tasks:
+        if task["year"] is None or not task["subject"]:
+            log.warning("  SKIP (no subject/year in path): %s", task["pdf"])
+            continue
+        groups.setdefault((subject_slug(task["subject"]), task["year"]), []).append(task)
+
+    assigned = []
+    for (slug, year), group in sorted(groups.items()):
+        group.sort(key=lambda t: (
+            KIND_ORDER.index(t["kind"]) if t["kind"] in KIND_ORDER else len(KIND_ORDER), t["pdf"]))
+        used = set()
+        for i, task in enumerate(group):
+            name = f"{year}.md" if i == 0 else f"{year}-{_document_slug(Path(task['pdf']), task['subject'], year)}.md"
+            n = 2
+            while name in used:
+                name = f"{year}-{_document_slug(Path(task['pdf']), task['subject'], year)}-{n}.md"
+                n += 1
+            used.add(name)
+            task["output"] = str(raw_dir / slug / name)
+            assigned.append(task)
+    return assigned
+
+
+def is_stale(task: dict) -> bool:
+    """True if the markdown is missing or older than its PDF."""
+    output = Path(task["output"])
+    return not output.exists() or output.stat().st_mtime < Path(task["pdf"]).stat().st_mtime
+
+
+def converter_options() -> dict:
+    """Everything that changes docling's output, for the conversion cache key."""
+    from importlib.metadata import version
+
+    return {"docling": version("docling"), **PIPELINE_SETTINGS}
+
+
+def apply_cache(tasks: list[dict], cache: ConversionCache, options: dict, write: bool = True) -> list[dict]:
+    """Write cached markdown for every task whose PDF bytes and options were converted before.
+
+    Returns the tasks that still need converting.
+    """
+    misses = []
+    for task in tasks:
+        task["sha256"] = task["sha256"] or file_sha256(Path(task["pdf"]))
+        hit = cache.get(task["sha256"], "docling", options)
+        if hit is None:
+            misses.append(task)
+            continue
+        output = Path(task["output"])
+        if write and (not output.exists() or output.read_text() != hit[0]):
+            write_markdown(output, hit[0])
+            log.info("  CACHED: %s -> %s", Path(task["pdf"]).name, output)
+    return misses
+
+
+# ---------------------------------------------------------------------------
+# Pool workers
+# ---------------------------------------------------------------------------
+_converter = None
+_init_error: str | None = None
+
+
+def build_converter(threads: int):
+    """A CPU-only docling converter using `threads` intra-op threads."""
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import AcceleratorDevice, AcceleratorOptions, PdfPipelineOptions
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    options = PdfPipelineOptions()
+    for name, value in PIPELINE_SETTINGS.items():
+        setattr(options, name, value)
+    options.accelerator_options = AcceleratorOptions(num_threads=threads, device=AcceleratorDevice.CPU)
+    converter = DocumentConverter(format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)})
+    # Load the layout/table models now rather than inside the first conversion.
+    converter.initialize_pipeline(InputFormat.PDF)
+    return converter
+
+
+def init_worker(threads: int, max_memory: int | None):
+    """Pool initializer: cap memory, pin thread counts, then import docling and load models once."""
+    global _converter, _init_error
+    if max_memory:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+    # torch/OpenMP read these at import time, so they must be set before docling is imported.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    t0 = time.perf_counter()
+    try:
+        _converter = build_converter(threads)
+    except Exception as e:
+        # Raising here would make the pool respawn the worker forever; fail its tasks instead.
+        _init_error = f"converter failed to load: {type(e).__name__}: {e}"
+        return
+    log.info("  worker %d ready in %.1fs", os.getpid(), time.perf_counter() - t0)
+
+
+def write_markdown(path: Path, markdown: str):
+    """Write via a temp file and rename, so a killed worker never leaves half a paper."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(markdown)
+    os.replace(tmp, path)
+
+
+def render(pdf: str, page_range: tuple[int, int] | None = None) -> dict:
+    """Convert one PDF (or pages `page_range`, 1-based inclusive) with this worker's converter.
+
+    Returns the markdown rather than writing it.
+    """
+    t0 = time.perf_counter()
+    result = {"pdf": pdf, "page_range": page_range, "pid": os.getpid(), "ok": False}
+    if _init_error:
+        result.update(error=_init_error, seconds=0.0)
+        return result
+    try:
+        if page_range:
+            document = _converter.convert(pdf, page_range=page_range).document
+        else:
+            document = _converter.convert(pdf).document
+        result.update(ok=True, markdown=document.export_to_markdown(), pages=document.num_pages())
+    except MemoryError:
+        result["error"] = "out of memory (raise --max-memory-gb or lower --threads)"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Page shards and ordered output
+# ---------------------------------------------------------------------------
+def page_count(pdf: Path) -> int | None:
+    try:
+        import pypdfium2
+    except ImportError:
+        return count_pdf_pages(pdf)
+    document = pypdfium2.PdfDocument(str(pdf))
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+def page_shards(pdf: Path, shard_pages: int | None) -> list[tuple[int, int] | None]:
+    """Page ranges of `shard_pages` pages covering `pdf`, or [None] (the whole file) if it is that short."""
+    pages = page_count(pdf) if shard_pages else None
+    if not pages or pages <= shard_pages:
+        return [None]
+    return [(first, min(first + shard_pages - 1, pages)) for first in range(1, pages + 1, shard_pages)]
+
+
+def plan_shards(pdf: Path, shard_pages: int | None, text_fast_path: bool) -> list[tuple[str, tuple | None]]:
+    """(kind, page range) units for one PDF: "layout" goes to docling, "text" to the text layer.
+
+    Without the fast path every unit is layout, as page_shards() splits it.
+    """
+    if text_fast_path:
+        try:
+            classes = classify_pages(pdf)
+        except Exception as e:
+            log.warning("  text layer unreadable, using docling throughout: %s — %s", pdf.name, e)
+        else:
+            # A PDF with no real text anywhere (all blank or scanned) is docling's job entirely.
+            if any(c["reason"] == "text layer" for c in classes):
+                return [(kind, (first, last)) for kind, first, last in page_runs(classes, shard_pages)]
+    return [("layout", shard) for shard in page_shards(pdf, shard_pages)]
+
+
+def _shard_label(shard: tuple[str, tuple | None]) -> str:
+    kind, pages = shard
+    where = f"pages {pages[0]}-{pages[1]}" if pages else "whole file"
+    return f"{where}, text layer" if kind == "text" else where
+
+
+class PaperWriter:
+    """Streams one paper's shards into `<output>.part` in page order, then renames it into place.
+
+    A shard is written as soon as every shard before it has been; later
+    shards that finish first wait in memory.
+    """
+
+    def __init__(self, task: dict, shards: list):
+        self.task = task
+        self.shards = shards
+        self.output = Path(task["output"])
+        self.part = self.output.with_name(self.output.name + ".part")
+        self.ready: dict[int, str] = {}
+        self.next = 0
+        self.attempts = [0] * len(shards)
+        self.failed = False
+        self.seconds = 0.0
+        self.pages = 0
+        self.text_pages = 0
+        self.file = None
+
+    def add(self, index: int, markdown: str) -> bool:
+        """Record shard `index`; returns True once the whole paper is written."""
+        self.ready[index] = markdown
+        if self.file is None:
+            self.output.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.part, "w")
+        while self.next in self.ready:
+            if self.next:
+                self.file.write("\n\n")
+            self.file.write(self.ready.pop(self.next))
+            self.file.flush()
+            self.next += 1
+        if self.next < len(self.shards):
+            return False
+        self.file.close()
+        os.replace(self.part, self.output)
+        return True
+
+    def abandon(self):
+        """Stop after a shard failed for good; the contiguous prefix stays in `.part` for inspection."""
+        self.failed = True
+        if self.file is not None:
+            self.file.close()
+
+
+def _executor(workers: int, threads: int, max_memory: int | None, max_tasks: int | None) -> ProcessPoolExecutor:
+    # spawn, not fork: workers must not inherit the parent's threads or import state.
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=init_worker, initargs=(threads, max_memory),
+                               max_tasks_per_child=max_tasks)
+
+
+def convert_all(tasks: list[dict], workers: int, threads: int, max_memory: int | None = None,
+                max_tasks: int | None = None, cache: ConversionCache | None = None,
+                options: dict | None = None, shard_pages: int | None = None,
+                retries: int = 1, text_fast_path: bool = False) -> list[dict]:
+    """Convert `tasks` on a pool of warm workers and write each paper's markdown.
+
+    Papers go largest first to shorten the tail. With `shard_pages`, each
+    paper is split into page ranges converted in parallel and streamed to its
+    output in order; a failed range (or whole paper) is retried up to
+    `retries` times on its own. With `text_fast_path`, pages whose text
+    layer is usable are extracted directly in this process and only the rest
+    go to docling. Finished papers are stored in `cache` (if given) under
+    `options`.
+    """
+    tasks = sorted(tasks, key=lambda t: Path(t["pdf"]).stat().st_size, reverse=True)
+    units: deque[tuple[PaperWriter, int]] = deque()
+    for task in tasks:
+        writer = PaperWriter(task, plan_shards(Path(task["pdf"]), shard_pages, text_fast_path))
+        units.extend((writer, i) for i in range(len(writer.shards)))
+
+    results = []
+    executor = _executor(workers, threads, max_memory, max_tasks)
+    pending: dict = {}
+
+    def finish(writer: PaperWriter, error: str | None = None):
+        result = {"pdf": writer.task["pdf"], "output": str(writer.output), "ok": error is None,
+                  "seconds": writer.seconds, "pages": writer.pages, "text_pages": writer.text_pages,
+                  "shards": len(writer.shards),
+                  "retries": sum(writer.attempts) - sum(kind == "layout" for kind, _ in writer.shards)}
+        name = Path(writer.task["pdf"]).name
+        if error is None:
+            markdown = writer.output.read_text()
+            result["chars"] = len(markdown)
+            if cache is not None and writer.task["sha256"]:
+                cache.put(writer.task["sha256"], "docling", options, markdown,
+                          {"pages": writer.pages, "seconds": writer.seconds, "pdf": writer.task["pdf"]})
+            log.info("  [%d/%d] OK: %s -> %s  (%.1fs, %d chars)", len(results) + 1, len(tasks), name,
+                     writer.output, writer.seconds, result["chars"])
+        else:
+            result["error"] = error
+            log.warning("  [%d/%d] FAIL: %s — %s", len(results) + 1, len(tasks), name, error)
+        results.append(result)
+
+    try:
+        while units or pending:
+            # Only a couple of units per worker in flight, so the first papers'
+            # shards finish (and stream out) before later papers start.
+            while units and len(pending) < 2 * workers:
+                writer, i = units.popleft()
+                if writer.failed:
+                    continue
+                kind, pages = writer.shards[i]
+                if kind == "text":
+                    try:
+                        t0 = time.perf_counter()
+                        markdown = extract_text(Path(writer.task["pdf"]), *pages)
+                    except Exception as e:
+                        log.info("  text layer failed, using docling: %s (%s) — %s",
+                                 Path(writer.task["pdf"]).name, _shard_label(writer.shards[i]), e)
+                        writer.shards[i] = ("layout", pages)
+                        units.appendleft((writer, i))
+                        continue
+                    writer.seconds += time.perf_counter() - t0
+                    writer.pages += pages[1] - pages[0] + 1
+                    writer.text_pages += pages[1] - pages[0] + 1
+                    if writer.add(i, markdown):
+                        finish(writer)
+                    continue
+                writer.attempts[i] += 1
+                future = executor.submit(render, writer.task["pdf"], pages)
+                pending[future] = (writer, i, executor)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                writer, i, submitted_to = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # A worker died outright (e.g. killed by the OOM killer); start a fresh pool.
+                    result = {"ok": False, "error": "worker process died", "seconds": 0.0}
+                    if submitted_to is executor:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = _executor(workers, threads, max_memory, max_tasks)
+                if writer.failed:
+                    continue
+                writer.seconds += result["seconds"]
+                label = _shard_label(writer.shards[i])
+                if result["ok"]:
+                    writer.pages += result.get("pages") or 0
+                    if writer.add(i, result["markdown"]):
+                        finish(writer)
+                elif writer.attempts[i] <= retries:
+                    log.info("  RETRY: %s (%s) — %s", Path(writer.task["pdf"]).name, label, result["error"])
+                    units.appendleft((writer, i))
+                else:
+                    writer.abandon()
+                    finish(writer, f"{label}: {result['error']}")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Convert downloaded CBSE papers to markdown with docling")
+    parser.add_argument(
+        "--download-dir", type=Path, default=DOWNLOAD_DIR,
+        help=f"the scraper's download directory (default: {DOWNLOAD_DIR})",
+    )
+    parser.add_argument(
+        "--manifest", action="store_true",
+        help="take papers from the download dir's manifest.sqlite instead of walking it (skips duplicates)",
+    )
+    parser.add_argument(
+        "--pdf", type=Path, action="append",
+        help="convert this PDF instead of the downloads (repeatable); written to <output-dir>/<name>.md",
+    )
+    parser.add_argument("--output-dir", type=Path, default=RAW_DIR, help=f"(default: {RAW_DIR})")
+    parser.add_argument("--subject", action="append", help="only this subject (repeatable)")
+    parser.add_argument("--year", type=int, action="append", help="only this year (repeatable)")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="converter processes (default: cores / --threads)",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=2,
+        help="torch/OpenMP threads per worker (default: 2)",
+    )
+    parser.add_argument(
+        "--max-memory-gb", type=float, default=None,
+        help="address-space cap per worker; a paper that exceeds it fails instead of swapping the box",
+    )
+    parser.add_argument(
+        "--max-tasks-per-worker", type=int, default=None,
+        help="recycle each worker (reloading models) after this many papers",
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=CACHE_DIR,
+        help=f"conversion cache keyed by PDF content and docling settings (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size-gb", type=float, default=CACHE_MAX_BYTES / 1024 ** 3,
+        help=f"evict least-recently-used cache entries beyond this (default: {CACHE_MAX_BYTES / 1024 ** 3:g})",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="don't use the cache; convert papers whose markdown is missing or older than the PDF",
+    )
+    parser.add_argument(
+        "--shard-pages", type=int, default=None,
+        help="split each PDF into ranges of this many pages, converted in parallel and written in order",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=1,
+        help="times to retry a failed page range (or paper) before giving up on it (default: 1)",
+    )
+    parser.add_argument(
+        "--text-fast-path", action="store_true",
+        help="take pages with a usable embedded text layer straight from it; docling only gets the rest",
+    )
+    parser.add_argument("--force", action="store_true", help="reconvert everything, ignoring the cache")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be converted and exit")
+    args = parser.parse_args(argv)
+
+    threads = max(1, args.threads)
+    workers = args.workers or max(1, cores // threads)
+    max_memory = int(args.max_memory_gb * 1024 ** 3) if args.max_memory_gb else None
+
+    if args.pdf:
+        tasks = []
+        for pdf in args.pdf:
+            task = make_task(pdf.resolve(), "", None, "")
+            task["output"] = str(args.output_dir / f"{pdf.stem}.md")
+            tasks.append(task)
+    elif args.manifest:
+        manifest_file = args.download_dir / MANIFEST_FILE.name
+        if not manifest_file.exists():
+            parser.error(f"no manifest at {manifest_file}")
+        tasks = read_manifest(manifest_file, args.download_dir)
+    else:
+        tasks = scan_downloads(args.download_dir)
+    if args.subject:
+        wanted = {subject_slug(s) for s in args.subject}
+        tasks = [t for t in tasks if subject_slug(t["subject"]) in wanted]
+    if args.year:
+        tasks = [t for t in tasks if t["year"] in args.year]
+    if not args.pdf:
+        tasks = assign_outputs(tasks, args.output_dir)
+
+    cache = options = None
+    if args.no_cache:
+        todo = tasks if args.force else [t for t in tasks if is_stale(t)]
+    else:
+        if importlib.util.find_spec("docling") is None:
+            parser.error("docling is not installed (pip install docling)")
+        cache = ConversionCache(args.cache_dir, int(args.cache_size_gb * 1024 ** 3))
+        options = converter_options()
+        if args.shard_pages:
+            # Page ranges convert without each other's context, so the output can differ.
+            options["shard_pages"] = args.shard_pages
+        if args.text_fast_path:
+            options["text_layer"] = TEXT_LAYER_VERSION
+        todo = tasks if args.force else apply_cache(tasks, cache, options, write=not args.dry_run)
+        for task in todo:
+            task["sha256"] = task["sha256"] or file_sha256(Path(task["pdf"]))
+
+    log.info("Found %d papers, %d to convert", len(tasks), len(todo))
+    if args.dry_run:
+        for task in todo:
+            log.info("  %s -> %s", task["pdf"], task["output"])
+        return
+    if not todo:
+        return
+    if importlib.util.find_spec("docling") is None:
+        parser.error("docling is not installed (pip install docling)")
+
+    log.info("Workers: %d x %d threads%s", workers, threads,
+             f", {args.max_memory_gb:g} GB cap each" if max_memory else "")
+    t0 = time.perf_counter()
+    results = convert_all(todo, workers, threads, max_memory, args.max_tasks_per_worker,
+                          cache, options, args.shard_pages, args.retries, args.text_fast_path)
+    wall = time.perf_counter() - t0
+
+    ok = [r for r in results if r["ok"]]
+    log.info("Converted %d/%d papers in %.1fs (%.1f s/paper of converter time, %d failed)",
+             len(ok), len(results), wall, sum(r["seconds"] for r in ok) / max(len(ok), 1),
+             len(results) - len(ok))
+    if args.text_fast_path:
+        pages = sum(r["pages"] for r in ok)
+        text_pages = sum(r["text_pages"] for r in ok)
+        log.info("Text layer: %d/%d pages (%.0f%%) skipped docling", text_pages, pages,
+                 100 * text_pages / max(pages, 1))
+    stats_file = args.output_dir / "conversion_stats.json"
+    stats_file.parent.mkdir(parents=True, exist_ok=True)
+    stats_file.write_text(json.dumps({"wall_seconds": wall, "workers": workers, "threads": threads,
+                                      "results": results}, indent=2))
+    if len(ok) < len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
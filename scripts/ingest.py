@@ -0,0 +1,560 @@
+"""
+End-to-end ingestion: download, unzip, convert and write papers as one pipeline.
+
+Running scraper.py and then convert_papers.py leaves the CPU idle while the
+network works and the network idle while docling works. Here the four steps
+are overlapping stages joined by bounded queues, each with its own
+concurrency:
+
+  download  the scraper's job queue on --workers threads (per-host limits and
+            token buckets as usual). cbse.gov.in ZIPs are only spooled here
+            and handed on, so a download slot is not held for extraction;
+  unzip     --zip-workers threads stream archive members into the blob store
+            (or fetch the bare PDF of an empty archive), and only then is
+            the cbse.gov.in job marked done in the job queue;
+  convert   a dispatcher feeding docling on a --convert-workers process pool
+            (the warm workers of convert_papers.py), at most two papers per
+            worker in flight; papers already in the conversion cache skip it;
+  write     one thread writing data/parsed/raw markdown and the cache entry.
+
+A PDF enters the convert stage the moment the blob store lands it, so the
+first papers are converted while the rest are still downloading. Every
+queue is bounded (--queue-size): when conversion falls behind, downloads
+block instead of piling spooled archives or PDFs up on disk.
+
+Output names follow convert_papers.py (<year>.md for the preferred document
+of a subject/year, <year>-<document>.md for the rest). A preferred document
+that lands after another one of its subject/year takes <year>.md over, and
+the earlier file is renamed to its suffixed name.
+
+Usage:
+    python scripts/ingest.py                                   # everything, all cores
+    python scripts/ingest.py --source cbse_gov --convert-workers 4 --threads 2
+    python scripts/ingest.py --backlog      # also convert papers downloaded earlier
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import importlib.util
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "cbse_papers"))
+
+import scraper  # noqa: E402
+from conversion_cache import CACHE_DIR, CACHE_MAX_BYTES, ConversionCache  # noqa: E402
+from convert_papers import (  # noqa: E402
+    RAW_DIR, _executor, apply_cache, assign_outputs, converter_options, is_stale, make_task, render,
+    scan_downloads, subject_slug, write_markdown,
+)
+
+PLANNERS = {
+    "cbseacademic": scraper.plan_cbse_academic,
+    "cbse_gov": scraper.plan_cbse_gov,
+    "direct": scraper.plan_direct_links,
+    "selfstudys": scraper.plan_selfstudys,
+}
+DEFAULT_SOURCES = ("cbseacademic", "cbse_gov", "selfstudys")     # what scraper.plan_all() runs
+QUEUE_SIZE = 16
+ZIP_WORKERS = 2
+PROGRESS_EVERY = 10.0            # seconds between queue-depth log lines
+
+log = logging.getLogger("ingest")
+
+
+class Stage:
+    """Items handled, busy time and peak queue depth of one pipeline stage."""
+
+    def __init__(self, name: str, workers: int, inbox: queue.Queue | None = None):
+        self.name = name
+        self.workers = workers
+        self.inbox = inbox
+        self.items = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.peak_depth = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def working(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(time.perf_counter() - t0)
+
+    def add(self, seconds: float, failed: bool = False):
+        with self.lock:
+            self.items += 1
+            self.failed += failed
+            self.busy += seconds
+
+    def fail(self):
+        with self.lock:
+            self.failed += 1
+
+    def depth(self) -> int:
+        depth = self.inbox.qsize() if self.inbox is not None else 0
+        self.peak_depth = max(self.peak_depth, depth)
+        return depth
+
+    def summary(self, wall: float) -> dict:
+        return {"workers": self.workers, "items": self.items, "failed": self.failed,
+                "busy_seconds": round(self.busy, 2),
+                "utilization": round(self.busy / (wall * self.workers), 3) if wall else 0.0,
+                "peak_queue": self.peak_depth}
+
+
+class Pipeline:
+    """The unzip, convert and write stages; downloads are fed in by scraper.run_jobs().
+
+    Call start(), register landed() as a blob store listener and use
+    run_gov_job() as the cbse_gov job handler, run the downloads, then
+    finish() drains the remaining stages in order.
+    """
+
+    def __init__(self, raw_dir: Path, convert_workers: int, threads: int, zip_workers: int = ZIP_WORKERS,
+                 queue_size: int = QUEUE_SIZE, cache: ConversionCache | None = None,
+                 options: dict | None = None, max_memory: int | None = None,
+                 max_tasks: int | None = None, retries: int = 1):
+        self.raw_dir = raw_dir
+        self.convert_workers = convert_workers
+        self.threads = threads
+        self.max_memory = max_memory
+        self.max_tasks = max_tasks
+        self.cache = cache
+        self.options = options
+        self.retries = retries
+
+        self.archives: queue.Queue = queue.Queue(queue_size)    # (job, spool, resp, started, future)
+        self.pdfs: queue.Queue = queue.Queue(queue_size)        # tasks
+        self.outcomes: queue.Queue = queue.Queue()              # (task, future | result); bounded by slots
+        self.slots = threading.Semaphore(2 * convert_workers)
+        self.backlog: deque = deque()                           # backlog and retries, ahead of new PDFs
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.names = threading.Lock()                           # output assignment and writes
+        self.groups: dict[tuple, dict[str, dict]] = {}          # (slug, year) -> {pdf: task}
+        self.results: list[dict] = []
+        self.executor = None
+        self.threads_started: dict[str, list[threading.Thread]] = {}
+        self.stopped = threading.Event()
+        self.stages = {
+            "download": Stage("download", 0),
+            "unzip": Stage("unzip", zip_workers, self.archives),
+            "convert": Stage("convert", convert_workers, self.pdfs),
+            "write": Stage("write", 1, self.outcomes),
+        }
+
+    # -- setup ---------------------------------------------------------------
+    def seed(self, tasks: list[dict]) -> list[dict]:
+        """Register papers already on disk, so output names account for them. Returns them named."""
+        tasks = assign_outputs(tasks, self.raw_dir)
+        for task in tasks:
+            self.groups.setdefault((subject_slug(task["subject"]), task["year"]), {})[task["pdf"]] = task
+        return tasks
+
+    def start(self):
+        self.executor = _executor(self.convert_workers, self.threads, self.max_memory, self.max_tasks)
+        for name, target, count in (("unzip", self._unzip, self.stages["unzip"].workers),
+                                    ("convert", self._dispatch, 1), ("write", self._write, 1),
+                                    ("progress", self._progress, 1)):
+            self.threads_started[name] = [
+                threading.Thread(target=target, name=f"{name}-{i}", daemon=True) for i in range(count)]
+            for thread in self.threads_started[name]:
+                thread.start()
+
+    def finish(self):
+        """Wait for every queued archive and paper to be written, stage by stage."""
+        for _ in self.threads_started["unzip"]:
+            self.archives.put(None)
+        for thread in self.threads_started["unzip"]:
+            thread.join()
+        self.pdfs.put(None)
+        for name in ("convert", "write"):
+            for thread in self.threads_started[name]:
+                thread.join()
+        self.stopped.set()
+
+    def abort(self):
+        self.stopped.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # -- download stage hooks ------------------------------------------------
+    def timed(self, handler):
+        """Wrap a scraper job handler so its time counts towards the download stage."""
+        def run(job: dict) -> bool:
+            with self.stages["download"].working():
+                return handler(job)
+        return run
+
+    def landed(self, dest: Path, digest: str):
+        """Blob store listener: queue a freshly landed PDF for conversion (blocks when the queue is full)."""
+        try:
+            rel = dest.relative_to(scraper.DOWNLOAD_DIR)
+        except ValueError:
+            return
+        subject, year, kind = scraper.describe_path(rel.as_posix())
+        task = make_task(dest, subject, year, kind, digest)
+        task["landed"] = time.monotonic()
+        self.pdfs.put(task)
+
+    def run_gov_job(self, job: dict):
+        """cbse_gov handler: spool the ZIP and hand it to the unzip stage; else the bare PDF.
+
+        A spooled ZIP makes this return a Future that the unzip stage
+        resolves, so the job is only finished, and the ZIP's validators only
+        recorded, once its papers are extracted: an archive still queued
+        when the run stops is fetched in full again on resume.
+        """
+        started = time.time()
+        year, subject, gov_name = job["year"], job["subject"], job["payload"]["gov_name"]
+        try:
+            status, spool, resp = scraper.spool_gov_paper(year, subject, gov_name)
+            if status == 304:
+                return True
+            if spool is None:
+                return scraper.gov_job_result(job, scraper.unpack_gov_paper(year, subject, gov_name, None), started)
+        except scraper.DocumentMissing:
+            raise
+        except Exception as e:
+            log.warning("  ERROR: %s %d — %s", subject, year, e)
+            return scraper.gov_job_result(job, False, started)
+        future = Future()
+        self.archives.put((job, spool, resp, started, future))
+        return future
+
+    # -- unzip stage ---------------------------------------------------------
+    def _unzip(self):
+        while (item := self.archives.get()) is not None:
+            job, spool, resp, started, future = item
+            stage = self.stages["unzip"]
+            with stage.working():
+                try:
+                    ok = scraper.unpack_gov_paper(job["year"], job["subject"], job["payload"]["gov_name"], spool, resp)
+                    if not ok:
+                        stage.fail()
+                    future.set_result(scraper.gov_job_result(job, ok, started))
+                except Exception as e:
+                    stage.fail()
+                    log.warning("  ERROR: %s %d — %s", job["subject"], job["year"], e)
+                    future.set_exception(e)
+
+    # -- convert stage -------------------------------------------------------
+    def _place(self, task: dict) -> bool:
+        """Give `task` its output name, renaming files of its subject/year that it displaces."""
+        if task["year"] is None or not task["subject"]:
+            log.warning("  SKIP (no subject/year in path): %s", task["pdf"])
+            return False
+        with self.names:
+            group = self.groups.setdefault((subject_slug(task["subject"]), task["year"]), {})
+            before = {pdf: Path(t["output"]) for pdf, t in group.items()}
+            group[task["pdf"]] = task
+            assign_outputs(list(group.values()), self.raw_dir)
+            moves = [(before[pdf], Path(t["output"])) for pdf, t in group.items()
+                     if pdf in before and before[pdf] != Path(t["output"]) and before[pdf].exists()]
+            # Through temporary names, in case two files swap places.
+            staged = []
+            for old, new in moves:
+                tmp = old.with_name(old.name + ".move")
+                os.replace(old, tmp)
+                staged.append((tmp, old, new))
+            for tmp, old, new in staged:
+                os.replace(tmp, new)
+                log.info("  RENAMED: %s -> %s", old.name, new.name)
+        return True
+
+    def _next_task(self, upstream_done: bool):
+        """The next task to convert, None to stop, or False if nothing is ready yet."""
+        if self.backlog:
+            return self.backlog.popleft()
+        if upstream_done:
+            with self.lock:
+                idle = self.in_flight == 0
+            if idle and not self.backlog:
+                return None
+        try:
+            return self.pdfs.get(timeout=0.5)
+        except queue.Empty:
+            return False
+
+    def _dispatch(self):
+        upstream_done = False
+        while not self.stopped.is_set():
+            task = self._next_task(upstream_done)
+            if task is None:
+                if upstream_done:
+                    break
+                upstream_done = True
+                continue
+            if task is False:
+                continue
+            task.setdefault("landed", time.monotonic())
+            task.setdefault("attempts", 0)
+            try:
+                if task["attempts"] == 0 and not self._place(task):
+                    continue
+            except OSError as e:
+                log.warning("  ERROR naming %s — %s", Path(task["pdf"]).name, e)
+                continue
+            self.slots.acquire()
+            with self.lock:
+                self.in_flight += 1
+            try:
+                hit = None
+                if self.cache is not None and task["attempts"] == 0:
+                    hit = self.cache.get(task["sha256"], "docling", self.options)
+                if hit is not None:
+                    self.outcomes.put((task, {"ok": True, "markdown": hit[0], "cached": True, "seconds": 0.0}))
+                    continue
+                task["attempts"] += 1
+                try:
+                    future = self.executor.submit(render, task["pdf"])
+                except BrokenProcessPool:
+                    # A worker died outright (e.g. killed by the OOM killer); start a fresh pool.
+                    self.executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = _executor(self.convert_workers, self.threads, self.max_memory, self.max_tasks)
+                    future = self.executor.submit(render, task["pdf"])
+                future.add_done_callback(lambda f, t=task: self.outcomes.put((t, f)))
+            except Exception as e:
+                log.warning("  ERROR: %s — %s", Path(task["pdf"]).name, e)
+                self.outcomes.put((task, {"ok": False, "error": f"{type(e).__name__}: {e}", "seconds": 0.0,
+                                          "final": True}))
+        self.executor.shutdown(wait=True)
+        self.outcomes.put(None)
+
+    # -- write stage ---------------------------------------------------------
+    def _write(self):
+        while (item := self.outcomes.get()) is not None:
+            task, outcome = item
+            try:
+                with self.stages["write"].working():
+                    self._handle(task, outcome)
+            except Exception as e:
+                log.warning("  ERROR writing %s — %s", task.get("output"), e)
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+                self.slots.release()
+
+    def _handle(self, task: dict, outcome):
+        if isinstance(outcome, dict):
+            result = outcome
+        else:
+            try:
+                result = outcome.result()
+            except BrokenProcessPool:
+                result = {"ok": False, "error": "worker process died", "seconds": 0.0}
+        cached = result.get("cached", False)
+        if not cached:
+            self.stages["convert"].add(result["seconds"], failed=not result["ok"])
+        name = Path(task["pdf"]).name
+        if not result["ok"] and task["attempts"] <= self.retries and not result.get("final"):
+            log.info("  RETRY: %s — %s", name, result["error"])
+            self.backlog.append(task)
+            return
+
+        entry = {"pdf": task["pdf"], "output": task["output"], "ok": result["ok"], "cached": cached,
+                 "seconds": result["seconds"], "attempts": task["attempts"],
+                 "latency": time.monotonic() - task["landed"]}
+        if result["ok"]:
+            with self.names:
+                output = Path(task["output"])
+                if not cached or not output.exists() or output.read_text() != result["markdown"]:
+                    write_markdown(output, result["markdown"])
+            entry["output"], entry["chars"] = str(output), len(result["markdown"])
+            if self.cache is not None and not cached:
+                self.cache.put(task["sha256"], "docling", self.options, result["markdown"],
+                               {"pages": result.get("pages"), "seconds": result["seconds"], "pdf": task["pdf"]})
+            log.info("  [%d] %s: %s -> %s  (%.1fs converting, %.1fs after landing)", len(self.results) + 1,
+                     "CACHED" if cached else "OK", name, output, result["seconds"], entry["latency"])
+        else:
+            entry["error"] = result["error"]
+            log.warning("  [%d] FAIL: %s — %s", len(self.results) + 1, name, result["error"])
+        self.results.append(entry)
+
+    # -- reporting -----------------------------------------------------------
+    def _progress(self):
+        while not self.stopped.wait(PROGRESS_EVERY):
+            with self.lock:
+                in_flight = self.in_flight
+            log.info("  queues: archives %d, pdfs %d, converting %d/%d, written %d",
+                     self.stages["unzip"].depth(), self.stages["convert"].depth(), in_flight,
+                     2 * self.convert_workers, len(self.results))
+
+    def summary(self, wall: float) -> dict:
+        return {"wall_seconds": round(wall, 2),
+                "stages": {name: stage.summary(wall) for name, stage in self.stages.items()},
+                "results": self.results}
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Download and convert CBSE papers as one pipeline")
+    parser.add_argument(
+        "--download-dir", type=Path, default=scraper.DOWNLOAD_DIR,
+        help=f"where papers, caches and the manifest live (default: {scraper.DOWNLOAD_DIR})",
+    )
+    parser.add_argument("--output-dir", type=Path, default=RAW_DIR, help=f"(default: {RAW_DIR})")
+    parser.add_argument(
+        "--source", choices=sorted(PLANNERS), action="append",
+        help=f"only this source (repeatable; default: {', '.join(DEFAULT_SOURCES)})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=scraper.MAX_WORKERS,
+        help=f"concurrent download jobs (default: {scraper.MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--browser-pages", type=int, default=scraper.BROWSER_PAGES,
+        help=f"concurrent Playwright pages per selfstudys.com job (default: {scraper.BROWSER_PAGES})",
+    )
+    parser.add_argument(
+        "--zip-workers", type=int, default=ZIP_WORKERS,
+        help=f"threads extracting cbse.gov.in archives (default: {ZIP_WORKERS})",
+    )
+    parser.add_argument(
+        "--convert-workers", type=int, default=None,
+        help="docling converter processes (default: cores / --threads)",
+    )
+    parser.add_argument("--threads", type=int, default=2, help="torch/OpenMP threads per converter (default: 2)")
+    parser.add_argument(
+        "--queue-size", type=int, default=QUEUE_SIZE,
+        help=f"spooled archives / landed PDFs allowed to wait between stages (default: {QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--max-memory-gb", type=float, default=None,
+        help="address-space cap per converter process",
+    )
+    parser.add_argument(
+        "--max-tasks-per-worker", type=int, default=None,
+        help="recycle each converter (reloading models) after this many papers",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=1,
+        help="times to retry a failed conversion before giving up on it (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=CACHE_DIR,
+        help=f"conversion cache keyed by PDF content and docling settings (default: {CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size-gb", type=float, default=CACHE_MAX_BYTES / 1024 ** 3,
+        help=f"evict least-recently-used cache entries beyond this (default: {CACHE_MAX_BYTES / 1024 ** 3:g})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="convert every landed PDF, bypassing the cache")
+    parser.add_argument(
+        "--backlog", action="store_true",
+        help="also convert papers already downloaded whose markdown is missing or out of date",
+    )
+    parser.add_argument(
+        "--fresh", action="store_true",
+        help="plan a new download run even if the previous one did not finish",
+    )
+    args = parser.parse_args(argv)
+    if importlib.util.find_spec("docling") is None:
+        parser.error("docling is not installed (pip install docling)")
+
+    if args.download_dir != scraper.DOWNLOAD_DIR:
+        scraper.use_download_dir(args.download_dir.resolve())
+    download_dir = scraper.DOWNLOAD_DIR
+    download_dir.mkdir(parents=True, exist_ok=True)
+    scraper.configure_session(pool_maxsize=max(args.workers, 1))
+    threads = max(1, args.threads)
+    convert_workers = args.convert_workers or max(1, cores // threads)
+    max_memory = int(args.max_memory_gb * 1024 ** 3) if args.max_memory_gb else None
+
+    cache = options = None
+    if not args.no_cache:
+        cache = ConversionCache(args.cache_dir, int(args.cache_size_gb * 1024 ** 3))
+        options = converter_options()
+    pipeline = Pipeline(args.output_dir, convert_workers, threads, args.zip_workers, args.queue_size,
+                        cache, options, max_memory, args.max_tasks_per_worker, args.retries)
+    pipeline.stages["download"].workers = args.workers
+
+    existing = pipeline.seed(scan_downloads(download_dir))
+    if args.backlog:
+        todo = [t for t in existing if is_stale(t)] if cache is None else apply_cache(existing, cache, options)
+        pipeline.backlog.extend(todo)
+        log.info("Backlog: %d of %d downloaded papers to convert", len(todo), len(existing))
+
+    queue_file = download_dir / "ingest_jobs.sqlite"
+    jobs = scraper.JobQueue(queue_file)
+    unfinished = jobs.unfinished()
+    if unfinished and not args.fresh:
+        log.info("Resuming previous run: %d unfinished jobs", unfinished)
+        jobs.resume()
+    else:
+        sources = args.source or DEFAULT_SOURCES
+        planned = [job for source in sources
+                   for job in (PLANNERS[source](args.browser_pages) if source == "selfstudys"
+                               else PLANNERS[source]())]
+        jobs.start_run(planned)
+        log.info("Planned %d download jobs (%s)", len(planned), ", ".join(sources))
+    log.info("Stages: %d download threads, %d unzip threads, %d converters x %d threads, queues of %d",
+             args.workers, args.zip_workers, convert_workers, threads, args.queue_size)
+
+    t0 = time.perf_counter()
+    pipeline.start()
+    scraper.store.listeners.append(pipeline.landed)
+    try:
+        handlers = {**scraper.JOB_HANDLERS, "cbse_gov": pipeline.run_gov_job}
+        try:
+            scraper.run_jobs(jobs, args.workers,
+                             handlers={source: pipeline.timed(h) for source, h in handlers.items()})
+        finally:
+            scraper.save_state()
+        log.info("Downloads finished in %.1fs; draining unzip/convert/write", time.perf_counter() - t0)
+        pipeline.finish()
+    except KeyboardInterrupt:
+        pipeline.abort()
+        raise
+    finally:
+        scraper.store.listeners.remove(pipeline.landed)
+    wall = time.perf_counter() - t0
+
+    scraper.metrics.observe("run_seconds", wall)
+    scraper.record_pool_metrics()
+    scraper.metrics.write_json(scraper.METRICS_JSON)
+    scraper.metrics.write_prometheus(scraper.METRICS_PROM)
+    pruned = scraper.store.prune()
+    if pruned:
+        log.info("Pruned %d superseded PDFs from the store", pruned)
+
+    summary = pipeline.summary(wall)
+    summary["downloads"] = jobs.stats()
+    results = pipeline.results
+    ok = [r for r in results if r["ok"]]
+    converted = [r for r in ok if not r["cached"]]
+    log.info("Ingested %d/%d papers in %.1fs (%d converted, %d from cache, %d failed)",
+             len(ok), len(results), wall, len(converted), len(ok) - len(converted), len(results) - len(ok))
+    if converted:
+        latencies = sorted(r["latency"] for r in converted)
+        log.info("Landing -> markdown: median %.1fs, max %.1fs", latencies[len(latencies) // 2], latencies[-1])
+    for name, stage in summary["stages"].items():
+        log.info("  %-8s %4d items  %7.1fs busy  %3.0f%% of %d workers  peak queue %d", name,
+                 stage["items"], stage["busy_seconds"], 100 * stage["utilization"], stage["workers"],
+                 stage["peak_queue"])
+    stats_file = args.output_dir / "ingest_stats.json"
+    stats_file.parent.mkdir(parents=True, exist_ok=True)
+    stats_file.write_text(json.dumps(summary, indent=2))
+    log.info("Stats saved to %s", stats_file)
+    if len(ok) < len(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
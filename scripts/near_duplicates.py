@@ -0,0 +1,270 @@
+"""
+Near-duplicate question detection across years and sources (MinHash + LSH).
+
+CBSE reuses questions with small edits across years and sample papers, and
+several scraped sources overlap. Comparing every pair of questions grows
+quadratically; this finds repeats in near-linear time instead:
+
+  1. every question (and OR alternative) from data/parsed/raw is normalised
+     (lower-cased, whitespace collapsed, markdown emphasis dropped; LaTeX is
+     kept, since formulas are often the distinctive part) and cut into
+     character k-shingles, hashed with a vectorised rolling hash;
+  2. MinHash signatures for all questions are computed in batches as one
+     (shingles x permutations) NumPy array per batch, reduced per question
+     with np.minimum.reduceat;
+  3. signatures are split into bands; questions sharing a band hash with
+     another question of the same subject become candidate pairs, which are
+     verified by estimated Jaccard similarity and joined into clusters.
+
+Usage:
+    python scripts/near_duplicates.py
+    python scripts/near_duplicates.py --subject physics --threshold 0.6 --show 5
+    python scripts/near_duplicates.py --num-perm 256 --shingle 6 -o /tmp/dupes.json
+"""
+
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from parse_questions import RAW_DIR, iter_corpus
+
+log = logging.getLogger("near_duplicates")
+
+ROOT = Path(__file__).resolve().parent.parent
+OUTPUT_FILE = ROOT / "data" / "parsed" / "near_duplicates.json"
+
+NUM_PERM = 128
+SHINGLE = 5                     # characters per shingle
+THRESHOLD = 0.7                 # estimated Jaccard similarity that counts as a near-duplicate
+BATCH_SHINGLES = 1024           # shingles per MinHash batch: 1024 x 128 permutations x 8 bytes stays in cache
+MIN_CHARS = 60                  # shorter questions are skipped
+MAX_ALL_PAIRS = 64              # larger LSH buckets are verified against their first member only
+SEED = 1
+
+EMPHASIS_RE = re.compile(r"[*_#>`]+")
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return SPACE_RE.sub(" ", EMPHASIS_RE.sub(" ", text.lower())).strip()
+
+
+def shingle_hashes(text: str, k: int = SHINGLE) -> np.ndarray:
+    """Distinct 32-bit hashes of the k-byte shingles of `text` (the whole text if it is shorter)."""
+    data = np.frombuffer(text.encode(), dtype=np.uint8).astype(np.uint64)
+    if len(data) < k:
+        data = np.pad(data, (0, k - len(data)))
+    windows = np.lib.stride_tricks.sliding_window_view(data, k)
+    # Polynomial hash of each window (wrapping uint64 arithmetic), then a multiplicative mix to 32 bits.
+    powers = np.uint64(257) ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+    hashes = (windows * powers).sum(axis=1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return np.unique(hashes >> np.uint64(32))
+
+
+def permutations(num_perm: int, seed: int = SEED) -> tuple[np.ndarray, np.ndarray]:
+    """Odd multipliers and offsets for `num_perm` multiply-shift hash functions."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash(shingles: list[np.ndarray], num_perm: int = NUM_PERM, seed: int = SEED,
+            batch: int = BATCH_SHINGLES) -> np.ndarray:
+    """(documents x num_perm) uint32 MinHash signatures, computed a batch of documents at a time."""
+    a, b = permutations(num_perm, seed)
+    signatures = np.empty((len(shingles), num_perm), dtype=np.uint32)
+    sizes = np.array([len(s) for s in shingles])
+    ends = np.cumsum(sizes)
+    first = 0
+    while first < len(shingles):
+        # Whole documents per batch (at least one), up to `batch` shingles.
+        done = int(ends[first - 1]) if first else 0
+        last = max(first + 1, int(np.searchsorted(ends, done + batch, side="right")))
+        # Multiply-shift hashing h(x) = (a*x + b) mod 2^64 >> 32: wrapping uint64 arithmetic,
+        # no modulo, computed in place.
+        hashed = np.multiply.outer(np.concatenate(shingles[first:last]), a)
+        hashed += b
+        hashed >>= np.uint64(32)
+        starts = ends[first:last] - sizes[first:last] - done
+        signatures[first:last] = np.minimum.reduceat(hashed, starts, axis=0)
+        first = last
+    return signatures
+
+
+def choose_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm whose LSH S-curve turns closest to `threshold`."""
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def band_hashes(signatures: np.ndarray, bands: int, rows: int, seed: int = SEED) -> np.ndarray:
+    """(documents x bands) uint64 hash of each band's rows."""
+    mixers = np.random.default_rng(seed + 1).integers(1, 1 << 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    banded = signatures[:, :bands * rows].astype(np.uint64).reshape(len(signatures), bands, rows)
+    return (banded * mixers).sum(axis=2, dtype=np.uint64)
+
+
+def candidate_pairs(keys: np.ndarray) -> np.ndarray:
+    """(n, 2) index pairs of documents sharing a band hash in any band; `keys` is (documents x bands)."""
+    pairs = []
+    for band in keys.T if len(keys) else ():
+        order = np.argsort(band, kind="stable")
+        ordered = band[order]
+        starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+        lengths = np.diff(starts, append=len(order))
+        # Buckets of two, the common case, in one step; only larger buckets loop.
+        twos = starts[lengths == 2]
+        pairs.append(np.stack([order[twos], order[twos + 1]], axis=1))
+        for start, length in zip(starts[lengths > 2].tolist(), lengths[lengths > 2].tolist()):
+            group = order[start:start + length]
+            if length <= MAX_ALL_PAIRS:
+                i, j = np.triu_indices(len(group), k=1)
+                pairs.append(np.stack([group[i], group[j]], axis=1))
+            else:
+                pairs.append(np.stack([np.full(len(group) - 1, group[0]), group[1:]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.sort(np.concatenate(pairs), axis=1), axis=0)
+
+
+def clusters_from_pairs(n: int, pairs: np.ndarray) -> list[list[int]]:
+    """Connected components (of two or more) of the pair graph, by union-find."""
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs.tolist():
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    groups: dict[int, list[int]] = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def question_items(raw_dir: Path = RAW_DIR, subject: str | None = None):
+    """(id, subject, year, text) for every question and OR alternative in the corpus.
+
+    Questions with (almost) no text of their own, such as "Write the output
+    of the following:" with the code only in the answer, are left out: they
+    would all look alike.
+    """
+    for record in iter_corpus(raw_dir, subject=subject):
+        questions = [(record["id"], record)]
+        if alternative := record["alternativeQuestion"]:
+            questions.append((f"{record['id']}_or", alternative))
+        for qid, question in questions:
+            text = "\n".join([question["question"] or "", *(question["options"] or [])])
+            if len(normalize(text)) >= MIN_CHARS:
+                yield qid, record["subject"], record["year"], text
+
+
+def find_duplicates(items: list[tuple[str, str, int, str]], threshold: float = THRESHOLD,
+                    num_perm: int = NUM_PERM, k: int = SHINGLE) -> tuple[dict, dict]:
+    """Near-duplicate clusters per subject, and timings per stage."""
+    timings = {}
+    t0 = time.perf_counter()
+    shingles = [shingle_hashes(normalize(text), k) for _, _, _, text in items]
+    timings["shingle"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    signatures = minhash(shingles, num_perm)
+    timings["minhash"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    bands, rows = choose_bands(num_perm, threshold)
+    keys = band_hashes(signatures, bands, rows)
+    # Questions of different subjects never share a bucket.
+    subjects = {subject: n for n, subject in enumerate(sorted({subject for _, subject, _, _ in items}))}
+    subject_ids = np.array([subjects[subject] for _, subject, _, _ in items], dtype=np.uint64)
+    keys ^= subject_ids[:, None] * np.uint64(0x9E3779B97F4A7C15)
+    pairs = candidate_pairs(keys)
+    timings["lsh"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1) if len(pairs) else np.empty(0)
+    kept = pairs[similarity >= threshold]
+    groups = clusters_from_pairs(len(items), kept)
+    group_of = {m: g for g, members in enumerate(groups) for m in members}
+    edges: list[list[float]] = [[] for _ in groups]
+    for (i, _), score in zip(kept.tolist(), similarity[similarity >= threshold].tolist()):
+        edges[group_of[i]].append(score)
+    clusters: dict[str, list[dict]] = {}
+    for members, scores in zip(groups, edges):
+        # Score each member against the cluster's first (earliest) question.
+        head = members[0]
+        sims = (signatures[members] == signatures[head]).mean(axis=1)
+        subject = items[head][1]
+        clusters.setdefault(subject, []).append({
+            "size": len(members),
+            "years": sorted({items[m][2] for m in members}),
+            "min_similarity": round(min(scores), 3),
+            "max_similarity": round(max(scores), 3),
+            "questions": [{"id": items[m][0], "year": items[m][2], "similarity": round(float(s), 3)}
+                          for m, s in zip(members, sims)],
+        })
+    for subject_clusters in clusters.values():
+        subject_clusters.sort(key=lambda c: (-c["size"], -c["max_similarity"]))
+    timings["verify"] = time.perf_counter() - t0
+    timings["candidates"] = len(pairs)
+    timings["pairs"] = len(kept)
+    timings["bands"], timings["rows"] = bands, rows
+    return clusters, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions per subject with MinHash/LSH")
+    parser.add_argument("--raw-dir", type=Path, default=RAW_DIR, help=f"(default: {RAW_DIR})")
+    parser.add_argument("--subject", help="only this subject, e.g. physics")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"estimated Jaccard similarity to report (default: {THRESHOLD})")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM, help=f"MinHash permutations (default: {NUM_PERM})")
+    parser.add_argument("--shingle", type=int, default=SHINGLE, help=f"characters per shingle (default: {SHINGLE})")
+    parser.add_argument("-o", "--output", type=Path, default=OUTPUT_FILE, help=f"(default: {OUTPUT_FILE})")
+    parser.add_argument("--show", type=int, default=0, help="print the text of the N largest clusters per subject")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    items = list(question_items(args.raw_dir, args.subject))
+    loaded = time.perf_counter() - t0
+    clusters, timings = find_duplicates(items, args.threshold, args.num_perm, args.shingle)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "threshold": args.threshold, "num_perm": args.num_perm, "shingle": args.shingle,
+        "questions": len(items), "clusters": clusters,
+    }, indent=2))
+
+    log.info("%d questions: load %.2fs, shingle %.2fs, minhash %.2fs, lsh %.2fs (%d bands x %d rows, "
+             "%d candidate pairs), verify %.2fs (%d pairs >= %.2f)",
+             len(items), loaded, timings["shingle"], timings["minhash"], timings["lsh"], timings["bands"],
+             timings["rows"], timings["candidates"], timings["verify"], timings["pairs"], args.threshold)
+    texts = {qid: text for qid, _, _, text in items}
+    for subject, subject_clusters in sorted(clusters.items()):
+        repeated = sum(c["size"] for c in subject_clusters)
+        log.info("  %-17s %3d clusters, %4d questions", subject, len(subject_clusters), repeated)
+        for cluster in subject_clusters[:args.show]:
+            print(f"\n=== {subject}: {cluster['size']} questions, years {cluster['years']}, "
+                  f"similarity {cluster['min_similarity']}-{cluster['max_similarity']}")
+            for q in cluster["questions"]:
+                first = next((line for line in texts[q["id"]].splitlines() if line.strip()), "")
+                print(f"  {q['id']:<32} {q['similarity']:.2f}  {first[:90]}")
+    log.info("Wrote %s", args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)-8s  %(message)s", datefmt="%H:%M:%S")
+    sys.exit(main())
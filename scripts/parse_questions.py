@@ -0,0 +1,475 @@
+"""
+Streaming markdown -> JSON Lines question parser for data/parsed/raw.
+
+Turning a raw paper into structured questions used to take another LLM pass
+over the whole paper (structure-questions.ts). The raw markdown is regular
+enough to parse locally: `## Section X — N marks each`, `### Qn.` headings,
+`(a)`–`(d)` options, `**Answer:**` / `**Solution:**` blocks and `**OR**`
+alternatives. iter_questions() reads a paper line by line and yields one
+record at a time (holding at most the current question and the one before
+it, in case an OR alternative follows), in the structure-questions.ts shape
+plus "subject", "part", "issues" and "source".
+
+A run writes `data/parsed/questions/<subject>/<year>.jsonl` and only
+reparses papers whose SHA-256 (or the parser version) changed since the last
+run. Records the parser cannot make sense of carry "issues"; with
+--llm-fallback just those question blocks are sent to Claude, and the answers
+are kept in the conversion cache so a rerun costs nothing.
+
+Usage:
+    python scripts/parse_questions.py
+    python scripts/parse_questions.py --subject physics --year 2024 --force
+    python scripts/parse_questions.py --llm-fallback
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "cbse_papers"))
+
+from scraper import file_sha256  # noqa: E402
+from conversion_cache import ConversionCache  # noqa: E402
+
+log = logging.getLogger("parse_questions")
+
+RAW_DIR = ROOT / "data" / "parsed" / "raw"
+OUTPUT_DIR = ROOT / "data" / "parsed" / "questions"
+STATE_FILE = ".state.json"
+# Bump when the records this parser emits change, so every paper is reparsed.
+PARSER_VERSION = 2
+ALTERNATIVE_FIELDS = ("question", "options", "correctAnswer", "solution")
+
+MODEL = "claude-sonnet-4-6"
+MAX_TOKENS = 8192
+# Bump when FALLBACK_PROMPT changes meaning, so cached answers are not reused.
+PROMPT_VERSION = 1
+FALLBACK_PROMPT = """This is one question (with its answer and solution) from a solved CBSE Class 12 {subject} paper, in markdown. An automatic parser could not structure it: {issues}.
+
+Return ONLY valid JSON (no markdown fences, no extra text) with these keys:
+  "question": full question text, LaTeX preserved exactly
+  "options": ["(a) ...", "(b) ...", "(c) ...", "(d) ..."] for an MCQ, else null
+  "correctAnswer": the answer as stated, or "" if the paper gives none
+  "solution": the full solution/explanation text
+  "marks": integer marks, or null if not stated
+  "type": one of "mcq", "assertion-reasoning", "short-answer", "long-answer", "case-based", "fill-blank", "true-false", "coding"
+  "hasAlternative": true if an "OR" alternative question is included
+  "alternativeQuestion": {{"question", "options", "correctAnswer", "solution"}} for that alternative, else null
+
+---
+
+{markdown}"""
+
+SECTION_RE = re.compile(r"^##\s+Section\s+([A-Z0-9])\b(.*)$", re.IGNORECASE)
+QUESTION_RE = re.compile(r"^###\s+Q(\d+)\s*(?:\(\s*([a-z]|OR|Alternative)\s*\))?\.?(.*)$", re.IGNORECASE)
+HEADING_RE = re.compile(r"^#{1,3}\s")
+SUBHEADING_RE = re.compile(r"^####\s")
+MARKS_RE = re.compile(r"[\[(]?\s*(\d+)\s*marks?\b\s*[\])]?", re.IGNORECASE)
+OR_RE = re.compile(r"^\s*\*\*\s*OR\s*\*\*\s*$", re.IGNORECASE)
+LABEL_RE = re.compile(r"^\*\*(Answer|Solution|Answer\s*/\s*Solution|Answer\s*&\s*Solution)"
+                      r"\s*(?:\(([^)]*)\))?\s*:\*\*\s*(.*)$", re.IGNORECASE)
+OPTION_RE = re.compile(r"^\(([a-d])\)\s+(\S.*)$")
+RULE_RE = re.compile(r"^\s*-{3,}\s*$")
+MARKS_LINE_RE = re.compile(r"^\s*\**\s*[\[(]\s*(\d+)\s*marks?\s*[\])]\s*\**\s*$", re.IGNORECASE)
+
+
+def _segment() -> dict:
+    return {"question": [], "options": [], "answer": [], "solution": [], "marks": None}
+
+
+def _text(lines: list[str]) -> str:
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _finish_segment(seg: dict) -> dict:
+    """Join a segment's lines; (a)-(d) lines only count as options if all four are there in order."""
+    letters = [m.group(1) for m in map(OPTION_RE.match, seg["options"]) if m]
+    options = seg["options"] if letters == list("abcd") else None
+    question = seg["question"] if options else seg["question"] + seg["options"]
+    return {
+        "question": _text(question),
+        "options": [" ".join(option.split()) for option in options] if options else None,
+        "correctAnswer": _text(seg["answer"]),
+        "solution": _text(seg["solution"]),
+        "option_lines": len(letters),
+        "marks": seg["marks"],
+    }
+
+
+def parse_block(lines: list[str]) -> tuple[dict, dict | None, bool]:
+    """Split one question block into (main, alternative or None, ends with a dangling **OR**).
+
+    An `**OR**` line splits the block into the question and its alternative;
+    "(OR)"/"(Main)"-labelled answers and solutions are routed accordingly.
+    Case-based blocks with `####` sub-questions keep their internal ORs, which
+    choose between sub-parts rather than whole questions.
+    """
+    lines = list(lines)
+    while lines and (not lines[-1].strip() or RULE_RE.match(lines[-1])):
+        lines.pop()
+    # An **OR** closing the block means the next block is this question's alternative.
+    dangling = bool(lines) and bool(OR_RE.match(lines[-1]))
+    if dangling:
+        lines.pop()
+    case_based = any(SUBHEADING_RE.match(line) for line in lines)
+    main, alternative = _segment(), None
+    seg, field = main, "question"
+    in_option = False                   # the previous line was an option, so a following line continues it
+    for line in lines:
+        if RULE_RE.match(line):
+            continue
+        if field == "question" and (m := MARKS_LINE_RE.match(line)):
+            seg["marks"] = int(m.group(1))      # "**(2 Marks)**" on its own line
+            continue
+        if OR_RE.match(line) and not case_based:
+            if alternative is None:
+                alternative = seg = _segment()
+                field = "question"
+            else:
+                # A second **OR** separates the two solutions: back to the alternative's.
+                seg = alternative
+            in_option = False
+            continue
+        if m := LABEL_RE.match(line):
+            kind, label, rest = m.group(1).lower(), (m.group(2) or "").lower(), m.group(3)
+            if label == "or" or label.startswith("alternative"):
+                if alternative is None:
+                    alternative = _segment()
+                seg = alternative
+            elif label.startswith("main"):
+                seg = main
+            elif label:
+                rest = f"**({label})** {rest}".rstrip()
+            field, in_option = ("answer" if kind == "answer" else "solution"), False
+            if rest:
+                seg[field].append(rest)
+            continue
+        if field == "question":
+            if OPTION_RE.match(line.strip()):
+                seg["options"].append(line.strip())
+                in_option = True
+                continue
+            if in_option and line.strip():
+                seg["options"][-1] += " " + line.strip()
+                continue
+            in_option = False
+        seg[field].append(line)
+
+    return _finish_segment(main), alternative and _finish_segment(alternative), dangling
+
+
+def question_type(record: dict, subject: str) -> str:
+    text = record["question"]
+    lowered = text.lower()
+    if "#### " in text:
+        return "case-based"
+    if record["options"]:
+        return "assertion-reasoning" if "assertion" in lowered and "reason" in lowered else "mcq"
+    if "assertion" in lowered and "reason" in lowered:
+        return "assertion-reasoning"
+    if "case study" in lowered or "case-based" in lowered:
+        return "case-based"
+    if "____" in text or "fill in the blank" in lowered:
+        return "fill-blank"
+    if "true or false" in lowered or "true/false" in lowered:
+        return "true-false"
+    if subject == "computer-science" and ("```" in text or "```" in record["solution"]):
+        return "coding"
+    return "long-answer" if (record["marks"] or 0) >= 4 else "short-answer"
+
+
+def _issues(main: dict, marks: int | None) -> list[str]:
+    issues = []
+    if not main["question"]:
+        issues.append("no question text")
+    if not main["correctAnswer"] and not main["solution"]:
+        issues.append("no answer or solution")
+    if marks is None:
+        issues.append("unknown marks")
+    if not main["options"] and 0 < main["option_lines"] < 4 and marks == 1:
+        issues.append("incomplete options")
+    return issues
+
+
+def iter_questions(lines, subject: str, year: int):
+    """Yield question records from an iterable of markdown lines, one at a time, in paper order."""
+    section, section_marks = "", None
+    pending: dict | None = None        # finished record held back in case an OR alternative follows
+    head: dict | None = None           # heading fields of the block being read
+    body: list[str] = []
+    seen: set[tuple[str, int, str]] = set()
+    numbers: set[tuple[int, str]] = set()
+
+    def record_for(head: dict, body: list[str]):
+        main, alternative, dangling = parse_block(body)
+        marks = head["marks"] if head["marks"] is not None else main["marks"]
+        number = (head["number"], head["part"])
+        # Some papers restart numbering per section (or per C++/Python option); keep ids unique.
+        qid = f"q{head['number']}{head['part']}" if number not in numbers else \
+            f"{head['section'].lower()}_q{head['number']}{head['part']}"
+        record = {
+            "id": f"{subject}_{year}_{qid}",
+            "subject": subject, "year": year, "paperId": f"{subject}_{year}",
+            "questionNumber": head["number"], "part": head["part"], "section": head["section"],
+            "type": "", "question": main["question"], "options": main["options"],
+            "correctAnswer": main["correctAnswer"], "solution": main["solution"],
+            "marks": marks, "topic": None,
+            "hasAlternative": alternative is not None,
+            "alternativeQuestion": None,
+            "issues": _issues(main, marks),
+            "source": "parser",
+            "markdown": "\n".join(head["lines"] + body).strip(),
+        }
+        if head["title"]:
+            record["question"] = f"{head['title']}\n\n{record['question']}".strip()
+        if alternative:
+            record["alternativeQuestion"] = {k: alternative[k] for k in ALTERNATIVE_FIELDS}
+        record["type"] = question_type(record, subject)
+        key = (head["section"], head["number"], head["part"])
+        if key in seen and not head["alternative"]:
+            record["issues"].append("duplicate question number")
+        seen.add(key)
+        numbers.add(number)
+        return record, dangling
+
+    def attach(previous: dict, alternative: dict):
+        previous["hasAlternative"] = True
+        previous["alternativeQuestion"] = {k: alternative[k] for k in ALTERNATIVE_FIELDS}
+        previous["issues"] = sorted(set(previous["issues"]) | (set(alternative["issues"]) - {"duplicate question number"}))
+        previous["markdown"] += "\n\n**OR**\n\n" + alternative["markdown"]
+        if previous["part"] == "a":
+            # "Qn (a) OR Qn (b)" is one question with an alternative, not two parts.
+            previous["part"] = ""
+            previous["id"] = previous["id"][:-1]
+
+    def close():
+        """Turn the block being read into a record; returns a record that is ready to yield."""
+        nonlocal pending, head, body
+        if head is None:
+            return None
+        record, dangling = record_for(head, body)
+        is_alternative = head["alternative"] or (
+            pending is not None and pending.get("_or_follows")
+            and pending["questionNumber"] == record["questionNumber"])
+        head, body = None, []
+        if is_alternative and pending is not None and pending["questionNumber"] == record["questionNumber"]:
+            pending.pop("_or_follows", None)
+            attach(pending, record)
+            if dangling:
+                pending["_or_follows"] = True
+            return None
+        ready = pending
+        if ready is not None and ready.pop("_or_follows", None):
+            ready["issues"].append("OR without an alternative")
+        if is_alternative:
+            record["issues"].append("OR alternative without a question")
+        if dangling:
+            record["_or_follows"] = True
+        pending = record
+        return ready
+
+    for raw in lines:
+        line = raw.rstrip("\n")
+        if HEADING_RE.match(line):
+            ready = close()
+            if ready is not None:
+                yield ready
+            if m := SECTION_RE.match(line):
+                section = m.group(1).upper()
+                marks = MARKS_RE.search(m.group(2))
+                section_marks = int(marks.group(1)) if marks else None
+            elif m := QUESTION_RE.match(line):
+                part = (m.group(2) or "").lower()
+                tail = m.group(3)
+                marks = MARKS_RE.search(tail)
+                title = MARKS_RE.sub("", tail).strip(" .—-:*[]")
+                head = {
+                    "number": int(m.group(1)),
+                    "part": "" if part in ("or", "alternative") else part,
+                    "alternative": part in ("or", "alternative"),
+                    "section": section,
+                    "marks": int(marks.group(1)) if marks else section_marks,
+                    "title": title,
+                    "lines": [line],
+                }
+            elif line.startswith("## "):
+                section, section_marks = "", None
+            continue
+        if head is not None:
+            body.append(line)
+        elif pending is not None and OR_RE.match(line):
+            # "**OR**" between two question blocks: the next heading is the alternative.
+            pending["_or_follows"] = True
+    ready = close()
+    if ready is not None:
+        yield ready
+    if pending is not None:
+        if pending.pop("_or_follows", None):
+            pending["issues"].append("OR without an alternative")
+        yield pending
+
+
+def iter_paper(path: Path):
+    """Records for one `<subject>/<year>.md` paper, read lazily from disk."""
+    with open(path, encoding="utf-8") as f:
+        yield from iter_questions(f, path.parent.name, int(path.stem))
+
+
+def iter_corpus(raw_dir: Path = RAW_DIR, subject: str | None = None, year: int | None = None):
+    """Records for every paper under `raw_dir`, papers in subject/year order."""
+    for path in sorted(raw_dir.glob("*/*.md")):
+        if not path.stem.isdigit():
+            continue
+        if (subject and path.parent.name != subject) or (year and int(path.stem) != year):
+            continue
+        yield from iter_paper(path)
+
+
+class LLMFallback:
+    """Re-structure flagged question blocks with Claude; answers are cached by block content."""
+
+    def __init__(self, cache: ConversionCache | None, model: str = MODEL):
+        self.cache = cache
+        self.model = model
+        self.client = None
+        self.calls = self.hits = self.failures = 0
+
+    def options(self) -> dict:
+        return {"model": self.model, "max_tokens": MAX_TOKENS, "prompt_version": PROMPT_VERSION}
+
+    def _ask(self, record: dict) -> str:
+        if self.client is None:
+            import anthropic
+
+            self.client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        prompt = FALLBACK_PROMPT.format(subject=record["subject"].replace("-", " ").title(),
+                                        issues=", ".join(record["issues"]), markdown=record["markdown"])
+        response = self.client.messages.create(model=self.model, max_tokens=MAX_TOKENS,
+                                               messages=[{"role": "user", "content": prompt}])
+        self.calls += 1
+        return "".join(block.text for block in response.content if block.type == "text")
+
+    def fix(self, record: dict) -> dict:
+        block_sha256 = hashlib.sha256(record["markdown"].encode()).hexdigest()
+        hit = self.cache.get(block_sha256, "structure", self.options()) if self.cache else None
+        if hit:
+            self.hits += 1
+            text = hit[0]
+        else:
+            try:
+                text = self._ask(record)
+            except Exception as e:
+                self.failures += 1
+                log.warning("  LLM fallback failed for %s: %s", record["id"], e)
+                return record
+        match = re.search(r"\{[\s\S]*\}", text)
+        try:
+            fixed = json.loads(match.group(0)) if match else None
+        except json.JSONDecodeError:
+            fixed = None
+        if not isinstance(fixed, dict):
+            self.failures += 1
+            log.warning("  LLM fallback returned no JSON for %s", record["id"])
+            return record
+        if self.cache and not hit:
+            self.cache.put(block_sha256, "structure", self.options(), text, {"id": record["id"]})
+        for key in ("question", "options", "correctAnswer", "solution", "type", "hasAlternative",
+                    "alternativeQuestion"):
+            if key in fixed:
+                record[key] = fixed[key]
+        if record["marks"] is None and isinstance(fixed.get("marks"), int):
+            record["marks"] = fixed["marks"]
+        record["source"] = "llm"
+        return record
+
+
+def parse_file(path: Path, output: Path, fallback: LLMFallback | None) -> dict:
+    """Stream one paper to `output` (written atomically). Returns counts for the run state."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".part")
+    questions = flagged = fixed = 0
+    with open(tmp, "w", encoding="utf-8") as out:
+        for record in iter_paper(path):
+            questions += 1
+            if record["issues"]:
+                flagged += 1
+                if fallback is not None:
+                    record = fallback.fix(record)
+                    fixed += record["source"] == "llm"
+            del record["markdown"]
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, output)
+    return {"questions": questions, "flagged": flagged, "llm_fixed": fixed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse raw markdown papers into JSON Lines question records")
+    parser.add_argument("--raw-dir", type=Path, default=RAW_DIR, help=f"(default: {RAW_DIR})")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help=f"(default: {OUTPUT_DIR})")
+    parser.add_argument("--subject", help="only this subject, e.g. physics")
+    parser.add_argument("--year", type=int, help="only this year")
+    parser.add_argument("--force", action="store_true", help="reparse even unchanged papers")
+    parser.add_argument("--llm-fallback", action="store_true",
+                        help="send questions the parser flags to Claude (cached by block content)")
+    parser.add_argument("--model", default=MODEL, help=f"for --llm-fallback (default: {MODEL})")
+    parser.add_argument("--no-cache", action="store_true", help="don't cache LLM fallback answers")
+    args = parser.parse_args(argv)
+
+    state_path = args.output_dir / STATE_FILE
+    try:
+        state = json.loads(state_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    if state.get("parser_version") != PARSER_VERSION:
+        state = {"parser_version": PARSER_VERSION, "files": {}}
+
+    fallback = LLMFallback(None if args.no_cache else ConversionCache(), args.model) if args.llm_fallback else None
+    papers = [p for p in sorted(args.raw_dir.glob("*/*.md")) if p.stem.isdigit()
+              and (not args.subject or p.parent.name == args.subject)
+              and (not args.year or int(p.stem) == args.year)]
+    parsed = unchanged = 0
+    for path in papers:
+        name = f"{path.parent.name}/{path.stem}"
+        output = args.output_dir / path.parent.name / f"{path.stem}.jsonl"
+        sha256 = file_sha256(path)
+        previous = state["files"].get(name)
+        if (previous and previous["sha256"] == sha256 and output.exists() and not args.force
+                and not (args.llm_fallback and previous["flagged"] > previous["llm_fixed"])):
+            unchanged += 1
+            continue
+        counts = parse_file(path, output, fallback)
+        state["files"][name] = {"sha256": sha256, **counts}
+        parsed += 1
+        log.info("  %s: %d questions, %d flagged%s", name, counts["questions"], counts["flagged"],
+                 f", {counts['llm_fixed']} fixed by LLM" if fallback else "")
+        # Save after every paper so an interrupted run keeps its progress.
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps(state, indent=2))
+
+    if not args.subject and not args.year:
+        live = {f"{p.parent.name}/{p.stem}" for p in papers}
+        for name in sorted(set(state["files"]) - live):
+            (args.output_dir / f"{name}.jsonl").unlink(missing_ok=True)
+            del state["files"][name]
+            log.info("  %s: removed (raw paper is gone)", name)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps(state, indent=2))
+
+    names = (f"{p.parent.name}/{p.stem}" for p in papers)
+    entries = [state["files"][name] for name in names if name in state["files"]]
+    log.info("Parsed %d papers, %d unchanged: %d questions, %d flagged by the parser",
+             parsed, unchanged, sum(e["questions"] for e in entries), sum(e["flagged"] for e in entries))
+    if fallback:
+        log.info("LLM fallback: %d calls, %d cached, %d failed", fallback.calls, fallback.hits, fallback.failures)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)-8s  %(message)s", datefmt="%H:%M:%S")
+    sys.exit(main())
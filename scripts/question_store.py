@@ -0,0 +1,302 @@
+"""
+Compact, memory-mapped question store over data/parsed/raw.
+
+Every consumer used to re-read and re-parse the markdown papers to find
+questions. `build` streams `data/parsed/raw/<subject>/<year>.md` through
+parse_questions.iter_questions() once and compiles it into a single binary
+file:
+
+  - one UTF-8 text blob holding every question's markdown block (text,
+    options, answer, solution, OR alternative), addressed by (offset, length);
+  - fixed-width columns per question: subject, year, section, marks,
+    question number and sub-part;
+  - an inverted token index: a sorted vocabulary and, per term, the sorted
+    ids of the questions that mention it.
+
+Opening the store is an mmap plus a few memoryview casts, so load time is
+near zero and nothing is parsed or copied until it is used. A query such as
+"3-mark Physics questions mentioning capacitor" intersects posting lists
+and checks the columns, well under a millisecond.
+
+Usage:
+    python scripts/question_store.py build
+    python scripts/question_store.py query capacitor --subject physics --marks 3
+    python scripts/question_store.py query "lens focal" --year 2024 --show
+    python scripts/question_store.py stats
+"""
+
+import re
+import sys
+import mmap
+import json
+import time
+import struct
+import argparse
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from parse_questions import RAW_DIR, iter_corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+STORE_FILE = ROOT / "data" / "parsed" / "questions.qstore"
+
+MAGIC = b"QSTORE\0\0"
+VERSION = 1
+# Name and array typecode of each per-question column, in file order.
+COLUMNS = (("start", "Q"), ("length", "I"), ("year", "H"), ("number", "H"),
+           ("subject", "B"), ("section", "B"), ("marks", "B"), ("part", "B"))
+# magic, version, byte-order mark, questions, terms, postings, then (offset, length) of the
+# columns, term offsets, term blob, posting offsets, posting ids, text blob and JSON metadata.
+# Everything is in native byte order; the mark catches a store copied to another architecture.
+HEADER = struct.Struct("=8sIIIII" + "QQ" * (len(COLUMNS) + 6))
+BYTE_ORDER_MARK = 0x01020304
+
+LATEX_COMMAND_RE = re.compile(r"\\[a-zA-Z]+")
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]+|\d+")
+
+
+def normalize_token(token: str) -> str:
+    """Fold simple plurals so "capacitor" finds "capacitors" (and back)."""
+    if len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> set[str]:
+    """Distinct index terms in `text`: lower-cased words and numbers, LaTeX commands dropped."""
+    return {normalize_token(t) for t in TOKEN_RE.findall(LATEX_COMMAND_RE.sub(" ", text).lower())}
+
+
+def build(output: Path = STORE_FILE, raw_dir: Path = RAW_DIR) -> dict:
+    """Compile the corpus into `output` (written atomically). Returns counts."""
+    subjects: list[str] = []
+    columns = {name: array(code) for name, code in COLUMNS}
+    blob = bytearray()
+    postings: dict[str, list[int]] = {}
+
+    for qid, record in enumerate(iter_corpus(raw_dir)):
+        if record["subject"] not in subjects:
+            subjects.append(record["subject"])
+        encoded = record["markdown"].encode()
+        row = {
+            "start": len(blob), "length": len(encoded), "year": record["year"],
+            "number": record["questionNumber"], "subject": subjects.index(record["subject"]),
+            "section": ord(record["section"] or "?"), "marks": min(record["marks"] or 0, 255),
+            "part": ord(record["part"]) if record["part"] else 0,
+        }
+        for name, column in columns.items():
+            column.append(row[name])
+        blob += encoded
+        for term in tokenize(record["markdown"]):
+            postings.setdefault(term, []).append(qid)
+
+    vocabulary = sorted(postings)
+    term_blob = bytearray()
+    term_offsets, posting_offsets, posting_ids = array("I", [0]), array("I", [0]), array("I")
+    for term in vocabulary:
+        term_blob += term.encode()
+        term_offsets.append(len(term_blob))
+        posting_ids.extend(postings[term])       # ids were appended in increasing order
+        posting_offsets.append(len(posting_ids))
+
+    meta = json.dumps({"subjects": subjects}).encode()
+    sections = [columns[name].tobytes() for name, _ in COLUMNS] + [
+        term_offsets.tobytes(), bytes(term_blob), posting_offsets.tobytes(), posting_ids.tobytes(),
+        bytes(blob), meta,
+    ]
+    layout, offset = [], HEADER.size
+    for data in sections:
+        offset += -offset % 8           # keep every array 8-byte aligned for memoryview.cast
+        layout += [offset, len(data)]
+        offset += len(data)
+
+    n = len(columns["start"])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDER_MARK, n, len(vocabulary), len(posting_ids), *layout))
+        for data, start in zip(sections, layout[::2]):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(data)
+    tmp.replace(output)
+    return {"questions": n, "terms": len(vocabulary), "postings": len(posting_ids),
+            "papers": len({(columns["subject"][i], columns["year"][i]) for i in range(n)}),
+            "bytes": output.stat().st_size}
+
+
+class QuestionStore:
+    """Read-only view of a built store. Columns are memoryviews straight over the mmap."""
+
+    def __init__(self, path: Path = STORE_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, bom, self.count, self.term_count, _, *layout = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version-{VERSION} question store (run `build`)")
+        if bom != BYTE_ORDER_MARK:
+            raise ValueError(f"{path}: built on a machine with a different byte order (run `build`)")
+        spans = [view[start:start + length] for start, length in zip(layout[::2], layout[1::2])]
+        for (name, code), span in zip(COLUMNS, spans):
+            setattr(self, name, span.cast(code))
+        term_offsets, self._terms, posting_offsets, posting_ids, self._text, meta = spans[len(COLUMNS):]
+        self._term_offsets = term_offsets.cast("I")
+        self._posting_offsets = posting_offsets.cast("I")
+        self._posting_ids = posting_ids.cast("I")
+        self.subjects: list[str] = json.loads(bytes(meta))["subjects"]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def term(self, index: int) -> str:
+        return bytes(self._terms[self._term_offsets[index]:self._term_offsets[index + 1]]).decode()
+
+    def _find_term(self, term: str) -> int | None:
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.term_count and self.term(lo) == term else None
+
+    def postings(self, term: str) -> array:
+        """Sorted ids of the questions containing `term` (already normalised).
+
+        A copy, so it may outlive the store: close() cannot release an mmap
+        while views into it are held.
+        """
+        return array("I", self._postings(term))
+
+    def _postings(self, term: str) -> memoryview:
+        index = self._find_term(term)
+        if index is None:
+            return self._posting_ids[0:0]
+        return self._posting_ids[self._posting_offsets[index]:self._posting_offsets[index + 1]]
+
+    def text(self, qid: int) -> str:
+        start = self.start[qid]
+        return bytes(self._text[start:start + self.length[qid]]).decode()
+
+    def get(self, qid: int) -> dict:
+        return {
+            "id": qid,
+            "subject": self.subjects[self.subject[qid]],
+            "year": self.year[qid],
+            "section": chr(self.section[qid]),
+            "marks": self.marks[qid] or None,
+            "number": self.number[qid],
+            "part": chr(self.part[qid]) if self.part[qid] else "",
+            "text": self.text(qid),
+        }
+
+    def search(self, query: str = "", *, subject: str | None = None, year: int | None = None,
+               marks: int | None = None, section: str | None = None) -> list[int]:
+        """Ids of questions containing every term of `query` and matching the column filters."""
+        terms = tokenize(query)
+        if terms:
+            lists = sorted((self._postings(t) for t in terms), key=len)
+            candidates = lists[0]
+            for other in lists[1:]:
+                if not candidates:
+                    break
+                candidates = [qid for qid in candidates if _contains(other, qid)]
+        else:
+            candidates = range(self.count)
+
+        subject_id = None
+        if subject is not None:
+            if subject not in self.subjects:
+                return []
+            subject_id = self.subjects.index(subject)
+        section_code = ord(section.upper()) if section else None
+        return [
+            qid for qid in candidates
+            if (subject_id is None or self.subject[qid] == subject_id)
+            and (year is None or self.year[qid] == year)
+            and (marks is None or self.marks[qid] == marks)
+            and (section_code is None or self.section[qid] == section_code)
+        ]
+
+    def close(self):
+        for name, _ in COLUMNS:
+            getattr(self, name).release()
+        for view in (self._term_offsets, self._posting_offsets, self._posting_ids, self._terms, self._text):
+            view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _contains(sorted_ids: memoryview, qid: int) -> bool:
+    i = bisect_left(sorted_ids, qid)
+    return i < len(sorted_ids) and sorted_ids[i] == qid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the memory-mapped question store")
+    parser.add_argument("--store", type=Path, default=STORE_FILE, help=f"(default: {STORE_FILE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="compile data/parsed/raw into the store")
+    p.add_argument("--raw-dir", type=Path, default=RAW_DIR, help=f"(default: {RAW_DIR})")
+    p = sub.add_parser("query", help="find questions by terms and columns")
+    p.add_argument("terms", nargs="?", default="", help="words every question must contain")
+    p.add_argument("--subject", help="e.g. physics, computer-science")
+    p.add_argument("--year", type=int)
+    p.add_argument("--marks", type=int)
+    p.add_argument("--section", help="e.g. C")
+    p.add_argument("--show", action="store_true", help="print the question text, not just a summary line")
+    p.add_argument("--limit", type=int, default=20)
+    sub.add_parser("stats", help="counts per subject and marks")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        counts = build(args.store, args.raw_dir)
+        print(f"Built {args.store} in {time.perf_counter() - t0:.2f}s: {counts['questions']} questions "
+              f"from {counts['papers']} papers, {counts['terms']} terms, {counts['postings']} postings, "
+              f"{counts['bytes'] / 1024:.0f} KB")
+        return 0
+
+    t0 = time.perf_counter()
+    store = QuestionStore(args.store)
+    opened = time.perf_counter() - t0
+    with store:
+        if args.command == "stats":
+            by_subject: dict[str, dict[int, int]] = {}
+            for qid in range(len(store)):
+                marks = by_subject.setdefault(store.subjects[store.subject[qid]], {})
+                marks[store.marks[qid]] = marks.get(store.marks[qid], 0) + 1
+            print(f"{len(store)} questions, {store.term_count} terms (opened in {opened * 1e3:.2f} ms)")
+            for subject, marks in sorted(by_subject.items()):
+                detail = ", ".join(f"{m or '?'}m: {n}" for m, n in sorted(marks.items()))
+                print(f"  {subject:<17} {sum(marks.values()):>5}  ({detail})")
+            return 0
+
+        t1 = time.perf_counter()
+        hits = store.search(args.terms, subject=args.subject, year=args.year, marks=args.marks,
+                            section=args.section)
+        searched = time.perf_counter() - t1
+        for qid in hits[:args.limit]:
+            q = store.get(qid)
+            label = (f"{q['subject']} {q['year']} Q{q['number']}{q['part']} "
+                     f"(section {q['section']}, {q['marks'] or '?'}m)")
+            if args.show:
+                print(f"=== {label}\n{q['text']}\n")
+            else:
+                lines = q["text"].splitlines()
+                first = next((line for line in lines if line.strip() and not line.startswith("#")), "")
+                print(f"{label}: {first[:100]}")
+        print(f"{len(hits)} matches (open {opened * 1e3:.2f} ms, search {searched * 1e3:.3f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
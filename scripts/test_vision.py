@@ -1,49 +1,71 @@
 """Test Claude vision on page 1 of Physics 2024 paper — outputs raw markdown."""
 import anthropic
 import base64
+import hashlib
 import os
 
-client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+from conversion_cache import ConversionCache
+from vision_extract import slice_pdf
+
+MODEL = "claude-sonnet-4-6"
+MAX_TOKENS = 4096
+# Bump when PROMPT changes meaning, so cached conversions are not reused.
+PROMPT_VERSION = 1
+PROMPT = (
+    "Convert ONLY the first page of this PDF to markdown. "
+    "Preserve all question text, options, answers, and formatting exactly as they appear. "
+    "Use markdown formatting (headings, bold, lists). "
+    "For math formulas use LaTeX notation. "
+    "Output ONLY the markdown, no commentary."
+)
 
 pdf_path = "data/pdfs/physics/physics_2024_solved.pdf"
 with open(pdf_path, "rb") as f:
-    pdf_b64 = base64.standard_b64encode(f.read()).decode("utf-8")
-
-response = client.messages.create(
-    model="claude-sonnet-4-6",
-    max_tokens=4096,
-    messages=[
-        {
-            "role": "user",
-            "content": [
-                {
-                    "type": "document",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "application/pdf",
-                        "data": pdf_b64,
+    pdf_bytes = f.read()
+
+cache = ConversionCache()
+options = {"model": MODEL, "max_tokens": MAX_TOKENS, "prompt_version": PROMPT_VERSION, "pages": "1"}
+pdf_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+hit = cache.get(pdf_sha256, "vision", options)
+
+if hit:
+    text, meta = hit
+    usage = meta["usage"]
+    print("=== (cached — no API call) ===")
+else:
+    client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+    # Send only page 1, not the whole paper.
+    pdf_b64 = base64.standard_b64encode(slice_pdf(pdf_bytes, [1])).decode("utf-8")
+
+    response = client.messages.create(
+        model=MODEL,
+        max_tokens=MAX_TOKENS,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "document",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "application/pdf",
+                            "data": pdf_b64,
+                        },
                     },
-                    # Only send first 5 pages to limit cost
-                    "cache_control": {"type": "ephemeral"},
-                },
-                {
-                    "type": "text",
-                    "text": (
-                        "Convert ONLY the first page of this PDF to markdown. "
-                        "Preserve all question text, options, answers, and formatting exactly as they appear. "
-                        "Use markdown formatting (headings, bold, lists). "
-                        "For math formulas use LaTeX notation. "
-                        "Output ONLY the markdown, no commentary."
-                    ),
-                },
-            ],
-        }
-    ],
-)
+                    {
+                        "type": "text",
+                        "text": PROMPT,
+                    },
+                ],
+            }
+        ],
+    )
 
-text = "".join(
-    block.text for block in response.content if block.type == "text"
-)
+    text = "".join(
+        block.text for block in response.content if block.type == "text"
+    )
+    usage = {"input_tokens": response.usage.input_tokens, "output_tokens": response.usage.output_tokens}
+    cache.put(pdf_sha256, "vision", options, text, {"usage": usage, "pdf": pdf_path})
 
 with open("data/parsed/test_vision_physics_2024.md", "w") as f:
     f.write(text)
@@ -51,4 +73,4 @@ with open("data/parsed/test_vision_physics_2024.md", "w") as f:
 print("=== CLAUDE VISION OUTPUT (page 1) ===\n")
 print(text[:3000])
 print(f"\n\n=== Total length: {len(text)} chars ===")
-print(f"=== Input tokens: {response.usage.input_tokens}, Output tokens: {response.usage.output_tokens} ===")
+print(f"=== Input tokens: {usage['input_tokens']}, Output tokens: {usage['output_tokens']} ===")
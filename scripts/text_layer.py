@@ -0,0 +1,179 @@
+"""
+Text-layer fast path for born-digital PDFs.
+
+Most cbseacademic.nic.in sample papers and marking schemes carry a complete
+embedded text layer, and for those pages docling's layout/OCR models or a
+vision request buy nothing. classify_pages() looks at each page's text layer
+with pypdfium2 and sends a page down the expensive path only if it:
+
+  - has (almost) no text but does have images, so it is a scan;
+  - is mostly covered by images, such as diagrams or figure-heavy pages;
+  - has text whose glyphs don't map to real characters (private-use or
+    replacement characters, as math fonts often produce); or
+  - is dense with math symbols, which a text layer linearises badly.
+
+Every other page is extracted directly by extract_text() into light markdown
+(section and question headings in the data/parsed/raw style).
+
+Usage:
+    python scripts/text_layer.py cbse_papers/downloads/Physics/2025_SamplePaper/*.pdf
+    python scripts/text_layer.py paper.pdf --pages --json
+"""
+
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Bump when the classifier or extract_text() change output, so cached conversions are not reused.
+TEXT_LAYER_VERSION = 1
+
+MIN_CHARS = 200                 # fewer non-space characters than this counts as "no text"
+MAX_IMAGE_COVERAGE = 0.40       # fraction of the page area under images
+MAX_GARBLED_RATIO = 0.02        # private-use / replacement / control characters
+MAX_MATH_RATIO = 0.03           # math operators, Greek and math alphanumerics
+
+GARBLED_RE = re.compile("[\ue000-\uf8ff\ufffd\x00-\x08\x0b\x0c\x0e-\x1f]")
+MATH_RE = re.compile("[\u0391-\u03c9\u2200-\u22ff\u27c0-\u27ef\u2980-\u2aff\U0001d400-\U0001d7ff]")
+SECTION_RE = re.compile(r"^\s*SECTION\s*[-–—:]?\s*([A-E])\b[\s.:-]*(.*)$", re.IGNORECASE)
+QUESTION_RE = re.compile(r"^\s*(?:Q\.?\s*)?(\d{1,2})\s*[.)]\s+(?=\S)(.*)$")
+OPTION_RE = re.compile(r"^\s*\(?([a-d])\)\s+(.*)$")
+
+
+def _image_coverage(page, width: float, height: float) -> float:
+    import pypdfium2.raw as pdfium_c
+
+    area = 0.0
+    for obj in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,), max_depth=2):
+        left, bottom, right, top = obj.get_pos()
+        area += max(0.0, min(right, width) - max(left, 0.0)) * max(0.0, min(top, height) - max(bottom, 0.0))
+    return min(1.0, area / (width * height)) if width and height else 0.0
+
+
+def classify_page(page) -> dict:
+    """{"kind": "text" | "layout", "reason", and the measurements behind it} for one pypdfium2 page."""
+    textpage = page.get_textpage()
+    try:
+        text = textpage.get_text_range()
+    finally:
+        textpage.close()
+    width, height = page.get_size()
+    chars = len(text) - sum(text.count(c) for c in " \t\r\n")
+    images = _image_coverage(page, width, height)
+    garbled = len(GARBLED_RE.findall(text)) / chars if chars else 0.0
+    math = len(MATH_RE.findall(text)) / chars if chars else 0.0
+    info = {"chars": chars, "image_coverage": round(images, 3),
+            "garbled_ratio": round(garbled, 4), "math_ratio": round(math, 4)}
+
+    if chars < MIN_CHARS and images > 0.05:
+        return {"kind": "layout", "reason": "scanned", **info}
+    if images > MAX_IMAGE_COVERAGE:
+        return {"kind": "layout", "reason": "images", **info}
+    if garbled > MAX_GARBLED_RATIO:
+        return {"kind": "layout", "reason": "garbled text", **info}
+    if math > MAX_MATH_RATIO:
+        return {"kind": "layout", "reason": "math", **info}
+    return {"kind": "text", "reason": "text layer" if chars >= MIN_CHARS else "blank", **info}
+
+
+def classify_pages(pdf) -> list[dict]:
+    """Classify every page of `pdf` (a path or bytes); entries carry a 1-based "page"."""
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(str(pdf) if isinstance(pdf, Path) else pdf)
+    try:
+        results = []
+        for index in range(len(document)):
+            page = document[index]
+            try:
+                results.append({"page": index + 1, **classify_page(page)})
+            finally:
+                page.close()
+        return results
+    finally:
+        document.close()
+
+
+def page_runs(classes: list[dict], max_layout_pages: int | None = None) -> list[tuple[str, int, int]]:
+    """Contiguous (kind, first, last) runs of pages; layout runs split at `max_layout_pages`."""
+    runs: list[list] = []
+    for entry in classes:
+        kind, page = entry["kind"], entry["page"]
+        last = runs[-1] if runs else None
+        if (last and last[0] == kind and last[2] == page - 1
+                and not (kind == "layout" and max_layout_pages and page - last[1] >= max_layout_pages)):
+            last[2] = page
+        else:
+            runs.append([kind, page, page])
+    return [tuple(run) for run in runs]
+
+
+def _markdown_lines(text: str):
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            yield ""
+        elif m := SECTION_RE.match(line):
+            rest = f" — {m.group(2).strip()}" if m.group(2).strip() else ""
+            yield f"\n## Section {m.group(1).upper()}{rest}\n"
+        elif m := QUESTION_RE.match(line):
+            yield f"\n### Q{m.group(1)}.\n{m.group(2)}"
+        elif m := OPTION_RE.match(line):
+            yield f"({m.group(1)}) {m.group(2)}"
+        else:
+            yield line
+
+
+def extract_text(pdf, first: int, last: int) -> str:
+    """Markdown for pages `first`..`last` (1-based, inclusive) straight from the text layer."""
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(str(pdf) if isinstance(pdf, Path) else pdf)
+    pages = []
+    try:
+        for index in range(first - 1, last):
+            page = document[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+            markdown = "\n".join(_markdown_lines(text))
+            pages.append(re.sub(r"\n{3,}", "\n\n", markdown).strip())
+    finally:
+        document.close()
+    return "\n\n".join(p for p in pages if p)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify PDF pages by whether their text layer is usable")
+    parser.add_argument("pdfs", type=Path, nargs="+")
+    parser.add_argument("--pages", action="store_true", help="show every page, not just a summary per file")
+    parser.add_argument("--json", action="store_true", help="print the classification as JSON")
+    args = parser.parse_args(argv)
+
+    report, text_pages, all_pages = {}, 0, 0
+    for pdf in args.pdfs:
+        classes = classify_pages(pdf)
+        report[str(pdf)] = classes
+        n_text = sum(c["kind"] == "text" for c in classes)
+        text_pages += n_text
+        all_pages += len(classes)
+        if args.json:
+            continue
+        print(f"{pdf}: {n_text}/{len(classes)} pages from the text layer")
+        if args.pages:
+            for c in classes:
+                print(f"  page {c['page']:>3}: {c['kind']:<6} {c['reason']:<13} chars={c['chars']:<5} "
+                      f"images={c['image_coverage']:.2f} garbled={c['garbled_ratio']:.3f} math={c['math_ratio']:.3f}")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"\nTotal: {text_pages}/{all_pages} pages ({text_pages / max(all_pages, 1):.0%}) skip the layout pipeline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""
+Claude vision PDF -> markdown, on page ranges, with concurrent requests.
+
+Instead of base64-encoding the whole paper for every question (as
+test_vision.py used to), the requested pages are cut out of the PDF with
+pypdfium2 and sent in chunks of --chunk-pages pages, several chunks at a time
+through a bounded async client. The chunks' markdown is joined in page order.
+
+Prompt caching is used on purpose. Every request for a paper starts with the
+same prefix (the conversion instructions plus the paper's first page(s) as
+context, with a cache breakpoint after them). The chunk holding those pages
+goes out first, converting them from the prefix rather than sending them a
+second time, and writes the prefix to the cache; the remaining chunks then
+fan out and read it at the cache-read price. Token usage, including cache writes and
+reads, is totalled and priced per run.
+
+--text-fast-path takes pages with a usable embedded text layer (see
+text_layer.py) straight from the PDF and only sends the rest to the API.
+
+--fake swaps in an offline client with simulated latency, token counts and
+cache behaviour, for measuring throughput and accounting without the API.
+
+Usage:
+    python scripts/vision_extract.py data/pdfs/physics/physics_2024_solved.pdf --pages 1-5
+    python scripts/vision_extract.py paper.pdf --chunk-pages 2 --concurrency 6 -o paper.md
+    python scripts/vision_extract.py paper.pdf --fake --concurrency 16
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import base64
+import random
+import asyncio
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+
+from conversion_cache import ConversionCache
+from text_layer import TEXT_LAYER_VERSION, classify_pages, extract_text, page_runs
+
+MODEL = "claude-sonnet-4-6"
+MAX_TOKENS = 8192               # per chunk
+CHUNK_PAGES = 2
+CONTEXT_PAGES = 1               # leading pages sent (and cached) with every chunk
+CONCURRENCY = 4
+# Bump when SYSTEM_PROMPT or chunk_instruction() change meaning, so cached conversions are not reused.
+PROMPT_VERSION = 2
+# USD per million tokens
+PRICES = {
+    "claude-sonnet-4-6": {"input": 3.00, "output": 15.00, "cache_write": 3.75, "cache_read": 0.30},
+}
+
+SYSTEM_PROMPT = """You convert solved CBSE Class 12 question papers into clean, well-structured markdown.
+
+RULES:
+1. Preserve ALL content: every question, every option, every answer, every solution/explanation
+2. Use clear section headers: ## Section A (1 mark each), ## Section B (2 marks each), etc.
+3. Number questions exactly as they appear in the paper, as ### Q1., ### Q2., ...
+4. For MCQs, list options as (a), (b), (c), (d) on separate lines
+5. Mark answers clearly with **Answer:** followed by the correct option/value
+6. Mark solutions/explanations with **Solution:** followed by the full explanation
+7. For "Or" alternative questions, use "**OR**" on its own line between the main question and alternative
+8. Use LaTeX notation for ALL math formulas: inline $...$ and display $$...$$
+9. Use standard notation for chemical formulas (H₂O, NaOH, etc.)
+10. Preserve any diagrams by describing them in [Diagram: description] format
+11. Separate questions with a line containing only ---
+12. Output ONLY the markdown, no commentary"""
+
+log = logging.getLogger("vision_extract")
+
+
+# ---------------------------------------------------------------------------
+# Pages
+# ---------------------------------------------------------------------------
+def parse_pages(spec: str | None, total: int) -> list[int]:
+    """"1-5,9" -> [1, 2, 3, 4, 5, 9] (1-based, clipped to `total`); None -> every page."""
+    if not spec:
+        return list(range(1, total + 1))
+    pages = set()
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        pages.update(range(max(1, start), min(end, total) + 1))
+    return sorted(pages)
+
+
+def chunk_pages(pages: list[int], size: int) -> list[list[int]]:
+    """Consecutive pages in chunks of up to `size`; a chunk never spans a gap in `pages`."""
+    chunks: list[list[int]] = []
+    for page in pages:
+        if chunks and len(chunks[-1]) < size and chunks[-1][-1] == page - 1:
+            chunks[-1].append(page)
+        else:
+            chunks.append([page])
+    return chunks
+
+
+def page_count(pdf_bytes: bytes) -> int:
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(pdf_bytes)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+def slice_pdf(pdf_bytes: bytes, pages: list[int]) -> bytes:
+    """A new PDF holding only `pages` (1-based) of `pdf_bytes`."""
+    import pypdfium2
+
+    source = pypdfium2.PdfDocument(pdf_bytes)
+    target = pypdfium2.PdfDocument.new()
+    try:
+        target.import_pages(source, [p - 1 for p in pages])
+        out = io.BytesIO()
+        target.save(out)
+        return out.getvalue()
+    finally:
+        target.close()
+        source.close()
+
+
+def _document(pdf_bytes: bytes, cached: bool = False) -> dict:
+    block = {
+        "type": "document",
+        "source": {"type": "base64", "media_type": "application/pdf",
+                   "data": base64.standard_b64encode(pdf_bytes).decode("ascii")},
+    }
+    if cached:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def _page_label(pages: list[int]) -> str:
+    """[1, 2, 3, 9] -> "pages 1-3, 9"."""
+    runs = []
+    for page in pages:
+        if runs and page == runs[-1][1] + 1:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+    text = ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in runs)
+    return f"page {text}" if len(pages) == 1 else f"pages {text}"
+
+
+def chunk_instruction(pages: list[int], context: list[int], subject: str | None) -> str:
+    """What to convert. Pages of `context` in `pages` are converted from the context document itself."""
+    paper = f"a CBSE Class 12 {subject} solved question paper" if subject else "a CBSE Class 12 solved question paper"
+    overlap = [p for p in pages if p in context]
+    rest = [p for p in pages if p not in context]
+    lines = []
+    if not context:
+        lines.append(f"Convert this document, which is {_page_label(pages)} of {paper}.")
+    elif not overlap:
+        lines.append(f"The first document is {_page_label(context)} of {paper}, given only as context "
+                     "(paper header, section layout, marks per section). Do not convert it.")
+        lines.append(f"Convert the second document, which is {_page_label(pages)} of the same paper.")
+    else:
+        if overlap == context:
+            lines.append(f"The first document is {_page_label(context)} of {paper}. Convert it.")
+        else:
+            lines.append(f"The first document is {_page_label(context)} of {paper}. Convert only "
+                         f"{_page_label(overlap)} of it; the rest is given as context.")
+        if rest:
+            lines.append(f"Then convert the second document, which is {_page_label(rest)} of the same paper, "
+                         "continuing where the first left off.")
+    lines.append("Start with the section header in force at the top of these pages if it is printed on them; "
+                 "a question cut off at the start or end of the pages should be converted as far as it goes.")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+class FakeVision:
+    """Offline stand-in for anthropic.AsyncAnthropic: `await client.messages.create(...)`.
+
+    Input tokens are estimated per page and per character of text, the
+    response takes `latency` seconds plus `per_page` per page, and a prefix up
+    to a cache_control breakpoint is a cache read if an earlier response
+    already wrote it, as the real API behaves.
+    """
+
+    PAGE_TOKENS = 1600
+    OUTPUT_TOKENS_PER_PAGE = 900
+    MIN_CACHE_TOKENS = 1024         # shorter prefixes are not cached (the Sonnet minimum)
+
+    def __init__(self, latency: float = 0.5, per_page: float = 0.8, seed: int = 0):
+        self.latency = latency
+        self.per_page = per_page
+        self.rng = random.Random(seed)
+        self.cached_prefixes: set[str] = set()
+        self.messages = self
+        self.calls = 0
+
+    def _tokens(self, block: dict) -> int:
+        if block["type"] == "document":
+            return page_count(base64.standard_b64decode(block["source"]["data"])) * self.PAGE_TOKENS
+        return len(block.get("text", "")) // 4
+
+    async def create(self, *, model: str, max_tokens: int, system, messages: list, **_):
+        self.calls += 1
+        blocks = list(system) + list(messages[0]["content"])
+        digest, prefix_tokens, total, cache_key = hashlib.sha256(model.encode()), 0, 0, None
+        for block in blocks:
+            digest.update(json.dumps(block, sort_keys=True).encode())
+            total += self._tokens(block)
+            if "cache_control" in block and total >= self.MIN_CACHE_TOKENS:
+                prefix_tokens, cache_key = total, digest.hexdigest()
+        documents = [b for b in blocks if b["type"] == "document"]
+        pages = page_count(base64.standard_b64decode(documents[-1]["source"]["data"])) if documents else 0
+        await asyncio.sleep(self.latency + self.per_page * pages * self.rng.uniform(0.8, 1.2))
+
+        read = write = 0
+        if cache_key in self.cached_prefixes:
+            read = prefix_tokens
+        elif cache_key:
+            write = prefix_tokens
+            self.cached_prefixes.add(cache_key)
+        text = "\n\n---\n\n".join(f"### Q{i}.\n[fake markdown for page {i} of {pages}]" for i in range(1, pages + 1))
+        usage = {"input_tokens": total - read - write, "output_tokens": min(max_tokens, pages * self.OUTPUT_TOKENS_PER_PAGE),
+                 "cache_creation_input_tokens": write, "cache_read_input_tokens": read}
+        return _FakeMessage(text, usage)
+
+
+class _FakeMessage:
+    def __init__(self, text: str, usage: dict):
+        self.content = [_FakeBlock(text)]
+        self.usage = _FakeBlock("", **usage)
+
+
+class _FakeBlock:
+    def __init__(self, text: str, **fields):
+        self.type = "text"
+        self.text = text
+        self.__dict__.update(fields)
+
+
+def make_client(fake: bool, max_retries: int = 4):
+    if fake:
+        return FakeVision()
+    import anthropic
+
+    return anthropic.AsyncAnthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"), max_retries=max_retries)
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+def usage_cost(usage: dict, model: str) -> float | None:
+    prices = PRICES.get(model)
+    if prices is None:
+        return None
+    return (usage["input_tokens"] * prices["input"] + usage["output_tokens"] * prices["output"]
+            + usage["cache_creation_input_tokens"] * prices["cache_write"]
+            + usage["cache_read_input_tokens"] * prices["cache_read"]) / 1e6
+
+
+async def extract(client, pdf_bytes: bytes, pages: list[int], *, model: str = MODEL,
+                  chunk_size: int = CHUNK_PAGES, context_pages: int = CONTEXT_PAGES,
+                  concurrency: int = CONCURRENCY, max_tokens: int = MAX_TOKENS,
+                  subject: str | None = None) -> dict:
+    """Convert `pages` of a PDF chunk by chunk; returns markdown, per-chunk stats and total usage."""
+    total = page_count(pdf_bytes)
+    context = list(range(1, min(context_pages, total) + 1))
+    system = [{"type": "text", "text": SYSTEM_PROMPT}]
+    prefix = [_document(slice_pdf(pdf_bytes, context), cached=True)] if context else []
+    if not context:
+        # Nothing paper-specific to share; cache the instructions alone (effective once they are long enough).
+        system[0]["cache_control"] = {"type": "ephemeral"}
+
+    chunks = chunk_pages(pages, chunk_size)
+    slots = asyncio.Semaphore(concurrency)
+    results: list[dict | None] = [None] * len(chunks)
+
+    async def run(index: int):
+        chunk = chunks[index]
+        # Context pages in the chunk are converted from the prefix, not sent (and billed) again.
+        rest = [p for p in chunk if p not in context]
+        content = (prefix + ([_document(slice_pdf(pdf_bytes, rest))] if rest else [])
+                   + [{"type": "text", "text": chunk_instruction(chunk, context, subject)}])
+        async with slots:
+            t0 = time.perf_counter()
+            response = await client.messages.create(
+                model=model, max_tokens=max_tokens, system=system,
+                messages=[{"role": "user", "content": content}],
+            )
+            seconds = time.perf_counter() - t0
+        text = "".join(block.text for block in response.content if block.type == "text")
+        usage = {field: getattr(response.usage, field, 0) or 0 for field in USAGE_FIELDS}
+        results[index] = {"pages": chunk, "seconds": seconds, "usage": usage, "markdown": text}
+        log.info("  %s: %.1fs, %d in / %d out tokens (cache write %d, read %d)", _page_label(chunk), seconds,
+                 usage["input_tokens"], usage["output_tokens"],
+                 usage["cache_creation_input_tokens"], usage["cache_read_input_tokens"])
+
+    t0 = time.perf_counter()
+    if chunks:
+        # The first response writes the shared prefix to the cache; only then fan out,
+        # so every other chunk reads it instead of writing its own copy. Start with the
+        # chunk holding the context pages, if any, since it converts them anyway.
+        first = next((i for i, chunk in enumerate(chunks) if set(chunk) & set(context)), 0)
+        await run(first)
+        await asyncio.gather(*(run(i) for i in range(len(chunks)) if i != first))
+    wall = time.perf_counter() - t0
+
+    usage = {field: sum(r["usage"][field] for r in results) for field in USAGE_FIELDS}
+    return {
+        "markdown": "\n\n".join(r["markdown"].strip() for r in results),
+        "parts": [(r["pages"], r["markdown"].strip()) for r in results],
+        "chunks": [{k: v for k, v in r.items() if k != "markdown"} for r in results],
+        "usage": usage,
+        "cost_usd": usage_cost(usage, model),
+        "wall_seconds": wall,
+        "requests": len(chunks),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert PDF pages to markdown with Claude vision")
+    parser.add_argument("pdf", type=Path)
+    parser.add_argument("--pages", help="pages to convert, e.g. 1-5,9 (default: all)")
+    parser.add_argument("-o", "--output", type=Path, help="write markdown here (default: stdout)")
+    parser.add_argument("--subject", help="subject named in the prompt, e.g. Physics")
+    parser.add_argument("--model", default=MODEL, help=f"(default: {MODEL})")
+    parser.add_argument("--chunk-pages", type=int, default=CHUNK_PAGES,
+                        help=f"pages per request (default: {CHUNK_PAGES})")
+    parser.add_argument("--context-pages", type=int, default=CONTEXT_PAGES,
+                        help=f"leading pages sent as cached context with every chunk; 0 for none (default: {CONTEXT_PAGES})")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"requests in flight at once (default: {CONCURRENCY})")
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS, help=f"per chunk (default: {MAX_TOKENS})")
+    parser.add_argument("--text-fast-path", action="store_true",
+                        help="take pages with a usable text layer from the PDF; only the rest go to the API")
+    parser.add_argument("--fake", action="store_true", help="use the offline fake client")
+    parser.add_argument("--no-cache", action="store_true", help="skip the conversion cache")
+    parser.add_argument("--stats", type=Path, help="write per-chunk timings and token usage as JSON")
+    args = parser.parse_args(argv)
+
+    pdf_bytes = args.pdf.read_bytes()
+    pages = parse_pages(args.pages, page_count(pdf_bytes))
+    options = {"model": args.model, "max_tokens": args.max_tokens, "prompt_version": PROMPT_VERSION,
+               "pages": pages, "chunk_pages": args.chunk_pages, "context_pages": args.context_pages,
+               "subject": args.subject}
+    if args.text_fast_path:
+        options["text_layer"] = TEXT_LAYER_VERSION
+    cache = None if args.no_cache or args.fake else ConversionCache()
+    pdf_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+
+    hit = cache.get(pdf_sha256, "vision", options) if cache else None
+    if hit:
+        markdown, result = hit[0], hit[1]
+        log.info("Cached: %s (%s)", args.pdf.name, _page_label(pages))
+    else:
+        text_parts, vision_pages = [], pages
+        if args.text_fast_path:
+            wanted = set(pages)
+            classes = [c for c in classify_pages(pdf_bytes) if c["page"] in wanted]
+            vision_pages = [c["page"] for c in classes if c["kind"] == "layout"]
+            for kind, first, last in page_runs(classes):
+                if kind == "text":
+                    # page_runs() only joins adjacent pages, so first..last are all selected.
+                    text_parts.append((list(range(first, last + 1)), extract_text(pdf_bytes, first, last)))
+            log.info("Text layer: %d of %d pages, %d left for vision",
+                     len(pages) - len(vision_pages), len(pages), len(vision_pages))
+        if vision_pages:
+            log.info("Converting %s, %s in %d chunks, %d at a time", args.pdf.name, _page_label(vision_pages),
+                     len(chunk_pages(vision_pages, args.chunk_pages)), args.concurrency)
+        result = asyncio.run(extract(
+            make_client(args.fake), pdf_bytes, vision_pages, model=args.model, chunk_size=args.chunk_pages,
+            context_pages=args.context_pages, concurrency=args.concurrency, max_tokens=args.max_tokens,
+            subject=args.subject,
+        ))
+        markdown = result.pop("markdown")
+        parts = result.pop("parts")
+        if text_parts:
+            merged = sorted(parts + text_parts, key=lambda part: part[0][0])
+            markdown = "\n\n".join(text for _, text in merged if text)
+            result["text_layer_pages"] = len(pages) - len(vision_pages)
+        if cache:
+            cache.put(pdf_sha256, "vision", options, markdown, result)
+        usage = result["usage"]
+        cost = f", ${result['cost_usd']:.4f}" if result["cost_usd"] is not None else ""
+        log.info("Done in %.1fs: %d requests, %d in / %d out tokens, cache write %d / read %d%s",
+                 result["wall_seconds"], result["requests"], usage["input_tokens"], usage["output_tokens"],
+                 usage["cache_creation_input_tokens"], usage["cache_read_input_tokens"], cost)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(markdown)
+    else:
+        sys.stdout.write(markdown + "\n")
+    if args.stats:
+        args.stats.write_text(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)-8s  %(message)s", datefmt="%H:%M:%S")
+    sys.exit(main())